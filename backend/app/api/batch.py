@@ -0,0 +1,79 @@
+"""여러 데이터셋 통계 API (데이터셋 간 비교)"""
+import logging
+from typing import Dict, List
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.registry import get_dataset
+from ..engine.duckdb_cache import PoolTimeout
+from ..engine.multi import compute_batch_metrics
+from ..engine.stats_index import get_stats_index
+from ..models.schemas import BatchStatsRequest, BatchStatsResponse, DatasetStats, Metric
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+
+@router.post("/batch", response_model=BatchStatsResponse)
+def batch_stats(request: BatchStatsRequest):
+    """
+    여러 데이터셋의 전체 파일 통계를 한 번에 계산
+
+    통계 인덱스가 최신인 데이터셋은 인덱스로 응답하고, 나머지는
+    multi-file 스캔 한 번(소스 종류별)으로 데이터셋별 GROUP BY 집계
+    """
+    metas = []
+    not_found: List[str] = []
+    for dataset_id in dict.fromkeys(request.dataset_ids):  # 중복 제거 (순서 유지)
+        meta = get_dataset(dataset_id)
+        if meta is None:
+            not_found.append(dataset_id)
+        else:
+            metas.append(meta)
+    if not metas:
+        raise HTTPException(status_code=404, detail="No datasets found")
+
+    columns = list(dict.fromkeys(request.columns))
+    columns_by_dataset = {m.dataset_id: [c for c in columns if c in m.columns] for m in metas}
+    if not any(columns_by_dataset.values()):
+        raise HTTPException(status_code=400, detail="No valid columns provided")
+
+    # 1. 통계 인덱스로 응답 가능한 데이터셋
+    metrics_by_dataset: Dict[str, Dict[str, dict]] = {}
+    to_scan = []
+    for m in metas:
+        own = columns_by_dataset[m.dataset_id]
+        indexed = get_stats_index().lookup(m.dataset_id, m.path, own) if own else {}
+        if indexed is not None:
+            metrics_by_dataset[m.dataset_id] = indexed
+        else:
+            to_scan.append(m)
+    logger.debug(
+        "[Batch Stats] %d datasets: %d from stats index, %d scanned", len(metas), len(metas) - len(to_scan), len(to_scan)
+    )
+
+    # 2. 나머지는 multi-file 스캔으로 한 번에 계산
+    if to_scan:
+        try:
+            scanned = compute_batch_metrics(
+                [(m.dataset_id, m.path) for m in to_scan],
+                {m.dataset_id: columns_by_dataset[m.dataset_id] for m in to_scan},
+                columns,
+            )
+        except PoolTimeout:
+            raise
+        except Exception as e:
+            logger.exception("[Batch Stats] 오류: %s", e)
+            raise HTTPException(status_code=500, detail=f"Batch statistics calculation failed: {str(e)}")
+        metrics_by_dataset.update(scanned)
+
+    datasets = {}
+    for m in metas:
+        own = columns_by_dataset[m.dataset_id]
+        metrics = metrics_by_dataset.get(m.dataset_id, {})
+        datasets[m.dataset_id] = DatasetStats(
+            metrics={c: Metric(**metrics[c]) for c in own if c in metrics},
+            missing_columns=[c for c in columns if c not in own],
+        )
+    return BatchStatsResponse(datasets=datasets, not_found=not_found)
@@ -1,14 +1,38 @@
 """데이터셋 API"""
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 
 from ..core.registry import load_registry, get_dataset
-from ..core.settings import PREVIEW_LIMIT_DEFAULT, PREVIEW_LIMIT_MAX
-from ..engine.duckdb_engine import preview_rows
+from ..core.settings import PREVIEW_LIMIT_DEFAULT, PREVIEW_LIMIT_MAX, SERIES_POINTS_DEFAULT, SERIES_POINTS_MAX
+from ..engine.duckdb_engine import preview_rows, stream_preview, step_segments, STREAM_FORMATS, PREVIEW_LAYOUTS
+from ..engine.series import SERIES_METHODS, downsample_series
+from ..engine.shaping import dump_json
+from ..engine.singleflight import coalesce
+from ..models.schemas import TimeRange
+from .stats import apply_time_range
 
 router = APIRouter(prefix="/api/datasets", tags=["datasets"])
 
 
+def _negotiate_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    """
+    preview 응답 형식 결정: format 파라미터 > Accept 헤더 > json
+    Returns: "json" | "arrow" | "ndjson"
+    """
+    if fmt:
+        fmt = fmt.lower()
+        if fmt != "json" and fmt not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+        return fmt
+    if accept:
+        for name, media_type in STREAM_FORMATS.items():
+            if media_type in accept:
+                return name
+    return "json"
+
+
 @router.get("")
 def list_datasets():
     """데이터셋 목록 조회"""
@@ -33,38 +57,176 @@ def get_dataset_meta(dataset_id: str):
         "path": meta.path,
         "size_bytes": meta.size_bytes,
         "columns": meta.columns,
+        # 컬럼별 타입 카탈로그 (ingest 전이면 null)
+        "column_types": meta.column_types,
     }
 
 
 @router.get("/{dataset_id}/preview")
 def preview(
     dataset_id: str,
+    request: Request,
     offset: int = Query(0, ge=0),
     limit: int = Query(PREVIEW_LIMIT_DEFAULT, ge=1, le=PREVIEW_LIMIT_MAX),
+    cursor: Optional[int] = Query(None, ge=0, description="이전 응답의 next_cursor (있으면 offset 대신 사용)"),
+    format: Optional[str] = Query(None, description="json(기본) | arrow | ndjson"),
+    layout: str = Query("rows", description="json 응답 형태: rows(기본, 행 딕셔너리) | columnar(컬럼별 값 배열)"),
+    time_start: Optional[datetime] = Query(None, description="이 시각부터 (Date + Time 기준)"),
+    time_end: Optional[datetime] = Query(None, description="이 시각 전까지"),
 ):
-    """데이터 미리보기 - DuckDB View 캐싱 사용"""
+    """
+    데이터 미리보기 - DuckDB View 캐싱 사용
+    
+    페이지 이동: 응답의 next_cursor를 다음 요청의 cursor로 넘기면 이어지는 행을 반환
+    (sidecar가 있으면 __row_id로 바로 찾아가므로 깊은 페이지도 첫 페이지와 같은 속도)
+    
+    format=arrow (또는 Accept: application/vnd.apache.arrow.stream)는 Arrow IPC stream,
+    format=ndjson (또는 Accept: application/x-ndjson)은 한 줄에 한 행인 JSON을 청크 단위로 스트리밍
+    스트리밍 응답의 페이지 정보는 X-Offset / X-Limit 헤더로 전달
+    
+    layout=columnar면 rows 대신 data=[[컬럼0 값들], [컬럼1 값들], ...]를 반환
+    (컬럼 이름이 행마다 반복되지 않아 넓은 trace에서 응답 크기가 크게 줄어듦)
+    
+    time_start/time_end를 주면 시간 인덱스로 행 범위를 구해서 그 안의 행만 반환
+    (offset/cursor는 그대로 전체 파일 기준 행 번호, 구간 시작보다 앞이면 구간 시작부터)
+    """
     meta = get_dataset(dataset_id)
     if not meta:
         raise HTTPException(status_code=404, detail="Dataset not found")
     
+    if cursor is not None:
+        offset = cursor
+    
+    window_end = None
+    if time_start is not None or time_end is not None:
+        offset, window_end = apply_time_range(meta, TimeRange(start=time_start, end=time_end), offset, None)
+        limit = min(limit, window_end - offset)
+    
+    if layout not in PREVIEW_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported layout: {layout}")
+    
+    fmt = _negotiate_format(format, request.headers.get("accept"))
+    if fmt != "json":
+        if fmt == "arrow":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise HTTPException(status_code=501, detail="Arrow format requires pyarrow")
+        return StreamingResponse(
+            stream_preview(
+                meta.path,
+                fmt,
+                offset=offset,
+                limit=limit,
+                columns=meta.columns,
+                dataset_id=dataset_id,
+            ),
+            media_type=STREAM_FORMATS[fmt],
+            headers={"X-Offset": str(offset), "X-Limit": str(limit)},
+        )
+    
     # registry의 columns를 전달하여 DESCRIBE 제거 (성능 개선)
     # dataset_id를 전달하여 캐시 사용
-    rows, columns = preview_rows(
-        meta.path, 
-        offset=offset, 
-        limit=limit,
-        columns=meta.columns,  # DESCRIBE 제거: registry에서 이미 알고 있는 컬럼 사용
-        dataset_id=dataset_id  # 캐시 활성화
+    # 같은 페이지 요청이 동시에 들어오면 한 번만 조회 (짧은 시간 동안 결과 재사용)
+    rows, columns = coalesce(
+        "preview",
+        dataset_id,
+        meta.path,
+        (offset, limit, layout),
+        lambda: preview_rows(
+            meta.path, 
+            offset=offset, 
+            limit=limit,
+            columns=meta.columns,  # DESCRIBE 제거: registry에서 이미 알고 있는 컬럼 사용
+            dataset_id=dataset_id,  # 캐시 활성화
+            layout=layout,
+        ),
     )
     
-    return {
+    row_count = len(rows[0]) if layout == "columnar" and rows else len(rows)
+    next_cursor = offset + row_count if row_count == limit else None
+    if window_end is not None and next_cursor is not None and next_cursor >= window_end:
+        next_cursor = None
+    response = {
         "dataset_id": dataset_id,
         "offset": offset,
         "limit": limit,
         "columns": columns,
-        "rows": rows,
-        "row_count": len(rows),
+        "row_count": row_count,
+        # 마지막 페이지면 None
+        "next_cursor": next_cursor,
     }
+    if window_end is not None:
+        response["window_end"] = window_end
+    if layout == "columnar":
+        response["layout"] = "columnar"
+        response["data"] = rows
+    else:
+        response["rows"] = rows
+    # 셀 수가 많으므로 jsonable_encoder(값마다 재귀 검사)를 거치지 않고 바로 직렬화
+    return Response(content=dump_json(response), media_type="application/json")
+
+
+@router.get("/{dataset_id}/series")
+def get_dataset_series(
+    dataset_id: str,
+    columns: List[str] = Query(..., description="컬럼 이름 (반복 또는 쉼표 구분)"),
+    points: int = Query(SERIES_POINTS_DEFAULT, ge=3, le=SERIES_POINTS_MAX, description="컬럼당 최대 점 수"),
+    method: str = Query("minmax", description="minmax(기본, bucket별 최솟값/최댓값) | lttb"),
+    row_start: int = Query(0, ge=0),
+    row_end: Optional[int] = Query(None, gt=0),
+) -> Dict[str, Any]:
+    """
+    차트용 다운샘플링 시계열
+    
+    컬럼마다 x(행 번호), y(값), time(Date/Time 컬럼이 있으면 "Date Time") 배열을 반환
+    원본 행을 모두 받지 않고도 피크/모양이 유지된 그래프를 그릴 수 있음
+    """
+    meta = get_dataset(dataset_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if method not in SERIES_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported method: {method}")
+    
+    requested = [c.strip() for value in columns for c in value.split(",") if c.strip()]
+    requested = list(dict.fromkeys(requested))
+    invalid = [c for c in requested if c not in meta.columns]
+    if invalid or not requested:
+        raise HTTPException(status_code=400, detail=f"Invalid columns: {invalid}")
+    if row_end is not None and row_end <= row_start:
+        raise HTTPException(status_code=400, detail="row_end must be greater than row_start")
+    
+    result = coalesce(
+        "series",
+        dataset_id,
+        meta.path,
+        (tuple(requested), points, method, row_start, row_end),
+        lambda: downsample_series(
+            meta.path,
+            requested,
+            points,
+            method=method,
+            row_start=row_start,
+            row_end=row_end,
+            dataset_id=dataset_id,
+            all_columns=meta.columns,
+        ),
+    )
+    return {"dataset_id": dataset_id, "method": method, "points": points, **result}
+
+
+@router.get("/{dataset_id}/steps")
+def get_dataset_steps(dataset_id: str) -> Dict[str, Any]:
+    """
+    레시피 step 구간 목록 (연속된 같은 Step ID/Step Name 행 범위)
+    row_start/row_end는 stats 요청의 row_start/row_end로 그대로 사용 가능
+    """
+    meta = get_dataset(dataset_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    
+    result = coalesce("steps", dataset_id, meta.path, (), lambda: step_segments(meta.path, dataset_id=dataset_id))
+    return {"dataset_id": dataset_id, **result}
 
 
 @router.get("/{dataset_id}/columns")
@@ -0,0 +1,97 @@
+"""비동기 통계 작업 API
+
+- POST   /api/datasets/{dataset_id}/stats/jobs  작업 생성 (202 + job_id)
+- GET    /api/stats/jobs/{job_id}               상태/진행률/결과 조회
+- GET    /api/stats/jobs/{job_id}/events        진행률 SSE 스트림 (끝나면 결과와 함께 종료)
+- DELETE /api/stats/jobs/{job_id}               작업 취소 (DuckDB interrupt)
+"""
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..engine.jobs import FINISHED_STATES, get_job_manager
+from ..models.schemas import StatsRequest
+from .stats import resolve_group_by, resolve_stats_request, run_grouped_stats, run_stats
+
+router = APIRouter(tags=["stats"])
+
+# SSE 진행률 전송 주기(초)
+EVENT_INTERVAL = 0.25
+
+
+def _get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/api/datasets/{dataset_id}/stats/jobs", status_code=202)
+def create_stats_job(dataset_id: str, request: StatsRequest):
+    """통계 계산 작업 생성 - 바로 job_id를 반환하고 계산은 백그라운드에서 실행 (group_by면 그룹별 통계)"""
+    meta, columns, row_start, row_end = resolve_stats_request(dataset_id, request)
+    if request.group_by:
+        # 잘못된 group_by는 작업을 만들기 전에 400
+        resolve_group_by(meta, request.group_by)
+
+    def run(on_connection):
+        if request.group_by:
+            response = run_grouped_stats(
+                dataset_id, meta, columns, row_start, row_end, request.group_by,
+                on_connection=on_connection, metrics=request.metrics,
+            )
+        else:
+            response = run_stats(
+                dataset_id, meta, columns, row_start, row_end, on_connection=on_connection, mode=request.mode,
+                metrics=request.metrics,
+            )
+        return response.model_dump()
+
+    job = get_job_manager().submit(dataset_id, run)
+    return job.to_dict(include_result=False)
+
+
+@router.get("/api/stats/jobs/{job_id}")
+def get_stats_job(job_id: str):
+    """작업 상태 조회 (done이면 result에 StatsResponse 포함)"""
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/api/stats/jobs/{job_id}/events")
+async def stats_job_events(job_id: str):
+    """
+    작업 진행률 SSE 스트림
+    - event: progress  (실행 중, 진행률이 바뀔 때마다)
+    - event: done | failed | cancelled  (마지막 이벤트, done이면 result 포함)
+    """
+    job = _get_job(job_id)
+
+    async def events():
+        last = None
+        while True:
+            status = job.status
+            if status in FINISHED_STATES:
+                yield f"event: {status}\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+                return
+            current = (status, job.progress())
+            if current != last:
+                last = current
+                data = json.dumps(job.to_dict(include_result=False), ensure_ascii=False)
+                yield f"event: progress\ndata: {data}\n\n"
+            await asyncio.sleep(EVENT_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/api/stats/jobs/{job_id}")
+def cancel_stats_job(job_id: str):
+    """작업 취소 - 실행 중인 DuckDB 쿼리를 interrupt"""
+    job = _get_job(job_id)
+    accepted = job.cancel()
+    return {**job.to_dict(include_result=False), "cancel_accepted": accepted}
@@ -1,19 +1,63 @@
 """통계 API"""
+import logging
 from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List, Optional
 
 from ..core.registry import get_dataset
-from ..engine.duckdb_engine import compute_metrics
-from ..models.schemas import StatsRequest, StatsResponse, Metric
+from ..engine.duckdb_cache import OnConnection, PoolTimeout
+from ..engine.sampling import STATS_MODES, compute_approx_metrics
+from ..engine.duckdb_engine import compute_metrics, compute_grouped_metrics, resolve_time_range
+from ..engine.metrics import DEFAULT_METRICS, METRIC_SPECS, compute_state_metrics, split_metrics
+from ..engine.singleflight import coalesce, metrics_ok
+from ..engine.stats_index import get_stats_index
+from ..engine.steps import STEP_GROUP, step_columns
+from ..models.schemas import StatsRequest, StatsResponse, Metric, GroupStats, TimeRange
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/datasets", tags=["stats"])
 
 
-@router.post("/{dataset_id}/stats", response_model=StatsResponse)
-def stats(dataset_id: str, request: StatsRequest):
-    """통계 계산"""
+def apply_time_range(meta, time_range: Optional[TimeRange], row_start: int, row_end: Optional[int]):
+    """
+    time_range를 행 범위로 변환해서 [row_start, row_end)와 교집합
+    Returns: (row_start, row_end) - 해당 시각의 행이 없으면 빈 범위
+    """
+    if time_range is None or (time_range.start is None and time_range.end is None):
+        return row_start, row_end
+    if time_range.start and time_range.end and time_range.end <= time_range.start:
+        raise HTTPException(status_code=400, detail="time_range.end must be after time_range.start")
+    try:
+        time_start, time_end = resolve_time_range(
+            meta.path, meta.columns, time_range.start, time_range.end, dataset_id=meta.dataset_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    row_start = max(row_start, time_start)
+    row_end = time_end if row_end is None else min(row_end, time_end)
+    logger.debug("[Stats API] time_range → rows [%d, %s)", row_start, row_end)
+    return row_start, max(row_start, row_end)
+
+
+def resolve_stats_request(dataset_id: str, request: StatsRequest):
+    """
+    요청 검증 및 계산 대상 결정
+    Returns: (meta, 계산 대상 컬럼, row_start, row_end)
+    """
     meta = get_dataset(dataset_id)
     if not meta:
         raise HTTPException(status_code=404, detail="Dataset not found")
+    if request.mode not in STATS_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {request.mode}")
+    if request.metrics is not None:
+        try:
+            _, extra_metrics = split_metrics(request.metrics)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if extra_metrics and request.group_by:
+            raise HTTPException(status_code=400, detail=f"metrics {extra_metrics} are not supported with group_by")
+    if request.group_by and request.mode != "exact":
+        raise HTTPException(status_code=400, detail=f"mode={request.mode} is not supported with group_by")
     
     # 유효한 컬럼만 필터링
     valid_columns = [c for c in request.columns if c in meta.columns]
@@ -27,9 +71,12 @@ def stats(dataset_id: str, request: StatsRequest):
         compute_target_columns = [c for c in request.compute_columns if c in valid_columns]
         if not compute_target_columns:
             raise HTTPException(status_code=400, detail="No valid compute_columns provided")
-        print(f"[Stats API] Computing stats for selected columns only: {len(compute_target_columns)}/{len(valid_columns)} columns")
+        logger.debug(
+            "[Stats API] Computing stats for selected columns only: %d/%d columns",
+            len(compute_target_columns), len(valid_columns),
+        )
     else:
-        print(f"[Stats API] Computing stats for all columns: {len(compute_target_columns)} columns")
+        logger.debug("[Stats API] Computing stats for all columns: %d columns", len(compute_target_columns))
     
     # 행 범위 설정
     row_start = 0
@@ -37,35 +84,205 @@ def stats(dataset_id: str, request: StatsRequest):
     if request.row_range:
         row_start = request.row_range.start
         row_end = request.row_range.end
+    row_start, row_end = apply_time_range(meta, request.time_range, row_start, row_end)
+    
+    return meta, compute_target_columns, row_start, row_end
+
+
+def resolve_group_by(meta, group_by: str):
+    """
+    group_by 값 검증
+    Returns: (그룹 기준 컬럼 목록, 연속 구간 여부)
+    """
+    if group_by == STEP_GROUP:
+        keys = step_columns(meta.columns)
+        if not keys:
+            raise HTTPException(status_code=400, detail="Dataset has no step columns")
+        return keys, True
+    if group_by not in meta.columns:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by column: {group_by}")
+    return [group_by], False
+
+
+def run_grouped_stats(
+    dataset_id: str,
+    meta,
+    columns: List[str],
+    row_start: int,
+    row_end: Optional[int],
+    group_by: str,
+    on_connection: Optional[OnConnection] = None,
+    metrics: Optional[List[str]] = None,
+) -> StatsResponse:
+    """
+    그룹별 통계 (GROUP BY 한 번으로 모든 그룹 계산)
+    metrics: 응답에 포함할 기본 메트릭 (None이면 기본 6개, 부분 상태 메트릭은 resolve_stats_request에서 거부)
+    """
+    group_keys, segmented = resolve_group_by(meta, group_by)
+    
+    def compute():
+        return compute_grouped_metrics(
+            meta.path,
+            columns,
+            group_keys,
+            row_start,
+            row_end,
+            dataset_id=dataset_id,
+            segmented=segmented,
+            on_connection=on_connection,
+        )
     
-    # 통계 계산 - dataset_id를 전달하여 DuckDB View 캐싱 사용
     try:
-        metrics_dict = compute_metrics(
+        if on_connection is None:
+            groups = coalesce("stats_grouped", dataset_id, meta.path, (tuple(columns), row_start, row_end, group_by), compute)
+        else:
+            groups = compute()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.debug("[Stats API] Grouped by %s: %d groups", group_by, len(groups))
+    return StatsResponse(
+        metrics={},
+        groups=[
+            GroupStats(
+                key=g["key"],
+                row_start=g["row_start"],
+                row_end=g["row_end"],
+                row_count=g["row_count"],
+                metrics={c: Metric(**m) for c, m in _select_metrics(g["metrics"], metrics).items()},
+            )
+            for g in groups
+        ],
+    )
+
+
+def _select_metrics(
+    metrics_dict: Dict[str, Dict[str, Any]], metrics: Optional[List[str]]
+) -> Dict[str, Dict[str, Any]]:
+    """요청하지 않은 메트릭은 응답에서 제외 (근사 여부/신뢰구간/오류 필드는 유지)"""
+    if metrics is None:
+        return metrics_dict
+    requested = set(metrics)
+    return {
+        c: {k: v for k, v in m.items() if k in requested or k not in METRIC_SPECS}
+        for c, m in metrics_dict.items()
+    }
+
+
+def _base_metrics(
+    dataset_id: str,
+    meta,
+    columns: List[str],
+    row_start: int,
+    row_end: Optional[int],
+    on_connection: Optional[OnConnection] = None,
+    mode: str = "exact",
+) -> Dict[str, Dict[str, Any]]:
+    """기본 메트릭 (count/non_null_count/min/max/avg/stddev): 통계 인덱스 → 근사 → 정확 계산 순서"""
+    # 전체 범위 요청은 ingest 시 만들어 둔 통계 인덱스로 응답 (CSV 버전이 같을 때만)
+    if row_start == 0 and row_end is None:
+        metrics_dict = get_stats_index().lookup(dataset_id, meta.path, columns)
+        if metrics_dict is not None:
+            logger.debug("[Stats API] Served from stats index: %d columns", len(columns))
+            if mode == "approx":
+                metrics_dict = {c: {**m, "approximate": False} for c, m in metrics_dict.items()}
+            return metrics_dict
+    
+    if mode == "approx":
+        def compute_approx():
+            return compute_approx_metrics(
+                meta.path, columns, row_start, row_end, dataset_id=dataset_id, on_connection=on_connection
+            )
+        
+        if on_connection is None:
+            return coalesce("stats_approx", dataset_id, meta.path, (tuple(columns), row_start, row_end), compute_approx)
+        return compute_approx()
+    
+    # 통계 계산 - dataset_id를 전달하여 DuckDB View 캐싱 사용
+    def compute():
+        return compute_metrics(
             meta.path, 
-            compute_target_columns,  # 계산 대상 컬럼만 전달
+            columns,  # 계산 대상 컬럼만 전달
             row_start, 
             row_end,
-            dataset_id=dataset_id  # 캐시 활성화
+            dataset_id=dataset_id,  # 캐시 활성화
+            on_connection=on_connection,
         )
+    
+    if on_connection is None:
+        # 같은 요청이 동시에 들어오면 한 번만 계산 (비동기 작업은 개별 취소를 위해 따로 실행)
+        return coalesce("stats", dataset_id, meta.path, (tuple(columns), row_start, row_end), compute, metrics_ok)
+    return compute()
+
+
+def run_stats(
+    dataset_id: str,
+    meta,
+    columns: List[str],
+    row_start: int,
+    row_end: Optional[int],
+    on_connection: Optional[OnConnection] = None,
+    mode: str = "exact",
+    metrics: Optional[List[str]] = None,
+) -> StatsResponse:
+    """
+    통계 인덱스 조회 또는 계산 후 응답 형식으로 변환
+    mode="approx"면 표본 기반 근사 통계 (통계 인덱스가 있으면 정확한 값이 더 빠르므로 인덱스 사용)
+    metrics: 계산할 메트릭 (None이면 기본 6개), 분위수/히스토그램 등은 블록별 부분 상태를 합쳐서 계산
+    """
+    base_names, extra_names = split_metrics(metrics) if metrics is not None else (list(DEFAULT_METRICS), [])
+    
+    metrics_dict: Dict[str, Dict[str, Any]] = {c: {} for c in columns}
+    if base_names:
+        metrics_dict = _base_metrics(dataset_id, meta, columns, row_start, row_end, on_connection, mode)
+    
+    if extra_names:
+        def compute_extra():
+            return compute_state_metrics(
+                meta.path, columns, extra_names, row_start, row_end,
+                dataset_id=dataset_id, on_connection=on_connection,
+            )
         
-        # 응답 형식 변환 (에러가 있는 경우도 처리)
-        metrics = {}
-        for k, v in metrics_dict.items():
-            try:
-                metrics[k] = Metric(**v)
-            except Exception as e:
-                # Metric 변환 실패 시 에러 정보만 포함
-                metrics[k] = Metric(
-                    count=0,
-                    non_null_count=0,
-                    error=f"Metric conversion error: {str(e)}"
-                )
-        
-        return StatsResponse(metrics=metrics)
-    except Exception as e:
-        import traceback
-        error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"통계 계산 API 오류: {error_detail}")
-        raise HTTPException(status_code=500, detail=f"Statistics calculation failed: {str(e)}")
+        if on_connection is None:
+            extra = coalesce(
+                "stats_metrics", dataset_id, meta.path, (tuple(columns), tuple(extra_names), row_start, row_end), compute_extra
+            )
+        else:
+            extra = compute_extra()
+        metrics_dict = {c: {**metrics_dict.get(c, {}), **extra.get(c, {})} for c in columns}
+    
+    metrics_dict = _select_metrics(metrics_dict, metrics)
+    
+    # 응답 형식 변환 (에러가 있는 경우도 처리)
+    metrics = {}
+    for k, v in metrics_dict.items():
+        try:
+            metrics[k] = Metric(**v)
+        except Exception as e:
+            # Metric 변환 실패 시 에러 정보만 포함
+            metrics[k] = Metric(
+                count=0,
+                non_null_count=0,
+                error=f"Metric conversion error: {str(e)}"
+            )
+    
+    return StatsResponse(metrics=metrics)
 
 
+@router.post("/{dataset_id}/stats", response_model=StatsResponse)
+def stats(dataset_id: str, request: StatsRequest):
+    """통계 계산"""
+    meta, compute_target_columns, row_start, row_end = resolve_stats_request(dataset_id, request)
+    
+    try:
+        if request.group_by:
+            return run_grouped_stats(
+                dataset_id, meta, compute_target_columns, row_start, row_end, request.group_by, metrics=request.metrics
+            )
+        return run_stats(
+            dataset_id, meta, compute_target_columns, row_start, row_end, mode=request.mode, metrics=request.metrics
+        )
+    except (PoolTimeout, HTTPException):
+        raise
+    except Exception as e:
+        logger.exception("통계 계산 API 오류: %s", e)
+        raise HTTPException(status_code=500, detail=f"Statistics calculation failed: {str(e)}")
@@ -0,0 +1,46 @@
+"""시스템 상태 API (캐시 지표, 요청 프로파일, Prometheus 지표)"""
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from ..core.profiling import get_profiler
+from ..engine.duckdb_cache import get_cache
+from ..engine.metrics import get_state_cache
+from ..engine.series import get_pyramid_cache
+from ..engine.singleflight import get_singleflight
+
+router = APIRouter(tags=["system"])
+
+
+@router.get("/api/cache/stats")
+def cache_stats():
+    """DuckDB View 캐시 상태 및 eviction 지표 + preview/stats 결과 캐시 + 다운샘플링 캐시 지표 + 메트릭 부분 상태 캐시"""
+    return {
+        **get_cache().stats(),
+        "result_cache": get_singleflight().stats(),
+        "series_cache": get_pyramid_cache().stats(),
+        "metric_state_cache": get_state_cache().stats(),
+    }
+
+
+@router.get("/api/profile/requests")
+def profile_requests(limit: int = Query(50, ge=1, le=1000)):
+    """
+    최근 요청의 span별 시간 (최신 순)
+    X-Profile: explain 헤더로 보낸 요청은 plans에 EXPLAIN ANALYZE 결과 포함
+    """
+    return {"requests": get_profiler().recent(limit)}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format 지표 (요청 수/지연, span 시간, 캐시 hit/miss)"""
+    caches = {
+        "view": get_cache().stats(),
+        "result": get_singleflight().stats(),
+        "series": get_pyramid_cache().stats(),
+        "metric_state": get_state_cache().stats(),
+    }
+    return PlainTextResponse(
+        get_profiler().render_prometheus(caches),
+        media_type="text/plain; version=0.0.4",
+    )
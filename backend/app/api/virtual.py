@@ -0,0 +1,216 @@
+"""가상 데이터셋 API (여러 데이터셋을 하나의 테이블로 preview/stats)"""
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import Response
+
+from ..core.registry import DatasetMeta
+from ..core.settings import PREVIEW_LIMIT_DEFAULT, PREVIEW_LIMIT_MAX
+from ..core.virtual import (
+    VirtualDataset,
+    common_columns,
+    get_virtual_registry,
+    load_union_catalog,
+    resolve_members,
+    union_columns,
+)
+from ..engine.duckdb_cache import PoolTimeout
+from ..engine.duckdb_engine import PREVIEW_LAYOUTS
+from ..engine.multi import SOURCE_DATASET_COLUMN, compute_union_metrics, preview_union
+from ..engine.shaping import dump_json
+from ..models.schemas import (
+    DatasetStats,
+    Metric,
+    VirtualDatasetRequest,
+    VirtualStatsRequest,
+    VirtualStatsResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/virtual-datasets", tags=["virtual-datasets"])
+
+VIRTUAL_ID_PATTERN = r"^[A-Za-z0-9][A-Za-z0-9_.-]*$"
+
+
+def _describe(vd: VirtualDataset) -> dict:
+    members, not_found = resolve_members(vd)
+    return {
+        "virtual_id": vd.virtual_id,
+        "name": vd.name,
+        "dataset_ids": vd.dataset_ids,
+        "pattern": vd.pattern,
+        "members": [m.dataset_id for m in members],
+        "not_found": not_found,
+        "columns": union_columns(members),
+        # 모든 멤버에 있는 컬럼 (나머지는 일부 행이 NULL로 채워짐)
+        "common_columns": common_columns(members),
+    }
+
+
+def _load(virtual_id: str) -> List[DatasetMeta]:
+    """가상 데이터셋 멤버 (정의가 없거나 멤버가 없으면 404)"""
+    vd = get_virtual_registry().get(virtual_id)
+    if vd is None:
+        raise HTTPException(status_code=404, detail="Virtual dataset not found")
+    members, _ = resolve_members(vd)
+    if not members:
+        raise HTTPException(status_code=404, detail="Virtual dataset has no member datasets")
+    return members
+
+
+def _resolve_columns(members: List[DatasetMeta], requested: Optional[List[str]]) -> List[str]:
+    """
+    요청 컬럼 검증 - 멤버 컬럼 합집합 또는 전체 컬럼 카탈로그(columns_union.json)에 있으면 허용
+    (멤버 어디에도 없는 카탈로그 컬럼은 전부 NULL)
+    """
+    available = union_columns(members)
+    if requested is None:
+        return available
+    requested = list(dict.fromkeys(c for c in requested if c != SOURCE_DATASET_COLUMN))
+    known = set(available) | set(load_union_catalog())
+    invalid = [c for c in requested if c not in known]
+    if invalid or not requested:
+        raise HTTPException(status_code=400, detail=f"Invalid columns: {invalid}")
+    return requested
+
+
+@router.get("")
+def list_virtual_datasets():
+    """가상 데이터셋 목록 (멤버는 조회 시점 레지스트리 기준)"""
+    return {"virtual_datasets": [_describe(vd) for vd in get_virtual_registry().all()]}
+
+
+@router.get("/{virtual_id}")
+def get_virtual_dataset(virtual_id: str):
+    """가상 데이터셋 정의 + 현재 멤버 + 컬럼 구성"""
+    vd = get_virtual_registry().get(virtual_id)
+    if vd is None:
+        raise HTTPException(status_code=404, detail="Virtual dataset not found")
+    return _describe(vd)
+
+
+@router.put("/{virtual_id}")
+def put_virtual_dataset(
+    request: VirtualDatasetRequest,
+    virtual_id: str = Path(..., pattern=VIRTUAL_ID_PATTERN),
+):
+    """가상 데이터셋 생성/교체 (dataset_ids와 pattern 중 하나 이상 필요)"""
+    if not request.dataset_ids and not request.pattern:
+        raise HTTPException(status_code=400, detail="dataset_ids or pattern is required")
+    vd = VirtualDataset(
+        virtual_id=virtual_id,
+        name=request.name,
+        dataset_ids=list(dict.fromkeys(request.dataset_ids)),
+        pattern=request.pattern,
+    )
+    get_virtual_registry().put(vd)
+    return _describe(vd)
+
+
+@router.delete("/{virtual_id}")
+def delete_virtual_dataset(virtual_id: str):
+    """가상 데이터셋 정의 삭제 (멤버 데이터셋은 그대로)"""
+    if not get_virtual_registry().delete(virtual_id):
+        raise HTTPException(status_code=404, detail="Virtual dataset not found")
+    return {"virtual_id": virtual_id, "deleted": True}
+
+
+@router.get("/{virtual_id}/preview")
+def preview_virtual_dataset(
+    virtual_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_LIMIT_DEFAULT, ge=1, le=PREVIEW_LIMIT_MAX),
+    cursor: Optional[int] = Query(None, ge=0, description="이전 응답의 next_cursor (있으면 offset 대신 사용)"),
+    columns: Optional[List[str]] = Query(None, description="컬럼 이름 (반복 또는 쉼표 구분, 없으면 전체)"),
+    layout: str = Query("rows", description="rows(기본, 행 딕셔너리) | columnar(컬럼별 값 배열)"),
+):
+    """
+    가상 데이터셋 미리보기 - 멤버 전체를 multi-file 스캔 하나로 이어 붙인 행
+
+    첫 컬럼은 source_dataset (행이 온 dataset_id), 멤버에 없는 컬럼은 null
+    행 순서는 소스 종류(sidecar Parquet → CSV)별로 멤버 순서, offset은 이어 붙인 행 번호
+    """
+    members = _load(virtual_id)
+    if layout not in PREVIEW_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Unsupported layout: {layout}")
+    if cursor is not None:
+        offset = cursor
+    requested = None
+    if columns is not None:
+        requested = [c.strip() for value in columns for c in value.split(",") if c.strip()]
+    selected = _resolve_columns(members, requested)
+
+    try:
+        rows, result_columns = preview_union(
+            [(m.dataset_id, m.path) for m in members],
+            {m.dataset_id: m.columns for m in members},
+            selected,
+            offset=offset,
+            limit=limit,
+            layout=layout,
+        )
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        logger.exception("[Virtual Preview] 오류: %s", e)
+        raise HTTPException(status_code=500, detail=f"Virtual dataset preview failed: {str(e)}")
+
+    row_count = len(rows[0]) if layout == "columnar" and rows else len(rows)
+    response = {
+        "virtual_id": virtual_id,
+        "offset": offset,
+        "limit": limit,
+        "columns": result_columns,
+        "row_count": row_count,
+        "next_cursor": offset + row_count if row_count == limit else None,
+    }
+    if layout == "columnar":
+        response["layout"] = "columnar"
+        response["data"] = rows
+    else:
+        response["rows"] = rows
+    return Response(content=dump_json(response), media_type="application/json")
+
+
+@router.post("/{virtual_id}/stats", response_model=VirtualStatsResponse)
+def virtual_dataset_stats(virtual_id: str, request: VirtualStatsRequest):
+    """
+    가상 데이터셋 전체 통계 - 멤버 전체를 한 번의 병렬 스캔으로 집계
+
+    by_dataset=True면 같은 스캔에서 GROUPING SETS로 데이터셋별 통계도 계산
+    (POST /api/stats/batch와 달리 전체 합계가 함께 나옴)
+    """
+    members = _load(virtual_id)
+    columns = _resolve_columns(members, request.columns)
+    columns_by_dataset = {m.dataset_id: [c for c in columns if c in m.columns] for m in members}
+
+    try:
+        total, per_dataset = compute_union_metrics(
+            [(m.dataset_id, m.path) for m in members],
+            columns_by_dataset,
+            columns,
+            by_dataset=request.by_dataset,
+        )
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        logger.exception("[Virtual Stats] 오류: %s", e)
+        raise HTTPException(status_code=500, detail=f"Virtual dataset statistics calculation failed: {str(e)}")
+
+    datasets = None
+    if per_dataset is not None:
+        datasets = {}
+        for m in members:
+            own = columns_by_dataset[m.dataset_id]
+            metrics = per_dataset.get(m.dataset_id, {})
+            datasets[m.dataset_id] = DatasetStats(
+                metrics={c: Metric(**metrics[c]) for c in own if c in metrics},
+                missing_columns=[c for c in columns if c not in own],
+            )
+    return VirtualStatsResponse(
+        metrics={c: Metric(**total[c]) for c in columns if c in total},
+        datasets=datasets,
+        members=[m.dataset_id for m in members],
+    )
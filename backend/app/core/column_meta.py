@@ -1,13 +1,19 @@
 """컬럼 메타데이터 로더 (Global + Patterns + Dataset Override)"""
 from __future__ import annotations
 
+import hashlib
+import logging
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 
+logger = logging.getLogger(__name__)
+
 
 ROOT = Path(__file__).resolve().parents[3]  # aldList/
 META_DIR = ROOT / "column_meta"
@@ -15,6 +21,22 @@ GLOBAL_META_PATH = META_DIR / "global_columns.yaml"
 PATTERNS_PATH = META_DIR / "patterns.yaml"
 DATASET_META_DIR = META_DIR / "datasets"
 
+# build_meta_map 결과 캐시 크기 (데이터셋 × 컬럼 목록 조합 수)
+META_MAP_CACHE_SIZE = 128
+
+_cache_lock = threading.Lock()
+# path -> (파일 상태, 파싱 결과)
+_yaml_cache: Dict[Path, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]] = {}
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int]]:
+    """캐시 무효화 기준 (mtime_ns, size), 파일이 없으면 None"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 
 def _safe_load_yaml(path: Path) -> Dict[str, Any]:
     """YAML 파일을 안전하게 로드"""
@@ -25,13 +47,26 @@ def _safe_load_yaml(path: Path) -> Dict[str, Any]:
             data = yaml.safe_load(f) or {}
         return data if isinstance(data, dict) else {}
     except Exception as e:
-        print(f"⚠️  YAML 로드 실패 ({path}): {e}")
+        logger.warning("⚠️  YAML 로드 실패 (%s): %s", path, e)
         return {}
 
 
+def _load_yaml_cached(path: Path) -> Dict[str, Any]:
+    """YAML 로드 (파일이 바뀌지 않았으면 이전 파싱 결과 재사용)"""
+    state = _file_state(path)
+    with _cache_lock:
+        cached = _yaml_cache.get(path)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+    data = _safe_load_yaml(path) if state is not None else {}
+    with _cache_lock:
+        _yaml_cache[path] = (state, data)
+    return data
+
+
 def load_global_meta() -> Dict[str, Dict[str, Any]]:
     """전역 컬럼 메타데이터 로드"""
-    data = _safe_load_yaml(GLOBAL_META_PATH)
+    data = _load_yaml_cached(GLOBAL_META_PATH)
     out: Dict[str, Dict[str, Any]] = {}
     for k, v in data.items():
         if isinstance(k, str) and isinstance(v, dict):
@@ -42,7 +77,7 @@ def load_global_meta() -> Dict[str, Dict[str, Any]]:
 def load_dataset_override(dataset_id: str) -> Dict[str, Dict[str, Any]]:
     """데이터셋별 오버라이드 메타데이터 로드"""
     path = DATASET_META_DIR / f"{dataset_id}.yaml"
-    data = _safe_load_yaml(path)
+    data = _load_yaml_cached(path)
     out: Dict[str, Dict[str, Any]] = {}
     for k, v in data.items():
         if isinstance(k, str) and isinstance(v, dict):
@@ -93,9 +128,8 @@ def _format_template(
     return s
 
 
-def load_patterns() -> Tuple[Dict[str, str], list[PatternRule], Dict[str, Any]]:
-    """패턴 규칙 로드"""
-    data = _safe_load_yaml(PATTERNS_PATH)
+def _parse_patterns(data: Dict[str, Any]) -> Tuple[Dict[str, str], list[PatternRule], Dict[str, Any]]:
+    """patterns.yaml 내용 → (zones, 규칙 목록, fallback)"""
     zones = data.get("zones") or {}
     zones = zones if isinstance(zones, dict) else {}
     patterns = data.get("patterns") or []
@@ -112,21 +146,124 @@ def load_patterns() -> Tuple[Dict[str, str], list[PatternRule], Dict[str, Any]]:
                 try:
                     rules.append(PatternRule(regex=re.compile(match), meta=meta))
                 except re.error as e:
-                    print(f"⚠️  정규식 컴파일 실패 ({match}): {e}")
+                    logger.warning("⚠️  정규식 컴파일 실패 (%s): %s", match, e)
 
     return zones, rules, fallback if isinstance(fallback, dict) else {}
 
 
-def generate_meta_for_column(col: str) -> Dict[str, Any]:
-    """패턴 규칙을 사용하여 컬럼 메타데이터 자동 생성"""
-    zones, rules, fallback = load_patterns()
-
-    for rule in rules:
-        m = rule.regex.match(col)
-        if not m:
+def _has_group_reference(pattern: str) -> bool:
+    """
+    정규식에 그룹 참조(\\1 같은 번호 역참조, (?P=name), 조건부 (?(1)...))가 있는지
+    (문자 클래스 안의 \\1은 8진수 문자이므로 제외)
+    """
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if not in_class and escaped.isdigit() and escaped != "0":
+                return True
+            i += 2
             continue
+        if in_class:
+            if c == "]":
+                in_class = False
+        elif c == "[":
+            in_class = True
+            # 여는 괄호 바로 뒤(^ 뒤)의 ]는 문자
+            if pattern[i + 1:i + 2] == "^":
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+        elif pattern.startswith("(?P=", i) or pattern.startswith("(?(", i):
+            return True
+        i += 1
+    return False
+
+
+class PatternMatcher:
+    """
+    패턴 규칙 매칭기 - 모든 규칙을 하나의 정규식으로 합쳐 한 번에 매칭
+    
+    규칙 i를 (?P<_r{i}>...)로 감싼 alternation을 만들면, 정규식 엔진이 왼쪽 규칙부터
+    시도하므로 "첫 번째로 매칭되는 규칙" 의미가 순차 매칭과 같다.
+    매칭된 규칙은 lastgroup(바깥 그룹이 가장 나중에 닫힘)으로 찾고,
+    규칙 내부 그룹은 그룹 번호 오프셋으로 잘라낸다.
+    합친 정규식을 만들 수 없는 규칙(이름 있는 그룹 중복 등)이나 그룹 참조가 있는 규칙이 있으면 순차 매칭으로 동작
+    (합치면 그룹 번호가 밀려서 \\1이 다른 규칙의 그룹을 가리키지만 컴파일은 그대로 성공함).
+    """
+
+    def __init__(self, zones: Dict[str, str], rules: list[PatternRule], fallback: Dict[str, Any]):
+        self.zones = zones
+        self.rules = rules
+        self.fallback = fallback
+        # 규칙 번호 -> (바깥 그룹 번호, 내부 그룹 수)
+        self._offsets: List[Tuple[int, int]] = []
+        self._combined: Optional[re.Pattern] = None
+
+        parts = []
+        group = 0
+        for i, rule in enumerate(rules):
+            group += 1
+            self._offsets.append((group, rule.regex.groups))
+            group += rule.regex.groups
+            parts.append(f"(?P<_r{i}>{rule.regex.pattern})")
+        if parts and not any(_has_group_reference(rule.regex.pattern) for rule in rules):
+            try:
+                combined = re.compile("|".join(parts))
+                if combined.groups == group:
+                    self._combined = combined
+            except re.error:
+                pass
+
+    def match(self, col: str) -> Optional[Tuple[PatternRule, Tuple[str, ...]]]:
+        """첫 번째로 매칭되는 규칙과 그 규칙의 그룹 값"""
+        if self._combined is None:
+            for rule in self.rules:
+                m = rule.regex.match(col)
+                if m:
+                    return rule, tuple(m.groups())
+            return None
+
+        m = self._combined.match(col)
+        if not m or m.lastgroup is None:
+            return None
+        i = int(m.lastgroup[2:])
+        start, count = self._offsets[i]
+        groups = m.groups()[start:start + count]  # groups()는 1번 그룹부터이므로 start가 곧 내부 첫 그룹
+        return self.rules[i], tuple(groups)
+
+
+_matcher: Optional[Tuple[Optional[Tuple[int, int]], PatternMatcher]] = None
+
+
+def get_pattern_matcher() -> PatternMatcher:
+    """patterns.yaml로 만든 매칭기 (파일이 바뀌면 다시 컴파일)"""
+    global _matcher
+    state = _file_state(PATTERNS_PATH)
+    cached = _matcher
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    matcher = PatternMatcher(*_parse_patterns(_load_yaml_cached(PATTERNS_PATH)))
+    _matcher = (state, matcher)
+    return matcher
+
+
+def load_patterns() -> Tuple[Dict[str, str], list[PatternRule], Dict[str, Any]]:
+    """패턴 규칙 로드"""
+    matcher = get_pattern_matcher()
+    return matcher.zones, matcher.rules, matcher.fallback
 
-        groups = tuple(m.groups())
+
+def generate_meta_for_column(col: str, matcher: Optional[PatternMatcher] = None) -> Dict[str, Any]:
+    """패턴 규칙을 사용하여 컬럼 메타데이터 자동 생성"""
+    matcher = matcher or get_pattern_matcher()
+    zones, fallback = matcher.zones, matcher.fallback
+
+    matched = matcher.match(col)
+    if matched is not None:
+        rule, groups = matched
         meta = {"key": col, **rule.meta}
 
         # template 처리: title/desc에서 토큰 치환
@@ -135,11 +272,6 @@ def generate_meta_for_column(col: str) -> Dict[str, Any]:
         if "desc" in meta and isinstance(meta["desc"], str):
             meta["desc"] = _format_template(meta["desc"], col=col, groups=groups, zones=zones)
 
-        # MFCMon_ 처럼 groups가 길게 잡히는 경우 {name}에 전체를 넣고 싶으면:
-        if "{name}" in str(rule.meta.get("title", "")) or "{name}" in str(rule.meta.get("desc", "")):
-            # name은 첫 그룹 전체로 처리(정규식이 (.+)라면 전체가 들어감)
-            pass
-
         meta["auto_generated"] = True
         return meta
 
@@ -153,6 +285,14 @@ def generate_meta_for_column(col: str) -> Dict[str, Any]:
     return meta
 
 
+# (dataset_id, 컬럼 목록 해시) -> (YAML 파일 상태들, 메타데이터 맵)
+_meta_map_cache: "OrderedDict[Tuple[str, str], Tuple[Tuple, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+
+
+def _columns_hash(columns: list[str]) -> str:
+    return hashlib.sha1("\x1f".join(columns).encode("utf-8")).hexdigest()
+
+
 def build_meta_map(dataset_id: str, columns: list[str]) -> Dict[str, Dict[str, Any]]:
     """
     컬럼 목록에 대해 메타데이터 맵 생성
@@ -168,14 +308,28 @@ def build_meta_map(dataset_id: str, columns: list[str]) -> Dict[str, Dict[str, A
     
     Returns:
         컬럼명을 키로 하는 메타데이터 딕셔너리 (모든 컬럼에 대해 항상 존재)
+        YAML 파일이 바뀌지 않았으면 이전 결과를 그대로 반환하므로 수정하지 말 것
     """
+    key = (dataset_id, _columns_hash(columns))
+    states = (
+        _file_state(GLOBAL_META_PATH),
+        _file_state(PATTERNS_PATH),
+        _file_state(DATASET_META_DIR / f"{dataset_id}.yaml"),
+    )
+    with _cache_lock:
+        cached = _meta_map_cache.get(key)
+        if cached is not None and cached[0] == states:
+            _meta_map_cache.move_to_end(key)
+            return cached[1]
+
     global_meta = load_global_meta()
     override_meta = load_dataset_override(dataset_id)
+    matcher = get_pattern_matcher()
 
     result: Dict[str, Dict[str, Any]] = {}
     for c in columns:
         # 1) patterns로 기본 생성
-        base = generate_meta_for_column(c)
+        base = generate_meta_for_column(c, matcher)
 
         # 2) global merge
         if c in global_meta:
@@ -187,4 +341,9 @@ def build_meta_map(dataset_id: str, columns: list[str]) -> Dict[str, Dict[str, A
 
         result[c] = base
 
+    with _cache_lock:
+        _meta_map_cache[key] = (states, result)
+        _meta_map_cache.move_to_end(key)
+        while len(_meta_map_cache) > META_MAP_CACHE_SIZE:
+            _meta_map_cache.popitem(last=False)
     return result
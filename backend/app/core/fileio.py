@@ -0,0 +1,113 @@
+"""파일 입출력 헬퍼"""
+import json
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Set
+
+# temp_path 이름: .{target.name}.{pid}.{스레드 id}[.{tag}].tmp
+_TEMP_NAME = re.compile(r"^\..+\.(\d+)\.\d+(?:\.[A-Za-z_]\w*)?\.tmp$")
+# 이 프로세스에서 사용 중인 임시 파일 이름 (remove_stale_temp_files가 건드리지 않음)
+_active_temp: Set[str] = set()
+_active_lock = threading.Lock()
+
+
+def write_json_atomic(path: Path, data: Any, indent: int = 2):
+    """
+    JSON 파일을 원자적으로 저장 (임시 파일에 쓴 뒤 rename)
+    읽는 쪽(서버, 다른 프로세스)이 절반만 쓰인 파일을 보지 않도록 함
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def temp_path(target: Path, tag: Optional[str] = None) -> Path:
+    """
+    target 옆 임시 파일 경로: `.{target.name}.{pid}.{스레드 id}[.{tag}].tmp`
+    (프로세스/스레드마다 다르므로 같은 파일을 동시에 만들어도 겹치지 않음)
+    """
+    parts = [f".{target.name}", str(os.getpid()), str(threading.get_ident())]
+    if tag:
+        parts.append(tag)
+    return target.with_name(".".join(parts) + ".tmp")
+
+
+@contextmanager
+def temp_file(target: Path, tag: Optional[str] = None) -> Iterator[Path]:
+    """target 옆 임시 파일 경로 (블록이 끝나면 성공/실패와 상관없이 삭제)"""
+    tmp = temp_path(target, tag)
+    with _active_lock:
+        _active_temp.add(tmp.name)
+    try:
+        yield tmp
+    finally:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        with _active_lock:
+            _active_temp.discard(tmp.name)
+
+
+@contextmanager
+def replace_on_success(target: Path) -> Iterator[Path]:
+    """
+    임시 파일 경로를 넘겨주고 블록이 정상적으로 끝나면 target으로 rename (DuckDB COPY ... TO처럼 경로에 직접 쓰는 경우)
+    블록이 파일을 만들지 않고 끝나면 target은 그대로, 예외가 나면 임시 파일만 삭제
+    """
+    with temp_file(target) as tmp:
+        yield tmp
+        if tmp.exists():
+            os.replace(tmp, target)
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # Windows의 os.kill은 신호 확인이 아니라 프로세스 종료 - 확인할 수 없으면 살아 있다고 봄
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_temp_files(directory: Path) -> int:
+    """
+    중단된 실행이 남긴 temp_path 임시 파일 삭제 (프로세스가 강제 종료되면 temp_file의 정리가 실행되지 않음)
+    다른 살아 있는 프로세스(워커)의 파일과 이 프로세스가 지금 사용 중인 파일은 둔다
+    (컨테이너 재시작 등으로 이전 실행과 pid가 같을 수 있으므로 pid만으로 판단하지 않음)
+    Returns: 삭제한 파일 수
+    """
+    if not directory.exists():
+        return 0
+    candidates = [p for p in directory.glob(".*.tmp") if _TEMP_NAME.match(p.name)]
+    # 목록을 만든 뒤에 읽어야 목록에 있는 사용 중 파일이 빠지지 않음 (등록 → 파일 생성 순서)
+    with _active_lock:
+        active = set(_active_temp)
+    removed = 0
+    for path in candidates:
+        pid = int(_TEMP_NAME.match(path.name).group(1))
+        if path.name in active or (pid != os.getpid() and _process_alive(pid)):
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,336 @@
+"""요청 프로파일링 - span 시간 측정, EXPLAIN ANALYZE 수집, Prometheus 지표
+
+요청마다 RequestProfile을 contextvar에 두고, 코드 곳곳의 span("query") 같은 구간 시간을 누적한다.
+(sync 엔드포인트는 threadpool에서 실행되지만 anyio가 context를 복사해서 넘기므로 같은 profile에 기록됨)
+
+- span 이름: registry(레지스트리 조회), view(View 생성), query(DuckDB 쿼리), shaping(결과 변환), serialize(JSON 직렬화)
+- 응답 헤더: Server-Timing(span별 ms), X-Request-ID
+- `X-Profile: explain` 헤더를 보낸 요청은 쿼리마다 EXPLAIN ANALYZE를 한 번 더 실행해서 계획을 보관
+  (쿼리가 두 번 실행되므로 필요할 때만 사용, PROFILE_EXPLAIN=0이면 무시)
+- 최근 요청 프로파일: GET /api/profile/requests, 누적 지표: GET /metrics (Prometheus text format)
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .settings import (
+    LOG_LEVEL,
+    PROFILE_EXPLAIN,
+    PROFILE_EXPLAIN_MAX_QUERIES,
+    PROFILE_HISTORY,
+    PROFILE_SLOW_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+# 요청 지연 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    """
+    'app' 로거 설정 (서버/도구 시작 시 한 번, 여러 번 호출해도 핸들러는 하나)
+    모듈은 logging.getLogger(__name__)을 사용하므로 모두 'app.*' 아래에 있음
+    """
+    root = logging.getLogger("app")
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    root.propagate = False
+
+
+@dataclass
+class RequestProfile:
+    """요청 하나의 span별 누적 시간과 수집한 쿼리 계획"""
+    request_id: str
+    method: str
+    path: str
+    explain: bool = False
+    route: str = ""
+    status: int = 0
+    started_at: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    spans: Dict[str, float] = field(default_factory=dict)  # span 이름 → 누적 ms
+    span_counts: Dict[str, int] = field(default_factory=dict)
+    plans: List[Dict[str, Any]] = field(default_factory=list)  # EXPLAIN ANALYZE 결과
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + ms
+            self.span_counts[name] = self.span_counts.get(name, 0) + 1
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (예: "query;dur=12.3, shaping;dur=0.8")"""
+        with self._lock:
+            return ", ".join(f"{name};dur={ms:.3f}" for name, ms in self.spans.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "request_id": self.request_id,
+                "method": self.method,
+                "path": self.path,
+                "route": self.route,
+                "status": self.status,
+                "started_at": self.started_at,
+                "duration_ms": round(self.duration_ms, 3),
+                "spans": {k: round(v, 3) for k, v in self.spans.items()},
+                "span_counts": dict(self.span_counts),
+                "plans": list(self.plans),
+            }
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """현재 요청의 프로파일 (요청 밖 - ingest, 비동기 작업 등 - 이면 None)"""
+    return _current.get()
+
+
+class Profiler:
+    """span/요청 지표 누적 + 최근 요청 프로파일 보관 (Prometheus 출력용)"""
+
+    def __init__(self, history: int = PROFILE_HISTORY):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[float]] = {}  # span → [count, sum_seconds]
+        self._requests: Dict[Tuple[str, str, int], int] = {}  # (method, route, status) → count
+        self._latency: Dict[str, List[float]] = {}  # route → [bucket counts..., count, sum]
+        self._history: "deque[RequestProfile]" = deque(maxlen=max(0, history))
+
+    def record_span(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._spans.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def record_request(self, profile: RequestProfile):
+        seconds = profile.duration_ms / 1000
+        with self._lock:
+            key = (profile.method, profile.route, profile.status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            latency = self._latency.setdefault(profile.route, [0] * len(LATENCY_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    latency[i] += 1
+            latency[-2] += 1
+            latency[-1] += seconds
+            if self._history.maxlen:
+                self._history.append(profile)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """최근 요청 프로파일 (최신 순)"""
+        with self._lock:
+            profiles = list(self._history)[-limit:] if limit > 0 else []
+        return [p.to_dict() for p in reversed(profiles)]
+
+    def render_prometheus(self, caches: Mapping[str, Mapping[str, Any]] = ()) -> str:
+        """
+        Prometheus text format (0.0.4)
+        caches: 캐시 이름 → stats() 결과 (hits/misses/evictions/coalesced 카운터와 entries/bytes 게이지를 내보냄)
+        """
+        with self._lock:
+            spans = {k: list(v) for k, v in self._spans.items()}
+            requests = dict(self._requests)
+            latency = {k: list(v) for k, v in self._latency.items()}
+
+        lines = [
+            "# HELP aldlist_http_requests_total HTTP requests by route and status.",
+            "# TYPE aldlist_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(
+                f'aldlist_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP aldlist_http_request_duration_seconds HTTP request latency.",
+            "# TYPE aldlist_http_request_duration_seconds histogram",
+        ]
+        for route, values in sorted(latency.items()):
+            label = f'route="{_escape(route)}"'
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                lines.append(f'aldlist_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'aldlist_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {values[-2]}')
+            lines.append(f"aldlist_http_request_duration_seconds_count{{{label}}} {values[-2]}")
+            lines.append(f"aldlist_http_request_duration_seconds_sum{{{label}}} {values[-1]:.6f}")
+
+        lines += [
+            "# HELP aldlist_span_duration_seconds Time spent per instrumented span (all requests and background work).",
+            "# TYPE aldlist_span_duration_seconds summary",
+        ]
+        for name, (count, total) in sorted(spans.items()):
+            lines.append(f'aldlist_span_duration_seconds_count{{span="{name}"}} {int(count)}')
+            lines.append(f'aldlist_span_duration_seconds_sum{{span="{name}"}} {total:.6f}')
+
+        for metric, kind, help_text in (
+            ("hits", "counter", "Cache hits."),
+            ("misses", "counter", "Cache misses."),
+            ("coalesced", "counter", "Requests that waited for an identical in-flight computation."),
+            ("evictions", "counter", "Cache evictions."),
+            ("entries", "gauge", "Cached entries."),
+            ("bytes", "gauge", "Cached bytes."),
+        ):
+            values = [(name, stats[metric]) for name, stats in caches.items() if metric in stats]
+            if not values:
+                continue
+            full = f"aldlist_cache_{metric}_total" if kind == "counter" else f"aldlist_cache_{metric}"
+            lines += [f"# HELP {full} {help_text}", f"# TYPE {full} {kind}"]
+            lines += [f'{full}{{cache="{name}"}} {value}' for name, value in values]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Prometheus 라벨 값 escape"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# 전역 인스턴스 (싱글톤 패턴)
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """전역 프로파일러 반환"""
+    return _profiler
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    구간 시간 측정 (현재 요청 프로파일 + 전역 span 지표에 누적)
+
+    사용 예:
+        with span("shaping"):
+            rows = numpy_to_rows(arrays, columns)
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        profile = _current.get()
+        if profile is not None:
+            profile.add(name, elapsed * 1000)
+        _profiler.record_span(name, elapsed)
+
+
+def capture_explain(conn, query: str, params: Optional[Sequence[Any]] = None):
+    """
+    요청이 X-Profile: explain이면 query의 EXPLAIN ANALYZE 결과를 프로파일에 보관
+    (쿼리를 한 번 더 실행함, 요청당 PROFILE_EXPLAIN_MAX_QUERIES개까지, 실패해도 요청은 계속)
+    """
+    profile = _current.get()
+    if profile is None or not profile.explain or len(profile.plans) >= PROFILE_EXPLAIN_MAX_QUERIES:
+        return
+    t0 = time.perf_counter()
+    try:
+        rows = conn.execute(f"EXPLAIN ANALYZE {query}", params).fetchall()
+        plan = "\n".join(str(row[-1]) for row in rows)
+    except Exception as e:
+        plan = f"EXPLAIN ANALYZE failed: {e}"
+    profile.plans.append({
+        "query": " ".join(query.split()),
+        "plan": plan,
+        "ms": round((time.perf_counter() - t0) * 1000, 3),
+    })
+
+
+@contextmanager
+def query_span(conn, query: str, params: Optional[Sequence[Any]] = None) -> Iterator[None]:
+    """
+    DuckDB 쿼리 실행 구간 (요청하면 EXPLAIN ANALYZE 먼저 수집)
+
+    사용 예:
+        with query_span(conn, query):
+            row = conn.execute(query).fetchone()
+    """
+    capture_explain(conn, query, params)
+    with span("query"):
+        yield
+
+
+def _route_template(scope) -> str:
+    """
+    지표 라벨용 경로 (/api/datasets/{dataset_id}/preview)
+    매칭된 경로 파라미터 값을 이름으로 바꿈, 매칭되지 않은 요청(404)은 하나로 묶음
+    """
+    if "endpoint" not in scope:
+        return "<unmatched>"
+    path = scope.get("path", "")
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    요청 프로파일 생성 + 응답 헤더(Server-Timing, X-Request-ID) + 지표 기록 (ASGI 미들웨어)
+    스트리밍 응답도 그대로 통과시키도록 BaseHTTPMiddleware 대신 send를 감싸서 구현
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        profile = RequestProfile(
+            request_id=headers.get("x-request-id") or uuid.uuid4().hex[:16],
+            method=scope.get("method", ""),
+            path=scope.get("path", ""),
+            explain=PROFILE_EXPLAIN and headers.get("x-profile", "").lower() == "explain",
+        )
+        token = _current.set(profile)
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                elapsed = (time.perf_counter() - t0) * 1000
+                timing = profile.server_timing()
+                timing = f"{timing}, total;dur={elapsed:.3f}" if timing else f"total;dur={elapsed:.3f}"
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1")),
+                        (b"x-request-id", profile.request_id.encode("latin-1")),
+                    ],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            profile.status = profile.status or 500
+            raise
+        finally:
+            profile.duration_ms = (time.perf_counter() - t0) * 1000
+            profile.route = _route_template(scope)
+            _current.reset(token)
+            _profiler.record_request(profile)
+            if profile.duration_ms >= PROFILE_SLOW_MS:
+                logger.warning(
+                    "Slow request %s %s %d %.1fms spans=%s id=%s",
+                    profile.method, profile.path, profile.status, profile.duration_ms,
+                    profile.server_timing(), profile.request_id,
+                )
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "%s %s %d %.1fms spans=%s",
+                    profile.method, profile.path, profile.status, profile.duration_ms, profile.server_timing(),
+                )
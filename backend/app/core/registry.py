@@ -1,11 +1,16 @@
 """데이터셋 레지스트리 관리"""
 import json
+import logging
+import threading
 from pathlib import Path
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, fields
 
+from .profiling import span
 from .settings import REGISTRY_PATH, DATA_DIR
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class DatasetMeta:
@@ -15,6 +20,12 @@ class DatasetMeta:
     size_bytes: int
     mtime: float
     columns: List[str]
+    # 컬럼 -> int/double/date/time/timestamp/string (ingest에서 추정, 아직 없으면 None)
+    column_types: Optional[Dict[str, str]] = None
+
+
+# datasets.json 항목 중 DatasetMeta가 아는 필드 (이전/이후 버전이 추가한 필드는 무시)
+_META_FIELDS = {f.name for f in fields(DatasetMeta)}
 
 
 def _normalize_path(path_str: str, filename: str) -> str:
@@ -31,30 +42,90 @@ def _normalize_path(path_str: str, filename: str) -> str:
     return str(normalized.resolve())
 
 
-def load_registry() -> List[DatasetMeta]:
-    """레지스트리 로드"""
-    if not REGISTRY_PATH.exists():
-        return []
-    
+def _read_registry_file() -> List[DatasetMeta]:
+    """datasets.json 파싱"""
     data = json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
     metas = []
     for item in data:
         # 경로 정규화 - filename을 사용하여 항상 DATA_DIR 기준 경로 생성
         filename = item.get('filename', Path(item.get('path', '')).name)
         item['path'] = _normalize_path(item.get('path', ''), filename)
-        metas.append(DatasetMeta(**item))
-    
+        metas.append(DatasetMeta(**{k: v for k, v in item.items() if k in _META_FIELDS}))
     return metas
 
 
-def get_dataset(dataset_id: str) -> Optional[DatasetMeta]:
-    """특정 데이터셋 조회"""
-    for meta in load_registry():
-        if meta.dataset_id == dataset_id:
-            return meta
-    return None
+class Registry:
+    """
+    메모리 레지스트리 - datasets.json을 한 번 읽어 dataset_id 기준 dict로 보관
+    
+    요청마다 JSON 파싱 + 경로 정규화를 반복하지 않도록, 파일 상태(mtime, 크기)가
+    바뀌었을 때만 다시 읽는다. 메타데이터를 갱신한 쪽에서 reload()를 호출하면 즉시 반영.
+    """
+    
+    def __init__(self):
+        self._metas: List[DatasetMeta] = []
+        self._by_id: Dict[str, DatasetMeta] = {}
+        self._file_state: Optional[Tuple[int, int]] = None  # (mtime_ns, size) - None이면 아직 읽지 않음
+        self._lock = threading.Lock()
+    
+    def _current_file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = REGISTRY_PATH.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _refresh(self):
+        """파일이 바뀌었으면 다시 읽기 (stat 한 번으로 확인)"""
+        state = self._current_file_state()
+        if state is not None and state == self._file_state:
+            return
+        with self._lock:
+            if state is not None and state == self._file_state:
+                return
+            if state is None:
+                metas = []
+            else:
+                try:
+                    metas = _read_registry_file()
+                except (OSError, ValueError) as e:
+                    # 쓰는 도중 읽은 경우 등 - 기존 내용 유지하고 다음 요청에서 재시도
+                    logger.warning("Failed to load registry: %s", e)
+                    return
+            self._metas = metas
+            self._by_id = {m.dataset_id: m for m in metas}
+            self._file_state = state
+    
+    def reload(self):
+        """datasets.json 즉시 다시 읽기 (메타데이터 재생성 후 호출)"""
+        with self._lock:
+            self._file_state = None
+        self._refresh()
+    
+    def all(self) -> List[DatasetMeta]:
+        self._refresh()
+        return list(self._metas)
+    
+    def get(self, dataset_id: str) -> Optional[DatasetMeta]:
+        self._refresh()
+        return self._by_id.get(dataset_id)
+
 
+# 전역 레지스트리 (싱글톤 패턴)
+_registry = Registry()
 
 
+def get_registry() -> Registry:
+    """전역 레지스트리 반환"""
+    return _registry
 
 
+def load_registry() -> List[DatasetMeta]:
+    """레지스트리 로드"""
+    return _registry.all()
+
+
+def get_dataset(dataset_id: str) -> Optional[DatasetMeta]:
+    """특정 데이터셋 조회"""
+    with span("registry"):
+        return _registry.get(dataset_id)
@@ -0,0 +1,240 @@
+"""증분 메타데이터 스캐너 - 바뀐 CSV만 다시 읽어서 메타데이터 갱신
+
+파일마다 fingerprint(크기, mtime, 헤더 해시)를 `metadata/scan_state.json`에 저장해 두고,
+다음 스캔에서는 크기/mtime이 같은 파일의 헤더를 다시 읽지 않는다.
+새로 추가되었거나 바뀐 파일의 헤더만 스레드 풀로 병렬로 읽으므로
+스캔 시간이 전체 파일 수가 아니라 변경된 파일 수에 비례한다.
+
+메타데이터 JSON은 임시 파일에 쓴 뒤 rename하므로 서버가 쓰는 도중의 파일을 읽지 않는다.
+
+컬럼 타입 카탈로그(column_types)는 헤더만으로 알 수 없으므로 ingest 단계에서 추정해서
+record_column_types()로 기록한다. 파일이 바뀌면 카탈로그도 지워지고 다음 ingest에서 다시 추정한다.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .fileio import write_json_atomic
+from .settings import DATA_DIR, META_DIR, REGISTRY_PATH, SCAN_WORKERS
+
+logger = logging.getLogger(__name__)
+
+SCAN_STATE_PATH = META_DIR / "scan_state.json"
+COLUMNS_BY_FILE_PATH = META_DIR / "columns_by_file.json"
+COLUMNS_UNION_PATH = META_DIR / "columns_union.json"
+COLUMNS_INTERSECTION_PATH = META_DIR / "columns_intersection.json"
+
+# 스캔과 타입 카탈로그 기록이 동시에 메타데이터 파일을 고쳐 쓰지 않도록
+_scan_lock = threading.Lock()
+
+# scan_state.json에 저장하는 파일별 항목
+_STATE_FIELDS = ("size_bytes", "mtime_ns", "header_hash", "columns", "column_types")
+
+# 헤더 한 줄을 읽을 때 최대 바이트 (207개 컬럼 헤더는 수 KB)
+_HEADER_READ_BYTES = 1 << 20
+
+
+@dataclass
+class ScanResult:
+    """스캔 결과 (added/changed/removed는 파일명 목록)"""
+    datasets: List[Dict[str, Any]] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    # 메타데이터 파일을 실제로 다시 썼는지 (변경이 없으면 쓰지 않음)
+    written: bool = False
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def dataset_ids(self, filenames: List[str]) -> List[str]:
+        return [make_dataset_id(name) for name in filenames]
+
+
+def make_dataset_id(filename: str) -> str:
+    # filename 기반으로 dataset_id 생성 (경로와 무관하게 동일한 ID 생성)
+    # 이렇게 하면 로컬과 배포 환경에서 동일한 dataset_id가 생성됨
+    h = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:12]
+    return f"ds_{h}"
+
+
+def read_header(p: Path) -> Tuple[List[str], str]:
+    """
+    CSV 헤더 읽기
+    Returns: (컬럼 목록, 헤더 줄 해시)
+    """
+    with p.open("rb") as f:
+        line = f.readline(_HEADER_READ_BYTES)
+    text = line.decode("utf-8-sig")
+    columns = next(csv.reader(io.StringIO(text)), [])
+    return columns, hashlib.sha1(line.rstrip(b"\r\n")).hexdigest()[:16]
+
+
+def _load_json(path: Path, default: Any) -> Any:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+
+def _previous_state() -> Dict[str, Dict[str, Any]]:
+    """
+    이전 스캔 상태: filename -> {size_bytes, mtime_ns, header_hash, columns}
+    scan_state.json이 없으면(이전 버전 스크립트로 만든 메타데이터) 빈 상태 → 전체 스캔
+    """
+    state = _load_json(SCAN_STATE_PATH, {})
+    return state if isinstance(state, dict) else {}
+
+
+def _write_if_changed(path: Path, data: Any) -> bool:
+    """내용이 같으면 쓰지 않음 (mtime을 유지해서 레지스트리/감시자가 불필요하게 다시 읽지 않게)"""
+    if path.exists() and _load_json(path, None) == data:
+        return False
+    write_json_atomic(path, data)
+    return True
+
+
+def scan_metadata(full: bool = False, workers: Optional[int] = None) -> ScanResult:
+    """
+    DATA_DIR의 CSV를 스캔해서 메타데이터 JSON 갱신
+
+    Args:
+        full: True면 fingerprint와 무관하게 모든 헤더를 다시 읽음
+        workers: 헤더를 읽는 스레드 수 (기본 SCAN_WORKERS)
+    """
+    with _scan_lock:
+        return _scan_metadata_locked(full, workers)
+
+
+def _scan_metadata_locked(full: bool, workers: Optional[int]) -> ScanResult:
+    result = ScanResult()
+    previous = {} if full else _previous_state()
+    files = sorted(DATA_DIR.glob("*.csv"))
+
+    # 1. stat만으로 바뀐 파일 골라내기
+    current: Dict[str, Dict[str, Any]] = {}
+    to_read: List[Tuple[Path, os.stat_result]] = []
+    for p in files:
+        try:
+            st = p.stat()
+        except OSError as e:
+            result.errors[p.name] = str(e)
+            continue
+        prev = previous.get(p.name)
+        if (
+            prev is not None
+            and prev.get("size_bytes") == st.st_size
+            and prev.get("mtime_ns") == st.st_mtime_ns
+            and isinstance(prev.get("columns"), list)
+        ):
+            current[p.name] = {**prev, "mtime": st.st_mtime}
+            result.unchanged += 1
+        else:
+            to_read.append((p, st))
+
+    # 2. 새 파일/바뀐 파일의 헤더만 병렬로 읽기
+    def read_one(item: Tuple[Path, os.stat_result]):
+        p, st = item
+        try:
+            columns, header_hash = read_header(p)
+            return p, st, columns, header_hash, None
+        except Exception as e:
+            return p, st, None, None, e
+
+    if to_read:
+        max_workers = max(1, min(workers or SCAN_WORKERS, len(to_read)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aldlist-scan") as pool:
+            for p, st, columns, header_hash, error in pool.map(read_one, to_read):
+                if error is not None:
+                    result.errors[p.name] = str(error)
+                    logger.warning("✗ %s -> %s", p.name, error)
+                    continue
+                current[p.name] = {
+                    "size_bytes": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "mtime": st.st_mtime,
+                    "header_hash": header_hash,
+                    "columns": columns,
+                }
+                if p.name in previous:
+                    result.changed.append(p.name)
+                else:
+                    result.added.append(p.name)
+                logger.info("✓ %s (%d cols)", p.name, len(columns))
+
+    result.removed = sorted(set(previous) - set(current) - set(result.errors))
+
+    # 3. 메타데이터 파일 생성 (파일명 순서)
+    names = sorted(current)
+    col_sets: List[Set[str]] = [set(current[n]["columns"]) for n in names]
+    result.datasets = [_dataset_entry(n, current[n]) for n in names]
+    columns_by_file = {str(DATA_DIR / n): current[n]["columns"] for n in names}
+    union = sorted(set().union(*col_sets)) if col_sets else []
+    inter = sorted(set.intersection(*col_sets)) if col_sets else []
+
+    written = False
+    written |= _write_if_changed(REGISTRY_PATH, result.datasets)
+    written |= _write_if_changed(COLUMNS_BY_FILE_PATH, columns_by_file)
+    written |= _write_if_changed(COLUMNS_UNION_PATH, union)
+    written |= _write_if_changed(COLUMNS_INTERSECTION_PATH, inter)
+    state = {n: {k: current[n][k] for k in _STATE_FIELDS if k in current[n]} for n in names}
+    _write_if_changed(SCAN_STATE_PATH, state)
+    result.written = written
+    return result
+
+
+def _dataset_entry(filename: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    """datasets.json 항목 (타입 카탈로그는 ingest에서 추정된 경우에만 포함)"""
+    entry = {
+        "dataset_id": make_dataset_id(filename),
+        "path": filename,  # DATA_DIR 기준 상대 경로 (배포 환경 호환성)
+        "filename": filename,
+        "size_bytes": info["size_bytes"],
+        "mtime": info["mtime"],
+        "columns": info["columns"],
+    }
+    if info.get("column_types"):
+        entry["column_types"] = info["column_types"]
+    return entry
+
+
+def record_column_types(filename: str, size_bytes: int, mtime_ns: int, column_types: Dict[str, str]) -> bool:
+    """
+    ingest에서 추정한 컬럼 타입 카탈로그를 scan_state.json + datasets.json에 기록
+
+    추정하는 동안 파일이 바뀌었으면(크기/mtime이 스캔 상태와 다르면) 기록하지 않음
+    Returns: datasets.json을 다시 썼는지
+    """
+    with _scan_lock:
+        state = _previous_state()
+        info = state.get(filename)
+        if (
+            not isinstance(info, dict)
+            or info.get("size_bytes") != size_bytes
+            or info.get("mtime_ns") != mtime_ns
+            or info.get("column_types") == column_types
+        ):
+            return False
+        info["column_types"] = column_types
+        _write_if_changed(SCAN_STATE_PATH, state)
+
+        datasets = _load_json(REGISTRY_PATH, [])
+        if not isinstance(datasets, list):
+            return False
+        for entry in datasets:
+            if isinstance(entry, dict) and entry.get("filename") == filename:
+                entry["column_types"] = column_types
+        return _write_if_changed(REGISTRY_PATH, datasets)
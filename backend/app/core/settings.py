@@ -8,9 +8,94 @@ PROJECT_ROOT = Path(__file__).resolve().parents[3]
 DATA_DIR = Path(os.getenv("DATA_DIR", str(PROJECT_ROOT / "data")))
 META_DIR = Path(os.getenv("META_DIR", str(PROJECT_ROOT / "metadata")))
 REGISTRY_PATH = META_DIR / "datasets.json"
+# 메타데이터 스캔 시 CSV 헤더를 병렬로 읽는 스레드 수
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", str(min(8, os.cpu_count() or 1))))
+# 서버 내부 CSV 감시 (DATA_DIR 변경 시 증분 스캔 + 캐시 무효화)
+WATCH_ENABLED = os.getenv("WATCH_ENABLED", "1") != "0"
+WATCH_BACKEND = os.getenv("WATCH_BACKEND", "auto")  # auto | watchfiles | poll
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "1.0"))  # 마지막 이벤트 후 대기 시간(초)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "2.0"))  # poll 백엔드 확인 주기(초)
+# 데이터셋별 전체 파일 통계 인덱스 (ingest 시 계산, datasets.json 옆에 저장)
+STATS_INDEX_DIR = META_DIR / "stats"
+# 가상 데이터셋 정의 (여러 데이터셋을 하나의 테이블로 조회, PUT /api/virtual-datasets/{id})
+VIRTUAL_DATASETS_PATH = META_DIR / "virtual_datasets.json"
 
-PREVIEW_LIMIT_DEFAULT = 2000
-PREVIEW_LIMIT_MAX = 10000
+# CSV에서 파생된 캐시 파일(Parquet sidecar 등) 저장 위치
+# 예: CACHE_DIR=/tmp/aldlist-cache (배포 환경에서 쓰기 가능한 경로)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(PROJECT_ROOT / ".cache")))
+SIDECAR_DIR = CACHE_DIR / "sidecar"
+# 행 범위 통계용 블록 부분 집계의 블록 크기 (행 수)
+STATS_BLOCK_SIZE = int(os.getenv("STATS_BLOCK_SIZE", "4096"))
+# SIDECAR_ENABLED=0 이면 sidecar를 만들지/쓰지 않고 CSV를 직접 읽음
+SIDECAR_ENABLED = os.getenv("SIDECAR_ENABLED", "1") != "0"
+# 서버 종료 시 백그라운드 ingest(실행 중인 변환은 interrupt)가 끝나기를 기다리는 최대 시간(초)
+INGEST_STOP_TIMEOUT = float(os.getenv("INGEST_STOP_TIMEOUT", "30"))
+
+# DuckDB 공유 데이터베이스 설정 (모든 데이터셋이 하나의 인스턴스를 공유)
+DUCKDB_POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", "8"))  # 동시에 실행 가능한 쿼리 수
+DUCKDB_POOL_TIMEOUT = float(os.getenv("DUCKDB_POOL_TIMEOUT", "30"))  # cursor 대기 시간(초)
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")  # 예: "2GB" (비우면 DuckDB 기본값)
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "0"))  # 0이면 DuckDB 기본값 (코어 수)
+
+# View 캐시 eviction 설정 (LRU)
+# DUCKDB_MATERIALIZE=1 이면 View 대신 in-memory 테이블로 올려서 쿼리 (메모리 사용 ↑, 속도 ↑)
+DUCKDB_MATERIALIZE = os.getenv("DUCKDB_MATERIALIZE", "0") == "1"
+CACHE_MAX_DATASETS = int(os.getenv("CACHE_MAX_DATASETS", "32"))  # 0이면 제한 없음
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 0이면 제한 없음
+# 항상 캐시에 유지할 데이터셋 (쉼표 구분 dataset_id)
+CACHE_PINNED_DATASETS = [d.strip() for d in os.getenv("CACHE_PINNED_DATASETS", "").split(",") if d.strip()]
+
+# 근사 통계 (StatsRequest.mode="approx")
+STATS_SAMPLE_ROWS = int(os.getenv("STATS_SAMPLE_ROWS", "20000"))  # 요청당 표본 크기 (범위가 이보다 작으면 정확히 계산)
+STATS_SAMPLE_FILE_ROWS = int(os.getenv("STATS_SAMPLE_FILE_ROWS", "200000"))  # ingest 시 저장하는 데이터셋별 표본 크기
+
+# 확장 메트릭 (StatsRequest.metrics: p50/p95/p99, histogram, distinct_count, first/last)
+METRIC_HISTOGRAM_BINS = int(os.getenv("METRIC_HISTOGRAM_BINS", "20"))  # 컬럼 전체 [min, max]를 나눈 구간 수
+METRIC_DISTINCT_SKETCH_SIZE = int(os.getenv("METRIC_DISTINCT_SKETCH_SIZE", "1024"))  # KMV 표본 크기 (이보다 적은 고유값은 정확)
+METRIC_STATE_CACHE_BYTES = int(os.getenv("METRIC_STATE_CACHE_BYTES", str(256 * 1024 ** 2)))  # 블록별 부분 상태 캐시 (0이면 캐시하지 않음)
 
+# 레시피 step 컬럼 (step 구간 인덱스 / group_by="step")
+STEP_ID_COLUMN = os.getenv("STEP_ID_COLUMN", "Step ID")
+STEP_NAME_COLUMN = os.getenv("STEP_NAME_COLUMN", "Step Name")
+# group_by 통계에서 허용하는 최대 그룹 수
+STATS_MAX_GROUPS = int(os.getenv("STATS_MAX_GROUPS", "1000"))
 
+# 시간 축 컬럼 (차트 시간 라벨)
+DATE_COLUMN = os.getenv("DATE_COLUMN", "Date")
+TIME_COLUMN = os.getenv("TIME_COLUMN", "Time")
+# "Date Time" 문자열 → timestamp 파싱 형식 (쉼표 구분, 앞에서부터 시도)
+TIMESTAMP_FORMATS = [
+    f.strip()
+    for f in os.getenv(
+        "TIMESTAMP_FORMATS",
+        "%Y/%m/%d %H:%M:%S,%Y-%m-%d %H:%M:%S,%Y/%m/%d %H:%M:%S.%f,%Y-%m-%d %H:%M:%S.%f",
+    ).split(",")
+    if f.strip()
+]
+
+# 시계열 다운샘플링 (GET /api/datasets/{id}/series)
+SERIES_POINTS_DEFAULT = 2000
+SERIES_POINTS_MAX = 20000
+# 컬럼별로 캐시하는 전체 파일 minmax bucket 수 (이보다 거친 요청은 캐시에서 다시 집계)
+SERIES_PYRAMID_BUCKETS = int(os.getenv("SERIES_PYRAMID_BUCKETS", "8192"))
+SERIES_CACHE_MAX_COLUMNS = int(os.getenv("SERIES_CACHE_MAX_COLUMNS", "128"))  # 0이면 캐시하지 않음
+
+# 동일 preview/stats 요청 합치기 + 결과 캐시 (RESULT_CACHE_TTL=0이면 합치기만 하고 캐시하지 않음)
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "5"))  # 초
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+
+# 비동기 통계 작업 (POST /api/datasets/{id}/stats/jobs)
+STATS_JOB_WORKERS = int(os.getenv("STATS_JOB_WORKERS", "4"))  # 동시에 실행하는 작업 수
+STATS_JOB_TTL = float(os.getenv("STATS_JOB_TTL", "600"))  # 끝난 작업 결과 보관 시간(초)
+
+PREVIEW_LIMIT_DEFAULT = 2000
+PREVIEW_LIMIT_MAX = 10000
+# 스트리밍 preview(format=arrow/ndjson)에서 한 번에 보내는 행 수
+PREVIEW_STREAM_BATCH_ROWS = int(os.getenv("PREVIEW_STREAM_BATCH_ROWS", "2048"))
 
+# 로깅 / 요청 프로파일링
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG면 View 재사용 등 요청마다 찍히는 로그도 출력
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "200"))  # GET /api/profile/requests로 보관하는 최근 요청 수
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))  # 이보다 오래 걸린 요청은 span별 시간을 WARNING으로 기록
+PROFILE_EXPLAIN = os.getenv("PROFILE_EXPLAIN", "1") != "0"  # X-Profile: explain 헤더로 EXPLAIN ANALYZE 수집 허용
+PROFILE_EXPLAIN_MAX_QUERIES = int(os.getenv("PROFILE_EXPLAIN_MAX_QUERIES", "8"))  # 요청당 수집하는 쿼리 계획 수
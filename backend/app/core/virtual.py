@@ -0,0 +1,157 @@
+"""가상 데이터셋 - 여러 데이터셋을 하나의 테이블처럼 조회
+
+가상 데이터셋은 dataset_id 목록 또는 파일명 glob(`pattern`)으로 정의하고
+`metadata/virtual_datasets.json`에 저장한다. 조회 시점에 레지스트리에서 멤버를 다시 찾으므로
+glob으로 정의한 캠페인은 새 CSV가 들어오면 자동으로 포함된다.
+
+컬럼 구성은 멤버 컬럼의 합집합(멤버 순서, 처음 나온 순서)이고, 일부 멤버에만 있는 컬럼은 NULL로 채운다.
+요청 컬럼은 전체 컬럼 카탈로그(columns_union.json)에 있으면 멤버에 없어도 NULL 컬럼으로 허용한다.
+"""
+import fnmatch
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .fileio import write_json_atomic
+from .registry import DatasetMeta, load_registry
+from .scanner import COLUMNS_UNION_PATH
+from .settings import VIRTUAL_DATASETS_PATH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VirtualDataset:
+    virtual_id: str
+    name: Optional[str] = None
+    # 명시적인 멤버 (레지스트리 순서가 아니라 이 순서대로 합침)
+    dataset_ids: List[str] = field(default_factory=list)
+    # 파일명 glob (예: "2025-01-*.csv") - 일치하는 데이터셋을 파일명 순서로 dataset_ids 뒤에 추가
+    pattern: Optional[str] = None
+
+
+_VIRTUAL_FIELDS = {f.name for f in fields(VirtualDataset)}
+
+
+class VirtualRegistry:
+    """
+    virtual_datasets.json 메모리 캐시 (Registry와 같이 파일 상태가 바뀌었을 때만 다시 읽음)
+    """
+
+    def __init__(self, path: Path = VIRTUAL_DATASETS_PATH):
+        self._path = path
+        self._by_id: Dict[str, VirtualDataset] = {}
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _current_file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self._path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self):
+        state = self._current_file_state()
+        if state == self._file_state:
+            return
+        with self._lock:
+            if state == self._file_state:
+                return
+            by_id: Dict[str, VirtualDataset] = {}
+            if state is not None:
+                try:
+                    data = json.loads(self._path.read_text(encoding="utf-8"))
+                except (OSError, ValueError) as e:
+                    logger.warning("Failed to load virtual datasets: %s", e)
+                    return
+                for item in data:
+                    vd = VirtualDataset(**{k: v for k, v in item.items() if k in _VIRTUAL_FIELDS})
+                    by_id[vd.virtual_id] = vd
+            self._by_id = by_id
+            self._file_state = state
+
+    def _save(self, by_id: Dict[str, VirtualDataset]):
+        """호출하는 쪽에서 _lock을 잡은 상태"""
+        write_json_atomic(self._path, [asdict(vd) for vd in by_id.values()])
+        self._by_id = by_id
+        self._file_state = self._current_file_state()
+
+    def all(self) -> List[VirtualDataset]:
+        self._refresh()
+        return list(self._by_id.values())
+
+    def get(self, virtual_id: str) -> Optional[VirtualDataset]:
+        self._refresh()
+        return self._by_id.get(virtual_id)
+
+    def put(self, vd: VirtualDataset):
+        """추가 또는 교체"""
+        self._refresh()
+        with self._lock:
+            by_id = dict(self._by_id)
+            by_id[vd.virtual_id] = vd
+            self._save(by_id)
+
+    def delete(self, virtual_id: str) -> bool:
+        self._refresh()
+        with self._lock:
+            if virtual_id not in self._by_id:
+                return False
+            by_id = {k: v for k, v in self._by_id.items() if k != virtual_id}
+            self._save(by_id)
+            return True
+
+
+_virtual_registry = VirtualRegistry()
+
+
+def get_virtual_registry() -> VirtualRegistry:
+    """전역 가상 데이터셋 레지스트리 반환"""
+    return _virtual_registry
+
+
+def resolve_members(vd: VirtualDataset) -> Tuple[List[DatasetMeta], List[str]]:
+    """
+    가상 데이터셋 멤버 조회 (중복 제거, dataset_ids 순서 → pattern 일치 순서)
+    Returns: (멤버 메타데이터, 레지스트리에 없는 dataset_id)
+    """
+    metas = load_registry()
+    by_id = {m.dataset_id: m for m in metas}
+    members: Dict[str, DatasetMeta] = {}
+    not_found: List[str] = []
+    for dataset_id in vd.dataset_ids:
+        meta = by_id.get(dataset_id)
+        if meta is None:
+            not_found.append(dataset_id)
+        else:
+            members.setdefault(dataset_id, meta)
+    if vd.pattern:
+        for meta in sorted(metas, key=lambda m: m.filename):
+            if fnmatch.fnmatchcase(meta.filename, vd.pattern):
+                members.setdefault(meta.dataset_id, meta)
+    return list(members.values()), not_found
+
+
+def union_columns(members: List[DatasetMeta]) -> List[str]:
+    """멤버 컬럼의 합집합 (처음 나온 순서 유지 - trace 원래 컬럼 순서)"""
+    return list(dict.fromkeys(c for m in members for c in m.columns))
+
+
+def common_columns(members: List[DatasetMeta]) -> List[str]:
+    """모든 멤버에 있는 컬럼 (NULL로 채워지는 행이 없는 컬럼)"""
+    if not members:
+        return []
+    common: Set[str] = set(members[0].columns).intersection(*(m.columns for m in members[1:]))
+    return [c for c in members[0].columns if c in common]
+
+
+def load_union_catalog() -> List[str]:
+    """스캔이 만든 전체 데이터셋 컬럼 카탈로그 (columns_union.json - 어느 파일에든 있는 컬럼)"""
+    try:
+        return list(json.loads(COLUMNS_UNION_PATH.read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return []
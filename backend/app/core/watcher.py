@@ -0,0 +1,147 @@
+"""CSV 디렉토리 감시 - 서버 내부 asyncio 작업
+
+DATA_DIR의 CSV가 추가/변경/삭제되면 증분 스캔(refresh_metadata)을 실행한다.
+파일이 한꺼번에 많이 들어오는 경우를 위해 마지막 이벤트 후 WATCH_DEBOUNCE초 동안
+추가 이벤트가 없을 때 한 번만 스캔한다.
+
+감시 백엔드:
+- watchfiles: OS 파일 이벤트(inotify 등) 사용 (uvicorn[standard]에 포함)
+- poll: WATCH_POLL_INTERVAL초마다 디렉토리 스냅샷 비교 (watchfiles가 없거나 네트워크 파일시스템)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from .auto_scan import refresh_metadata
+from .settings import DATA_DIR, WATCH_BACKEND, WATCH_DEBOUNCE, WATCH_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def _snapshot() -> Dict[str, Tuple[int, int]]:
+    """DATA_DIR의 CSV 상태: filename -> (크기, mtime_ns)"""
+    out: Dict[str, Tuple[int, int]] = {}
+    try:
+        with os.scandir(DATA_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(".csv") and entry.is_file():
+                    st = entry.stat()
+                    out[entry.name] = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        pass
+    return out
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend == "poll":
+        return "poll"
+    try:
+        import watchfiles  # noqa: F401
+        return "watchfiles"
+    except ImportError:
+        if backend == "watchfiles":
+            logger.warning("⚠️  watchfiles가 설치되어 있지 않아 poll 방식으로 감시합니다.")
+        return "poll"
+
+
+class CsvWatcher:
+    """DATA_DIR 감시 작업 (start/stop은 이벤트 루프 안에서 호출)"""
+
+    def __init__(
+        self,
+        backend: str = WATCH_BACKEND,
+        debounce: float = WATCH_DEBOUNCE,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+    ):
+        self.backend = _resolve_backend(backend)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._dirty: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        self.scans = 0  # 감시로 실행된 스캔 횟수
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self):
+        """감시 시작 (이미 실행 중이면 무시)"""
+        if self.running:
+            return
+        self._dirty = asyncio.Event()
+        self._stop = asyncio.Event()
+        producer = self._watch_events if self.backend == "watchfiles" else self._poll
+        self._tasks = [
+            asyncio.create_task(producer(), name="aldlist-watch"),
+            asyncio.create_task(self._consume(), name="aldlist-watch-scan"),
+        ]
+        logger.info("👀 CSV 감시 시작 (%s): %s", self.backend, DATA_DIR)
+
+    async def stop(self):
+        """감시 중지"""
+        if self._stop is not None:
+            self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+
+    async def _watch_events(self):
+        """watchfiles 백엔드: OS 파일 이벤트 수신"""
+        from watchfiles import awatch
+
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        async for _changes in awatch(
+            DATA_DIR,
+            watch_filter=lambda _change, path: path.endswith(".csv"),
+            stop_event=self._stop,
+            recursive=False,
+        ):
+            self._dirty.set()
+
+    async def _poll(self):
+        """poll 백엔드: 주기적으로 디렉토리 스냅샷 비교"""
+        previous = await asyncio.to_thread(_snapshot)
+        while not self._stop.is_set():
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(_snapshot)
+            if current != previous:
+                previous = current
+                self._dirty.set()
+
+    async def _consume(self):
+        """변경 이벤트를 debounce한 뒤 증분 스캔 실행"""
+        while not self._stop.is_set():
+            await self._dirty.wait()
+            # 마지막 이벤트 후 debounce 동안 조용해질 때까지 대기
+            while True:
+                self._dirty.clear()
+                await asyncio.sleep(self.debounce)
+                if not self._dirty.is_set():
+                    break
+            try:
+                # 스캔은 파일 I/O라 이벤트 루프를 막지 않도록 스레드에서 실행
+                await asyncio.to_thread(refresh_metadata, True)
+                self.scans += 1
+            except Exception as e:
+                logger.exception("❌ CSV 변경 반영 실패: %s", e)
+
+
+# 전역 감시자 (싱글톤 패턴)
+_watcher: Optional[CsvWatcher] = None
+
+
+def get_watcher() -> CsvWatcher:
+    """전역 감시자 반환"""
+    global _watcher
+    if _watcher is None:
+        _watcher = CsvWatcher()
+    return _watcher
@@ -1,115 +1,359 @@
-"""DuckDB View 캐싱 시스템 - CSV 재파싱 비용 최적화"""
+"""DuckDB View 캐싱 시스템 - CSV 재파싱 비용 최적화 (Parquet sidecar 우선 사용)
+
+모든 데이터셋이 하나의 공유 in-memory DuckDB 데이터베이스를 사용하고,
+쿼리는 크기가 제한된 cursor 풀을 통해 실행된다.
+(데이터셋마다 DuckDB 인스턴스를 만들면 스레드 풀/버퍼 매니저가 데이터셋 수만큼 생김)
+
+View(또는 DUCKDB_MATERIALIZE=1일 때 in-memory 테이블)는 LRU 순서로 관리되며,
+CACHE_MAX_DATASETS / CACHE_MAX_BYTES 예산을 넘으면 오래된 것부터 제거된다.
+CACHE_PINNED_DATASETS에 지정한 데이터셋은 제거하지 않는다.
+
+쿼리는 View를 lease(acquire_view/release_view 또는 view())로 빌려서 실행한다.
+빌려 쓰는 중에 eviction/무효화/소스 교체가 일어나면 항목은 캐시에서 바로 빠지지만,
+DROP은 마지막 lease가 반납될 때 실행된다 (실행 중인 쿼리가 사라진 View를 보지 않음).
+
+sidecar가 없는 CSV View도 레지스트리 타입 카탈로그(column_types)의 숫자 컬럼은 같은 타입으로 읽어서
+preview 값과 MIN/MAX가 sidecar View와 같다 (카탈로그가 기록되면 소스가 바뀌어 View를 다시 만듦).
+"""
 from __future__ import annotations
 import duckdb
-from typing import Dict, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, Optional, Set
 from pathlib import Path
+import logging
+import queue
 import threading
 
+from ..core.settings import (
+    SIDECAR_ENABLED,
+    DUCKDB_POOL_SIZE,
+    DUCKDB_POOL_TIMEOUT,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_THREADS,
+    DUCKDB_MATERIALIZE,
+    CACHE_MAX_DATASETS,
+    CACHE_MAX_BYTES,
+    CACHE_PINNED_DATASETS,
+)
+from ..core.profiling import span
+from ..core.registry import get_registry
+from .sidecar import OnConnection, find_sidecar, is_numeric_type, replace_clause
+from .sql import quote_literal
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """cursor 풀이 가득 차서 제한 시간 안에 cursor를 얻지 못함"""
+
+
+@dataclass
+class _CacheEntry:
+    name: str  # view 또는 table 이름
+    source: str  # 읽는 소스 (read_parquet/read_csv)
+    kind: str  # "view" | "table"
+    size_bytes: int = 0  # materialize된 테이블의 추정 크기 (view는 0)
+    row_indexed: bool = False  # sidecar 기반이라 __row_id 컬럼이 있음 (keyset 조회 가능)
+    # 숫자 타입 컬럼 (sidecar 또는 카탈로그 타입으로 읽는 CSV, 집계 시 TRY_CAST 생략)
+    numeric_columns: FrozenSet[str] = frozenset()
+    leases: int = 0  # 이 View로 실행 중인 쿼리 수
+    retired: bool = False  # 캐시에서 빠졌지만 lease가 남아 DROP을 미룬 상태
+
+
+@dataclass(frozen=True)
+class ViewLease:
+    """빌린 View (release_view로 반납할 때까지 DROP되지 않음)"""
+    query: str  # FROM 절에 쓰는 View/테이블 이름
+    row_indexed: bool
+    numeric_columns: FrozenSet[str]
+    entry: _CacheEntry
+
 
 class DuckDBCache:
     """DuckDB View 캐시 매니저 - 확장 가능한 구조"""
-    
-    def __init__(self):
-        self._connections: Dict[str, duckdb.DuckDBPyConnection] = {}
-        self._view_names: Dict[str, str] = {}  # dataset_id -> view_name
+
+    def __init__(
+        self,
+        pool_size: int = DUCKDB_POOL_SIZE,
+        memory_limit: str = DUCKDB_MEMORY_LIMIT,
+        threads: int = DUCKDB_THREADS,
+        pool_timeout: float = DUCKDB_POOL_TIMEOUT,
+        materialize: bool = DUCKDB_MATERIALIZE,
+        max_datasets: int = CACHE_MAX_DATASETS,
+        max_bytes: int = CACHE_MAX_BYTES,
+        pinned: Optional[Iterable[str]] = CACHE_PINNED_DATASETS,
+    ):
+        config: Dict[str, str] = {}
+        if memory_limit:
+            config["memory_limit"] = memory_limit
+        if threads > 0:
+            config["threads"] = str(threads)
+
+        # 공유 데이터베이스 (View DDL은 이 connection에서만 실행)
+        self._db = duckdb.connect(database=":memory:", config=config)
+        self._pool: "queue.LifoQueue[duckdb.DuckDBPyConnection]" = queue.LifoQueue()
+        self._pool_size = max(1, pool_size)
+        self._pool_timeout = pool_timeout
+        self._pool_created = 0
+
+        # dataset_id -> View/테이블 정보 (앞쪽이 가장 오래 사용하지 않은 항목)
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._materialize = materialize
+        self._max_datasets = max_datasets
+        self._max_bytes = max_bytes
+        self._pinned: Set[str] = set(pinned or ())
         self._lock = threading.Lock()
         self._view_counter = 0  # 고유한 view 이름 생성용
-    
-    def _get_view_name(self, dataset_id: str) -> str:
-        """데이터셋 ID 기반 고유한 view 이름 생성"""
-        if dataset_id not in self._view_names:
-            self._view_counter += 1
-            # SQL 식별자로 안전한 이름 생성 (특수문자 제거)
-            safe_id = dataset_id.replace('-', '_').replace('.', '_')
-            self._view_names[dataset_id] = f"ds_view_{safe_id}_{self._view_counter}"
-        return self._view_names[dataset_id]
-    
-    def _get_or_create_connection(self, dataset_id: str) -> duckdb.DuckDBPyConnection:
-        """데이터셋별 Connection 가져오기 또는 생성"""
-        if dataset_id not in self._connections:
-            conn = duckdb.connect()
-            self._connections[dataset_id] = conn
-        return self._connections[dataset_id]
-    
-    def ensure_view(self, dataset_id: str, csv_path: str) -> str:
+
+        # eviction 지표
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._evicted_bytes = 0
+        self._deferred_drops = 0  # lease가 남아 있어서 반납 때까지 미룬 DROP
+
+    def _acquire_cursor(self) -> duckdb.DuckDBPyConnection:
+        """풀에서 cursor 가져오기 (없으면 pool_size까지 생성, 가득 차면 대기)"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._pool_created < self._pool_size:
+                self._pool_created += 1
+                return self._db.cursor()
+
+        try:
+            return self._pool.get(timeout=self._pool_timeout)
+        except queue.Empty:
+            raise PoolTimeout(
+                f"No DuckDB cursor available within {self._pool_timeout}s "
+                f"(pool size {self._pool_size})"
+            )
+
+    @contextmanager
+    def cursor(self, on_connection: Optional[OnConnection] = None) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        공유 데이터베이스의 cursor 대여 (with 블록이 끝나면 풀에 반납)
+        on_connection(conn)은 cursor를 빌린 동안만 유지되고, 반납 전에 빠져나옴
+
+        사용 예:
+            with cache.cursor() as conn:
+                conn.execute("SELECT ...").fetchall()
+        """
+        conn = self._acquire_cursor()
+        try:
+            if on_connection is None:
+                yield conn
+            else:
+                with on_connection(conn):
+                    yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _new_relation_name(self, dataset_id: str, kind: str) -> str:
+        """데이터셋 ID 기반 고유한 view/table 이름 생성"""
+        self._view_counter += 1
+        # SQL 식별자로 안전한 이름 생성 (특수문자 제거)
+        safe_id = dataset_id.replace('-', '_').replace('.', '_')
+        prefix = "ds_table" if kind == "table" else "ds_view"
+        return f"{prefix}_{safe_id}_{self._view_counter}"
+
+    def _resolve_source(self, dataset_id: str, csv_path: str) -> str:
+        """
+        View가 읽을 소스 선택
+        - 최신 Parquet sidecar가 있으면 sidecar (타입 지정 + 컬럼 단위 읽기)
+        - 없으면 CSV 직접 읽기 (all_varchar=true로 타입 추정 비용 제거)
+          타입 카탈로그가 있으면 숫자 컬럼만 TRY_CAST (sidecar와 같은 타입)
         """
-        View가 없으면 생성, 있으면 재사용
-        Returns: view_name
+        if SIDECAR_ENABLED:
+            sidecar = find_sidecar(dataset_id, csv_path)
+            if sidecar is not None:
+                return f"read_parquet({quote_literal(str(sidecar))})"
+        csv_path_normalized = str(Path(csv_path).resolve())
+        source = f"read_csv({quote_literal(csv_path_normalized)}, all_varchar=true)"
+        meta = get_registry().get(dataset_id)
+        replace = replace_clause(meta.column_types, strict=False) if meta is not None and meta.column_types else ""
+        return f"(SELECT * {replace} FROM {source})" if replace else source
+
+    def _estimate_table_bytes(self, table_name: str) -> int:
+        """materialize된 테이블의 메모리 크기 추정 (행 수 × 컬럼 수 × 8바이트)"""
+        row = self._db.execute(
+            "SELECT estimated_size, column_count FROM duckdb_tables() WHERE table_name = ?",
+            [table_name],
+        ).fetchone()
+        if row is None:
+            return 0
+        return int(row[0] or 0) * int(row[1] or 0) * 8
+
+    def _ensure_locked(self, dataset_id: str, source: str) -> _CacheEntry:
+        """
+        View(또는 materialize된 테이블)가 없으면 생성, 있으면 재사용 (self._lock을 잡은 상태에서 호출)
+        소스가 바뀌었으면 (sidecar 생성 완료, CSV 교체 등) 다시 만듦
+        접근할 때마다 LRU 순서를 갱신하고, 예산을 넘으면 오래된 항목부터 제거
+        """
+        entry = self._entries.get(dataset_id)
+
+        # 같은 소스로 이미 만들어진 View면 재사용
+        if entry is not None and entry.source == source:
+            self._entries.move_to_end(dataset_id)
+            self._hits += 1
+            logger.debug("[DuckDB Cache] View reused: %s for dataset %s", entry.name, dataset_id)
+            return entry
+
+        self._misses += 1
+        if entry is not None:
+            self._drop_entry_locked(dataset_id)
+
+        kind = "table" if self._materialize else "view"
+        name = self._new_relation_name(dataset_id, kind)
+        create_query = f"""
+        CREATE OR REPLACE {"TABLE" if kind == "table" else "VIEW"} {name} AS
+        SELECT * FROM {source}
         """
+
+        try:
+            with span("view"):
+                self._db.execute(create_query)
+            size_bytes = self._estimate_table_bytes(name) if kind == "table" else 0
+            row_indexed = source.startswith("read_parquet(")
+            numeric_columns = frozenset(
+                row[0] for row in self._db.execute(f"DESCRIBE {name}").fetchall() if is_numeric_type(row[1])
+            )
+            entry = _CacheEntry(
+                name=name,
+                source=source,
+                kind=kind,
+                size_bytes=size_bytes,
+                row_indexed=row_indexed,
+                numeric_columns=numeric_columns,
+            )
+            self._entries[dataset_id] = entry
+            logger.info("[DuckDB Cache] %s created: %s for dataset %s (%s)", kind.capitalize(), name, dataset_id, source)
+            self._evict_locked(keep=dataset_id)
+            return entry
+        except Exception as e:
+            logger.warning("Failed to create view for %s: %s", dataset_id, e)
+            raise
+
+    def acquire_view(self, dataset_id: str, csv_path: str) -> ViewLease:
+        """
+        View를 빌림 (없으면 생성) - release_view로 반납할 때까지 eviction/무효화되어도 DROP되지 않음
+        View 생성에 실패하면 예외를 그대로 전달 (호출하는 쪽에서 CSV 직접 읽기로 fallback)
+        """
+        source = self._resolve_source(dataset_id, csv_path)
         with self._lock:
-            view_name = self._get_view_name(dataset_id)
-            conn = self._get_or_create_connection(dataset_id)
-            
-            # View가 이미 존재하는지 확인
-            try:
-                # View 존재 여부 확인 (DuckDB는 정보 스키마를 지원하지 않으므로 간단히 시도)
-                test_query = f"SELECT 1 FROM {view_name} LIMIT 1"
-                conn.execute(test_query).fetchone()
-                # View가 이미 존재하면 재사용
-                print(f"[DuckDB Cache] View reused: {view_name} for dataset {dataset_id}")
-                return view_name
-            except Exception:
-                # View가 없으면 생성
-                pass
-            
-            # 경로 정규화
-            csv_path_normalized = str(Path(csv_path).resolve())
-            safe_view_name = view_name.replace('-', '_').replace('.', '_')
-            
-            # View 생성 - all_varchar=True로 타입 추정 비용 제거 (성능 개선)
-            # preview는 타입 추정이 필요 없고, stats는 TRY_CAST로 처리하므로 문자열로 읽어도 OK
-            create_query = f"""
-            CREATE VIEW {safe_view_name} AS
-            SELECT * FROM read_csv('{csv_path_normalized}', all_varchar=true)
-            """
-            
-            try:
-                conn.execute(create_query)
-                print(f"[DuckDB Cache] View created: {safe_view_name} for dataset {dataset_id}")
-                return safe_view_name
-            except Exception as e:
-                # View 생성 실패 시 원본 경로 사용 (fallback)
-                print(f"Warning: Failed to create view for {dataset_id}: {e}")
-                raise
-    
-    def get_view_query(self, dataset_id: str, csv_path: str) -> str:
+            entry = self._ensure_locked(dataset_id, source)
+            entry.leases += 1
+            return ViewLease(
+                query=entry.name,
+                row_indexed=entry.row_indexed,
+                numeric_columns=entry.numeric_columns,
+                entry=entry,
+            )
+
+    def release_view(self, lease: ViewLease):
+        """빌린 View 반납 (캐시에서 이미 빠진 항목이면 마지막 반납 때 DROP)"""
+        with self._lock:
+            entry = lease.entry
+            entry.leases -= 1
+            if entry.retired and entry.leases <= 0:
+                self._drop_relation_locked(entry)
+
+    @contextmanager
+    def view(self, dataset_id: str, csv_path: str) -> Iterator[ViewLease]:
         """
-        View 이름 반환 (없으면 생성)
-        Returns: "view_name" 또는 "read_csv('path', all_varchar=true, header=true)" (fallback)
+        with 블록 동안 View 빌리기
+
+        사용 예:
+            with cache.view(dataset_id, csv_path) as view, cache.cursor() as conn:
+                conn.execute(f"SELECT ... FROM {view.query}").fetchall()
         """
+        lease = self.acquire_view(dataset_id, csv_path)
+        try:
+            yield lease
+        finally:
+            self.release_view(lease)
+
+    def _drop_relation_locked(self, entry: _CacheEntry):
+        """View/테이블 DROP (self._lock을 잡은 상태에서 호출)"""
         try:
-            view_name = self.ensure_view(dataset_id, csv_path)
-            return view_name
+            self._db.execute(f"DROP {'TABLE' if entry.kind == 'table' else 'VIEW'} IF EXISTS {entry.name}")
         except Exception:
-            # View 생성 실패 시 원본 경로 사용 (fallback) - preview는 all_varchar로 빠르게
-            csv_path_normalized = str(Path(csv_path).resolve())
-            return f"read_csv('{csv_path_normalized}', all_varchar=true, header=true)"
-    
+            pass
+
+    def _drop_entry_locked(self, dataset_id: str) -> Optional[_CacheEntry]:
+        """
+        캐시에서 항목 제거 (self._lock을 잡은 상태에서 호출)
+        빌려 간 쿼리가 있으면 DROP은 마지막 release_view까지 미룸
+        """
+        entry = self._entries.pop(dataset_id, None)
+        if entry is not None:
+            if entry.leases > 0:
+                entry.retired = True
+                self._deferred_drops += 1
+            else:
+                self._drop_relation_locked(entry)
+        return entry
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        """
+        예산(max_datasets, max_bytes)을 넘으면 가장 오래 사용하지 않은 항목부터 제거
+        pin된 데이터셋과 방금 사용한 데이터셋(keep)은 제거하지 않음
+        """
+        def over_budget() -> bool:
+            unpinned = sum(1 for k in self._entries if k not in self._pinned)
+            total_bytes = sum(e.size_bytes for e in self._entries.values())
+            if self._max_datasets > 0 and unpinned > self._max_datasets:
+                return True
+            return self._max_bytes > 0 and total_bytes > self._max_bytes
+
+        while over_budget():
+            victim = next(
+                (k for k in self._entries if k not in self._pinned and k != keep),
+                None,
+            )
+            if victim is None:
+                break
+            entry = self._drop_entry_locked(victim)
+            self._evictions += 1
+            self._evicted_bytes += entry.size_bytes if entry else 0
+            logger.info("[DuckDB Cache] Evicted: %s", victim)
+
     def clear_view(self, dataset_id: str):
         """특정 데이터셋의 View 제거"""
         with self._lock:
-            if dataset_id in self._view_names:
-                view_name = self._view_names[dataset_id]
-                if dataset_id in self._connections:
-                    conn = self._connections[dataset_id]
-                    try:
-                        conn.execute(f"DROP VIEW IF EXISTS {view_name}")
-                    except Exception:
-                        pass
-                del self._view_names[dataset_id]
-            
-            if dataset_id in self._connections:
-                try:
-                    self._connections[dataset_id].close()
-                except Exception:
-                    pass
-                del self._connections[dataset_id]
-    
+            self._drop_entry_locked(dataset_id)
+
     def clear_all(self):
-        """모든 View와 Connection 정리"""
+        """모든 View 정리"""
         with self._lock:
-            for dataset_id in list(self._view_names.keys()):
-                self.clear_view(dataset_id)
+            for dataset_id in list(self._entries.keys()):
+                self._drop_entry_locked(dataset_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 상태 및 eviction 지표"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.size_bytes for e in self._entries.values()),
+                "max_datasets": self._max_datasets,
+                "max_bytes": self._max_bytes,
+                "materialize": self._materialize,
+                "pinned": sorted(self._pinned),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "evicted_bytes": self._evicted_bytes,
+                "deferred_drops": self._deferred_drops,
+                "leased": sum(1 for e in self._entries.values() if e.leases > 0),
+                "pool_size": self._pool_size,
+                "pool_created": self._pool_created,
+                "lru": list(self._entries.keys()),
+            }
 
 
 # 전역 캐시 인스턴스 (싱글톤 패턴)
@@ -119,4 +363,3 @@ _cache = DuckDBCache()
 def get_cache() -> DuckDBCache:
     """전역 캐시 인스턴스 반환"""
     return _cache
-
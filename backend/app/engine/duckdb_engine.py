@@ -1,14 +1,138 @@
 """DuckDB를 사용한 CSV 쿼리 엔진"""
 from __future__ import annotations
 import duckdb
-from typing import List, Dict, Any, Optional, Callable
+import io
+import logging
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Callable, FrozenSet, Sequence, Tuple
+from datetime import datetime
 from pathlib import Path
-from .duckdb_cache import get_cache
+from ..core.profiling import query_span, span
+from ..core.settings import PREVIEW_STREAM_BATCH_ROWS, STATS_MAX_GROUPS
+from .block_index import find_block_index, compute_range_metrics
+from .duckdb_cache import get_cache, OnConnection, PoolTimeout, ViewLease
+from .shaping import numpy_to_columns, numpy_to_rows, reshape_metric_row, shape_metric_value
+from .sidecar import ROW_ID_COLUMN
+from .timeindex import find_time_index, load_time_index, timestamp_expr, to_micros
+from .steps import find_step_index, key_alias, load_step_segments, step_columns
+from .sql import quote_ident, quote_literal
 
+logger = logging.getLogger(__name__)
 
-def quote_ident(name: str) -> str:
-    """식별자 따옴표 처리"""
-    return f'"{name.replace('"', '""')}"'
+
+def _csv_source(csv_path: str, all_varchar: bool = True) -> str:
+    """CSV 직접 읽기용 FROM 절 (캐시를 쓸 수 없을 때)"""
+    csv_path_normalized = str(Path(csv_path).resolve())
+    if all_varchar:
+        return f"read_csv({quote_literal(csv_path_normalized)}, all_varchar=true, header=true)"
+    return f"read_csv_auto({quote_literal(csv_path_normalized)})"
+
+
+@contextmanager
+def leased_view(
+    csv_path: str,
+    dataset_id: Optional[str] = None,
+    all_varchar: bool = True,
+) -> Iterator[ViewLease]:
+    """
+    쿼리 대상 View를 with 블록 동안 빌림 (블록 안에서 eviction되어도 DROP되지 않음)
+    View를 만들 수 없으면 (dataset_id 없음, 생성 실패) CSV 직접 읽기 소스 - row_indexed=False
+    """
+    lease = None
+    if dataset_id:
+        try:
+            lease = get_cache().acquire_view(dataset_id, csv_path)
+        except Exception as e:
+            logger.warning("Cache failed for %s, using fallback: %s", dataset_id, e)
+    if lease is None:
+        yield ViewLease(query=_csv_source(csv_path, all_varchar), row_indexed=False, numeric_columns=frozenset(), entry=None)
+        return
+    try:
+        yield lease
+    finally:
+        get_cache().release_view(lease)
+
+
+def _resolve_preview_columns(
+    conn: duckdb.DuckDBPyConnection,
+    view_query: str,
+    columns: Optional[List[str]],
+) -> List[str]:
+    """preview 컬럼 목록 (주어지지 않으면 View에서 조회)"""
+    if columns is not None:
+        return columns
+    try:
+        col_query = f"DESCRIBE SELECT * FROM {view_query}"
+        col_result = conn.execute(col_query).fetchall()
+        columns = [row[0] for row in col_result]
+    except Exception:
+        # DESCRIBE 실패 시 실제 데이터 1행을 읽어서 컬럼 추출
+        test_query = f"SELECT * FROM {view_query} LIMIT 1"
+        result = conn.execute(test_query)
+        columns = [desc[0] for desc in result.description]
+        result.close()
+    # sidecar의 합성 행 번호 컬럼은 CSV 컬럼이 아니므로 제외
+    return [c for c in columns if c != ROW_ID_COLUMN]
+
+
+def _preview_query(
+    view_query: str,
+    offset: int,
+    limit: int,
+    columns: List[str],
+    row_indexed: bool = False,
+) -> str:
+    """
+    preview SELECT 생성
+    row_indexed=True면 __row_id 범위로 조회 (row group 건너뛰기 → offset과 무관하게 O(page))
+    """
+    col_list = ", ".join(quote_ident(c) for c in columns) if columns else "*"
+    if row_indexed:
+        # Keyset 페이지네이션: 앞쪽 행을 다시 읽지 않음
+        row_id = quote_ident(ROW_ID_COLUMN)
+        return f"""
+        SELECT {col_list}
+        FROM {view_query}
+        WHERE {row_id} >= {offset} AND {row_id} < {offset + limit}
+        ORDER BY {row_id}
+        """
+    return f"""
+        SELECT {col_list}
+        FROM {view_query}
+        LIMIT {limit} OFFSET {offset}
+        """
+
+
+# preview 응답 레이아웃
+PREVIEW_LAYOUTS = ("rows", "columnar")
+
+
+def fetch_preview(
+    conn: duckdb.DuckDBPyConnection,
+    view_query: str,
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]],
+    row_indexed: bool = False,
+    layout: str = "rows",
+) -> tuple[List[Any], List[str]]:
+    """
+    preview 쿼리 실행 (데이터셋 View와 가상 데이터셋 union 소스 공용)
+    - rows: 행 딕셔너리 목록
+    - columnar: 컬럼별 값 목록 (columns 순서), DuckDB의 컬럼 단위 fetch 결과를 그대로 사용
+    """
+    columns = _resolve_preview_columns(conn, view_query, columns)
+    query = _preview_query(view_query, offset, limit, columns, row_indexed)
+    
+    # 컬럼 단위로 fetch해서 변환 (fetchnumpy는 NULL을 masked 값으로 돌려주고 tolist()에서 None이 됨)
+    with query_span(conn, query):
+        arrays = conn.execute(query).fetchnumpy()
+    with span("shaping"):
+        if layout == "columnar":
+            return numpy_to_columns(arrays, columns), columns
+        
+        # 행 딕셔너리 (None 값을 빈 문자열로 변환하지 않음)
+        return numpy_to_rows(arrays, columns), columns
 
 
 def preview_rows(
@@ -17,112 +141,81 @@ def preview_rows(
     limit: int = 2000,
     columns: Optional[List[str]] = None,
     dataset_id: Optional[str] = None,  # 캐시를 위한 dataset_id
-) -> tuple[List[Dict[str, Any]], List[str]]:
-    """CSV 미리보기 - View 캐싱 지원"""
-    cache = get_cache()
+    layout: str = "rows",
+) -> tuple[List[Any], List[str]]:
+    """
+    CSV 미리보기 - View 캐싱 지원 (공유 DuckDB cursor 풀 사용)
+    offset은 0부터 시작하는 행 번호이며, sidecar 기반 View면 __row_id로 바로 찾아감
     
-    # dataset_id가 제공되면 View 캐싱 사용, 아니면 기존 방식 (fallback)
-    if dataset_id:
-        try:
-            # View 캐시 사용
-            view_query = cache.get_view_query(dataset_id, csv_path)
-            conn = cache._get_or_create_connection(dataset_id)
-            print(f"[Preview] Using DuckDB View cache for dataset {dataset_id}: {view_query}")
-            
-            # 컬럼 목록 조회
-            if columns is None:
-                try:
-                    col_query = f"DESCRIBE SELECT * FROM {view_query}"
-                    col_result = conn.execute(col_query).fetchall()
-                    columns = [row[0] for row in col_result]
-                except Exception:
-                    # DESCRIBE 실패 시 실제 데이터 1행을 읽어서 컬럼 추출
-                    test_query = f"SELECT * FROM {view_query} LIMIT 1"
-                    result = conn.execute(test_query)
-                    columns = [desc[0] for desc in result.description]
-                    result.close()
-            
-            # 컬럼 선택
-            if columns:
-                col_list = ", ".join(quote_ident(c) for c in columns)
-                query = f"""
-                SELECT {col_list}
-                FROM {view_query}
-                LIMIT {limit} OFFSET {offset}
-                """
-            else:
-                query = f"""
-                SELECT *
-                FROM {view_query}
-                LIMIT {limit} OFFSET {offset}
-                """
-            
-            result = conn.execute(query).fetchall()
-            
-            # 딕셔너리로 변환
-            rows = []
-            for row in result:
-                row_dict = {}
-                for i, col in enumerate(columns):
-                    value = row[i] if i < len(row) else None
-                    row_dict[col] = value
-                rows.append(row_dict)
-            
-            return rows, columns
-        except Exception as e:
-            # 캐시 사용 실패 시 기존 방식으로 fallback
-            print(f"Warning: Cache failed for {dataset_id}, using fallback: {e}")
+    Returns: (rows, columns) - layout="columnar"면 rows 대신 컬럼별 값 목록
+    """
+    # View를 만들 수 없으면 CSV 직접 읽기 - preview는 all_varchar로 빠르게 읽기 (타입 추정 스킵)
+    # (View 생성 실패만 fallback, 쿼리 오류는 그대로 전달)
+    with leased_view(csv_path, dataset_id) as view, get_cache().cursor() as conn:
+        logger.debug("[Preview] Using DuckDB View for dataset %s: %s", dataset_id, view.query)
+        return fetch_preview(conn, view.query, offset, limit, columns, view.row_indexed, layout)
+
+
+# 스트리밍 preview 형식: format 이름 -> media type
+STREAM_FORMATS: Dict[str, str] = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _record_batch_reader(result: duckdb.DuckDBPyConnection, batch_rows: int):
+    """DuckDB 결과 → Arrow RecordBatchReader (버전별 API 차이 흡수)"""
+    to_reader = getattr(result, "to_arrow_reader", None)
+    if to_reader is not None:
+        return to_reader(batch_rows)
+    return result.fetch_record_batch(batch_rows)
+
+
+def stream_preview(
+    csv_path: str,
+    fmt: str,
+    offset: int = 0,
+    limit: int = 2000,
+    columns: Optional[List[str]] = None,
+    dataset_id: Optional[str] = None,
+    batch_rows: int = PREVIEW_STREAM_BATCH_ROWS,
+) -> Iterator[bytes]:
+    """
+    preview를 청크 단위로 스트리밍 (행 딕셔너리를 만들지 않음)
     
-    # Fallback: 기존 방식 (캐시 없이) - preview는 all_varchar로 빠르게 읽기
-    conn = duckdb.connect()
+    - arrow: DuckDB의 Arrow record batch를 IPC stream 형식으로 그대로 전송
+    - ndjson: DuckDB가 행을 JSON으로 직렬화 (to_json), batch_rows 행씩 전송
     
-    try:
-        # 경로 정규화 (Windows 경로 처리)
-        csv_path_normalized = str(Path(csv_path).resolve())
-        
-        # 컬럼 목록 조회
-        if columns is None:
-            try:
-                # DuckDB의 DESCRIBE 사용 (all_varchar로 빠르게)
-                col_query = f"DESCRIBE SELECT * FROM read_csv('{csv_path_normalized}', all_varchar=true, header=true)"
-                col_result = conn.execute(col_query).fetchall()
-                columns = [row[0] for row in col_result]
-            except Exception:
-                # DESCRIBE 실패 시 실제 데이터 1행을 읽어서 컬럼 추출
-                test_query = f"SELECT * FROM read_csv('{csv_path_normalized}', all_varchar=true, header=true) LIMIT 1"
-                result = conn.execute(test_query)
-                columns = [desc[0] for desc in result.description]
-                result.close()
-        
-        # 컬럼 선택 - preview는 all_varchar로 빠르게 읽기 (타입 추정 스킵)
-        if columns:
-            col_list = ", ".join(quote_ident(c) for c in columns)
-            query = f"""
-            SELECT {col_list}
-            FROM read_csv('{csv_path_normalized}', all_varchar=true, header=true)
-            LIMIT {limit} OFFSET {offset}
-            """
-        else:
-            query = f"""
-            SELECT *
-            FROM read_csv('{csv_path_normalized}', all_varchar=true, header=true)
-            LIMIT {limit} OFFSET {offset}
-            """
-        
-        result = conn.execute(query).fetchall()
+    cursor는 스트림이 끝날 때까지 점유하고, 클라이언트가 연결을 끊으면 반납된다.
+    """
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported stream format: {fmt}")
+    if fmt == "arrow":
+        import pyarrow as pa  # 선택 의존성: arrow 형식에서만 필요
+    
+    with leased_view(csv_path, dataset_id) as view, get_cache().cursor() as conn:
+        columns = _resolve_preview_columns(conn, view.query, columns)
+        query = _preview_query(view.query, offset, limit, columns, view.row_indexed)
         
-        # 딕셔너리로 변환 (None 값을 빈 문자열로 변환하지 않음)
-        rows = []
-        for row in result:
-            row_dict = {}
-            for i, col in enumerate(columns):
-                value = row[i] if i < len(row) else None
-                row_dict[col] = value
-            rows.append(row_dict)
+        if fmt == "ndjson":
+            result = conn.execute(f"SELECT to_json(t)::VARCHAR FROM ({query}) t")
+            while True:
+                chunk = result.fetchmany(batch_rows)
+                if not chunk:
+                    break
+                yield ("\n".join(row[0] for row in chunk) + "\n").encode("utf-8")
+            return
         
-        return rows, columns
-    finally:
-        conn.close()
+        reader = _record_batch_reader(conn.execute(query), batch_rows)
+        buffer = io.BytesIO()
+        writer = pa.ipc.new_stream(buffer, reader.schema)
+        for batch in reader:
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        writer.close()  # end-of-stream 표시
+        yield buffer.getvalue()
 
 
 # 메트릭 레지스트리: 확장 포인트
@@ -135,6 +228,53 @@ METRICS: Dict[str, Callable[[str], str]] = {
     "stddev": lambda expr: f"STDDEV(TRY_CAST({expr} AS DOUBLE))",
 }
 
+# 컬럼마다 SELECT하는 메트릭 순서 (기본 메트릭 + 숫자 메트릭, 문자열 컬럼은 TRY_CAST로 안전하게 처리)
+METRIC_ORDER = ("count", "non_null_count", "min", "max", "avg", "stddev")
+
+# 숫자 타입으로 저장된 컬럼용 (sidecar): 문자열 → DOUBLE 변환 없이 바로 집계
+NUMERIC_METRICS: Dict[str, Callable[[str], str]] = {
+    **METRICS,
+    "avg": lambda expr: f"AVG({expr})",
+    "stddev": lambda expr: f"STDDEV({expr})",
+}
+
+
+def metric_select_parts(
+    columns: List[str],
+    numeric_columns: FrozenSet[str] = frozenset(),
+) -> tuple[List[str], List[tuple[str, str]]]:
+    """
+    모든 컬럼 × METRICS SELECT 항목 생성
+    numeric_columns: View에서 숫자 타입인 컬럼 (TRY_CAST 생략)
+    Returns: (select_parts, metric_keys) - metric_keys[i]는 select_parts[i]의 (col, metric)
+    """
+    select_parts = []
+    metric_keys = []  # (col, metric) 매핑
+    
+    for col in columns:
+        col_quoted = quote_ident(col)
+        registry = NUMERIC_METRICS if col in numeric_columns else METRICS
+        for metric_name in METRIC_ORDER:
+            alias = f"{col}__{metric_name}"
+            select_parts.append(f"{registry[metric_name](col_quoted)} AS {quote_ident(alias)}")
+            metric_keys.append((col, metric_name))
+    
+    return select_parts, metric_keys
+
+
+def reshape_metrics(
+    columns: List[str],
+    metric_keys: List[tuple[str, str]],
+    values: Sequence[Any],
+) -> Dict[str, Dict[str, Any]]:
+    """쿼리 결과 1행 → 컬럼별 메트릭 dict (같은 메트릭끼리 모아서 일괄 변환)"""
+    if len(metric_keys) != len(columns) * len(METRIC_ORDER):
+        metrics: Dict[str, Dict[str, Any]] = {col: {} for col in columns}
+        for (col, metric_name), value in zip(metric_keys, values):
+            metrics[col][metric_name] = shape_metric_value(metric_name, value)
+        return metrics
+    return reshape_metric_row(columns, METRIC_ORDER, values)
+
 
 def compute_metrics(
     csv_path: str,
@@ -142,32 +282,47 @@ def compute_metrics(
     row_start: int = 0,
     row_end: Optional[int] = None,
     dataset_id: Optional[str] = None,  # 캐시를 위한 dataset_id
+    on_connection: Optional[OnConnection] = None,
 ) -> Dict[str, Dict[str, Any]]:
-    """통계 계산 - 한 번의 쿼리로 모든 컬럼 통계 계산 (View 캐싱 지원)"""
-    cache = get_cache()
+    """
+    통계 계산 - 한 번의 쿼리로 모든 컬럼 통계 계산 (View 캐싱 + 공유 cursor 풀)
     
-    # dataset_id가 제공되면 View 캐싱 사용, 아니면 기존 방식 (fallback)
-    use_cache = dataset_id is not None
-    
-    if use_cache:
-        try:
-            # View 캐시 사용
-            view_query = cache.get_view_query(dataset_id, csv_path)
-            conn = cache._get_or_create_connection(dataset_id)
-            print(f"[Stats] Using DuckDB View cache for dataset {dataset_id}: {view_query}")
-            print(f"[Stats] Computing metrics for {len(columns)} columns")
-        except Exception as e:
-            # 캐시 사용 실패 시 기존 방식으로 fallback
-            print(f"Warning: Cache failed for {dataset_id}, using fallback: {e}")
-            use_cache = False
-    
-    if not use_cache:
-        # Fallback: 기존 방식 (캐시 없이)
-        conn = duckdb.connect()
-        csv_path_normalized = str(Path(csv_path).resolve())
-        view_query = f"read_csv_auto('{csv_path_normalized}')"
+    on_connection: 쿼리를 실행하는 동안 cursor를 등록하는 context manager (비동기 작업의 진행률 조회/취소용)
+    취소(conn.interrupt())된 경우 duckdb.InterruptException을 그대로 전달
+    """
+    cache = get_cache()
     
-    try:
+    # View를 빌려서 계산 (View를 만들 수 없으면 캐시 없이 타입 추정하며 CSV 직접 읽기)
+    with leased_view(csv_path, dataset_id, all_varchar=False) as view:
+        logger.debug("[Stats] Computing metrics for %d columns on %s", len(columns), view.query)
+        # 블록 부분 집계가 있으면 블록 병합 + 양 끝 구간 스캔으로 계산 (비용 ∝ 블록 수)
+        # (sidecar 기반 View일 때만 - CSV View에는 __row_id가 없음)
+        block_path = find_block_index(dataset_id, csv_path) if view.row_indexed else None
+        if block_path is not None:
+            try:
+                with cache.cursor(on_connection) as conn:
+                    return compute_range_metrics(
+                        conn, view.query, block_path, columns, row_start, row_end,
+                        numeric_columns=view.numeric_columns,
+                    )
+            except (PoolTimeout, duckdb.InterruptException):
+                raise
+            except Exception as e:
+                logger.warning("Block index failed for %s, scanning rows: %s", dataset_id, e)
+        
+        return _scan_metrics(view, columns, row_start, row_end, on_connection)
+
+
+def _scan_metrics(
+    view: ViewLease,
+    columns: List[str],
+    row_start: int,
+    row_end: Optional[int],
+    on_connection: Optional[OnConnection],
+) -> Dict[str, Dict[str, Any]]:
+    """행 범위를 스캔해서 모든 컬럼 통계를 한 번의 쿼리로 계산"""
+    view_query = view.query
+    with get_cache().cursor(on_connection) as conn:
         # 서브쿼리로 범위 지정
         if row_end is not None:
             limit_count = row_end - row_start
@@ -181,30 +336,7 @@ def compute_metrics(
             OFFSET {row_start}
             """
         
-        # 기본 메트릭 (모든 컬럼에 대해)
-        base_metrics = ["count", "non_null_count", "min", "max"]
-        # 숫자 메트릭 (모든 컬럼에 대해 시도, TRY_CAST로 안전하게 처리)
-        numeric_metrics = ["avg", "stddev"]
-        
-        select_parts = []
-        metric_keys = []  # (col, metric) 매핑
-        
-        for col in columns:
-            col_quoted = quote_ident(col)
-            
-            # 기본 메트릭 (모든 컬럼)
-            for metric_name in base_metrics:
-                alias = f"{col}__{metric_name}"
-                expr = col_quoted
-                select_parts.append(f"{METRICS[metric_name](expr)} AS {quote_ident(alias)}")
-                metric_keys.append((col, metric_name))
-            
-            # 숫자 메트릭 (모든 컬럼에 대해 시도, TRY_CAST로 안전하게 처리)
-            for metric_name in numeric_metrics:
-                alias = f"{col}__{metric_name}"
-                expr = col_quoted
-                select_parts.append(f"{METRICS[metric_name](expr)} AS {quote_ident(alias)}")
-                metric_keys.append((col, metric_name))
+        select_parts, metric_keys = metric_select_parts(columns, view.numeric_columns)
         
         # 한 번의 쿼리로 모든 통계 계산
         if not select_parts:
@@ -214,52 +346,22 @@ def compute_metrics(
         query = f"SELECT {', '.join(select_parts)} FROM ({base_query})"
         
         try:
-            result_row = conn.execute(query).fetchone()
+            with query_span(conn, query):
+                result_row = conn.execute(query).fetchone()
             
             if result_row is None:
                 # 결과가 없으면 빈 메트릭 반환
                 return {col: {"count": 0, "non_null_count": 0} for col in columns}
             
             # 결과를 dict로 reshape
-            metrics: Dict[str, Dict[str, Any]] = {col: {} for col in columns}
-            
-            for (col, metric_name), value in zip(metric_keys, result_row):
-                if value is None:
-                    metrics[col][metric_name] = None
-                elif metric_name == "count":
-                    metrics[col][metric_name] = int(value) if value is not None else 0
-                elif metric_name == "non_null_count":
-                    metrics[col][metric_name] = int(value) if value is not None else 0
-                elif metric_name in ["min", "max"]:
-                    # MIN/MAX는 원본 값 유지 (문자열/숫자 모두 가능)
-                    # 숫자로 변환 가능하면 변환, 아니면 문자열로 유지
-                    try:
-                        # 숫자로 변환 시도
-                        float_val = float(value)
-                        # 정수인지 확인
-                        if float_val.is_integer():
-                            metrics[col][metric_name] = int(float_val)
-                        else:
-                            metrics[col][metric_name] = float_val
-                    except (ValueError, TypeError):
-                        # 숫자 변환 실패 시 문자열로 유지
-                        metrics[col][metric_name] = str(value)
-                elif metric_name in ["avg", "stddev"]:
-                    # 숫자 메트릭 (TRY_CAST로 이미 NULL 처리됨)
-                    try:
-                        metrics[col][metric_name] = float(value) if value is not None else None
-                    except (ValueError, TypeError):
-                        metrics[col][metric_name] = None
-                else:
-                    metrics[col][metric_name] = value
-            
-            return metrics
+            with span("shaping"):
+                return reshape_metrics(columns, metric_keys, result_row)
             
+        except duckdb.InterruptException:
+            raise
         except Exception as e:
-            # 쿼리 실패 시 오류 로깅 및 반환
-            import traceback
-            error_msg = f"{str(e)}\n{traceback.format_exc()}"
-            print(f"통계 계산 오류: {error_msg}")  # 디버깅용
+            # 쿼리 실패 시 오류 로깅 (traceback 포함) 및 반환
+            logger.exception("통계 계산 오류: %s", e)
             
             # 쿼리 실패 시 각 컬럼에 오류 반환
             return {
@@ -270,8 +372,152 @@ def compute_metrics(
                 }
                 for col in columns
             }
-    finally:
-        # 캐시를 사용하지 않은 경우에만 connection 닫기
-        if not use_cache:
-            conn.close()
 
+
+def row_numbered(view_query: str, row_indexed: bool) -> tuple[str, str]:
+    """
+    행 번호가 붙은 소스
+    Returns: (source, row_id) - sidecar는 __row_id, CSV는 읽은 순서대로 번호를 붙임
+    """
+    if row_indexed:
+        return view_query, quote_ident(ROW_ID_COLUMN)
+    return f"(SELECT ROW_NUMBER() OVER () - 1 AS __rn, * FROM {view_query})", "__rn"
+
+
+def compute_grouped_metrics(
+    csv_path: str,
+    columns: List[str],
+    group_keys: List[str],
+    row_start: int = 0,
+    row_end: Optional[int] = None,
+    dataset_id: Optional[str] = None,
+    segmented: bool = False,
+    max_groups: int = STATS_MAX_GROUPS,
+    on_connection: Optional[OnConnection] = None,
+) -> List[Dict[str, Any]]:
+    """
+    그룹별 통계 - compute_metrics와 같은 SELECT 항목을 GROUP BY 한 번으로 계산
+    
+    Args:
+        group_keys: 그룹 기준 컬럼 (예: ["Step ID"])
+        segmented: True면 값이 같아도 연속된 구간마다 별도 그룹 (step 구간)
+            sidecar의 step 구간 인덱스가 있으면 구간 조인, 없으면 윈도 함수로 구간 계산
+        max_groups: 그룹 수 상한 (넘으면 ValueError)
+        on_connection: 쿼리를 실행하는 동안 cursor를 등록하는 context manager (비동기 작업의 진행률 조회/취소용)
+    Returns: 행 순서대로 [{"key": {컬럼: 값}, "row_start", "row_end", "row_count", "metrics"}, ...]
+    """
+    cache = get_cache()
+    with leased_view(csv_path, dataset_id) as view:
+        view_query, row_indexed = view.query, view.row_indexed
+        
+        source, row_id = row_numbered(view_query, row_indexed)
+        where = f"{row_id} >= {row_start}"
+        if row_end is not None:
+            where += f" AND {row_id} < {row_end}"
+        base = f"(SELECT * FROM {source} WHERE {where})"
+        
+        select_parts, metric_keys = metric_select_parts(columns, view.numeric_columns)
+        head = ["COUNT(*) AS __rows", f"MIN({row_id}) AS __row_start", f"MAX({row_id}) + 1 AS __row_end"]
+        key_list = ", ".join(quote_ident(k) for k in group_keys)
+        
+        index_path = find_step_index(dataset_id, csv_path) if segmented and row_indexed else None
+        if index_path is not None and group_keys == step_columns(group_keys):
+            # step 구간 인덱스와 ASOF 조인 - 각 행을 row_start가 가장 가까운 구간에 붙임
+            # (구간 경계를 다시 계산하지 않음, 구간은 빈틈 없이 이어지므로 row_end 조건 불필요)
+            seg_keys = ", ".join(f"s.{key_alias(i)}" for i in range(len(group_keys)))
+            query = f"""
+            SELECT {seg_keys}, {', '.join(head + select_parts)}
+            FROM {base} b
+            ASOF JOIN read_parquet({quote_literal(str(index_path))}) s
+              ON b.{row_id} >= s.row_start
+            GROUP BY s.row_start, {seg_keys}
+            ORDER BY __row_start
+            LIMIT {max_groups + 1}
+            """
+        elif segmented:
+            query = f"""
+            SELECT {key_list}, {', '.join(head + select_parts)}
+            FROM (
+                SELECT *, {row_id} - ROW_NUMBER() OVER (PARTITION BY {key_list} ORDER BY {row_id}) AS __segment
+                FROM {base}
+            )
+            GROUP BY {key_list}, __segment
+            ORDER BY __row_start
+            LIMIT {max_groups + 1}
+            """
+        else:
+            query = f"""
+            SELECT {key_list}, {', '.join(head + select_parts)}
+            FROM {base}
+            GROUP BY {key_list}
+            ORDER BY __row_start
+            LIMIT {max_groups + 1}
+            """
+        
+        with cache.cursor(on_connection) as conn, query_span(conn, query):
+            rows = conn.execute(query).fetchall()
+    if len(rows) > max_groups:
+        raise ValueError(f"Too many groups (more than {max_groups})")
+    
+    n = len(group_keys)
+    groups = []
+    with span("shaping"):
+        for row in rows:
+            groups.append({
+                "key": dict(zip(group_keys, row[:n])),
+                "row_count": int(row[n]),
+                "row_start": int(row[n + 1]),
+                "row_end": int(row[n + 2]),
+                "metrics": reshape_metrics(columns, metric_keys, row[n + 3:]),
+            })
+    return groups
+
+
+def step_segments(csv_path: str, dataset_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    레시피 step 구간 목록 (step 구간 인덱스가 있으면 인덱스에서 읽음)
+    Returns: {"keys": step 컬럼, "segments": [...], "indexed": 인덱스 사용 여부}
+    """
+    with leased_view(csv_path, dataset_id) as view, get_cache().cursor() as conn:
+        columns = [row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {view.query}").fetchall()]
+        keys = step_columns(columns)
+        if not keys:
+            return {"keys": [], "segments": [], "indexed": False}
+        index_path = find_step_index(dataset_id, csv_path) if dataset_id and view.row_indexed else None
+        segments = load_step_segments(conn, view.query, keys, index_path=index_path, row_indexed=view.row_indexed)
+    return {"keys": keys, "segments": segments, "indexed": index_path is not None}
+
+
+def resolve_time_range(
+    csv_path: str,
+    columns: List[str],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    dataset_id: Optional[str] = None,
+) -> Tuple[int, int]:
+    """
+    시간 구간 [start, end) → 그 시각의 행을 모두 포함하는 행 범위 [row_start, row_end)
+    시간 인덱스가 있으면 이진 탐색, 없으면 Date/Time을 파싱하며 한 번 스캔
+    Raises: ValueError (Date 컬럼이 없는 데이터셋)
+    """
+    ts = timestamp_expr(columns)
+    if ts is None:
+        raise ValueError("Dataset has no Date column for time_range")
+    
+    with leased_view(csv_path, dataset_id) as view:
+        index_path = find_time_index(dataset_id, csv_path) if dataset_id and view.row_indexed else None
+        if index_path is not None:
+            return load_time_index(index_path).bounds(start, end)
+        
+        source, row_id = row_numbered(view.query, view.row_indexed)
+        conditions = []
+        if start is not None:
+            conditions.append(f"epoch_us({ts}) >= {to_micros(start)}")
+        if end is not None:
+            conditions.append(f"epoch_us({ts}) < {to_micros(end)}")
+        where = " AND ".join(conditions) or "TRUE"
+        with get_cache().cursor() as conn:
+            row = conn.execute(f"SELECT MIN({row_id}), MAX({row_id}) + 1 FROM {source} WHERE {where}").fetchone()
+    if row is None or row[0] is None:
+        return 0, 0
+    return int(row[0]), int(row[1])
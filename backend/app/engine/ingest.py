@@ -0,0 +1,276 @@
+"""Ingest 단계 - CSV를 한 번 변환해서 쿼리용 저장소를 준비"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import duckdb
+
+from ..core.fileio import remove_stale_temp_files
+from ..core.scanner import record_column_types
+from ..core.settings import INGEST_STOP_TIMEOUT, SIDECAR_DIR, SIDECAR_ENABLED
+from .block_index import build_block_index
+from .sidecar import (
+    OnConnection,
+    build_connection,
+    build_sidecar,
+    infer_column_types,
+    parquet_source,
+    prune_sidecars,
+)
+from .sql import quote_literal
+from .sampling import build_sample
+from .steps import build_step_index
+from .timeindex import build_time_index
+from .stats_index import build_stats_index, prune_stats_index
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestResult:
+    dataset_id: str
+    column_types: Optional[Dict[str, str]] = None
+    sidecar: Optional[str] = None
+    block_index: Optional[str] = None
+    step_index: Optional[str] = None
+    time_index: Optional[str] = None
+    sample: Optional[str] = None
+    stats_index: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _infer_from(source: str, on_connection: Optional[OnConnection] = None) -> Dict[str, str]:
+    """source(FROM 절)에서 타입 카탈로그 추정 (전용 연결)"""
+    with build_connection(on_connection) as conn:
+        return infer_column_types(conn, source)
+
+
+def _record(csv_path: Path, st, column_types: Dict[str, str]):
+    """타입 카탈로그를 레지스트리에 기록 (추정 전 파일 상태 기준 - 그 사이 바뀌었으면 기록 안 함)"""
+    if record_column_types(csv_path.name, st.st_size, st.st_mtime_ns, column_types):
+        logger.info("[Ingest] Recorded column types for %s", csv_path.name)
+
+
+def _ensure_sidecar(
+    dataset_id: str,
+    csv_path: str,
+    force: bool,
+    column_types: Optional[Dict[str, str]],
+    on_connection: Optional[OnConnection] = None,
+) -> tuple[Optional[Path], Optional[Dict[str, str]]]:
+    """
+    sidecar 변환 + 타입 카탈로그 (CSV 파싱은 sidecar를 만들 때 한 번뿐)
+    카탈로그가 없으면 새로 만드는 sidecar의 staged 사본, 이미 최신 sidecar가 있으면 그 sidecar에서 추정
+    """
+    p = Path(csv_path)
+    st = p.stat()
+    inferred: Dict[str, str] = {}
+    path = build_sidecar(
+        dataset_id, csv_path, force=force, column_types=column_types, on_column_types=inferred.update,
+        on_connection=on_connection,
+    )
+    if not column_types and path is not None:
+        column_types = inferred or _infer_from(parquet_source(path), on_connection)
+        _record(p, st, column_types)
+    return path, column_types
+
+
+def _ensure_csv_column_types(csv_path: str, on_connection: Optional[OnConnection] = None) -> Dict[str, str]:
+    """sidecar 없이 CSV View만 쓸 때 타입 카탈로그 추정 (CSV 한 번 파싱)"""
+    p = Path(csv_path)
+    st = p.stat()
+    column_types = _infer_from(
+        f"read_csv({quote_literal(str(p.resolve()))}, header=true, all_varchar=true)", on_connection
+    )
+    _record(p, st, column_types)
+    return column_types
+
+
+def ingest_dataset(
+    dataset_id: str,
+    csv_path: str,
+    columns: Optional[List[str]] = None,
+    force: bool = False,
+    column_types: Optional[Dict[str, str]] = None,
+    on_connection: Optional[OnConnection] = None,
+) -> IngestResult:
+    """
+    데이터셋 하나를 ingest (이미 최신인 단계는 건너뜀)
+    1. Parquet sidecar 변환 (카탈로그 타입으로 저장, 카탈로그가 레지스트리에 없으면 변환하면서 추정)
+       sidecar를 쓰지 않으면 카탈로그만 추정 (CSV View가 카탈로그 타입으로 읽음)
+    2. 블록 단위 부분 집계 (행 범위 통계용)
+    3. 레시피 step 구간 인덱스 (step 컬럼이 있는 경우)
+    4. Date + Time 시간 인덱스 (Date 컬럼이 있는 경우)
+    5. 근사 통계용 균등 표본 (STATS_SAMPLE_FILE_ROWS보다 큰 파일만)
+    6. 전체 파일 통계 인덱스 (columns가 주어진 경우, sidecar 기준으로 계산)
+
+    on_connection: 단계마다 쿼리를 실행하는 연결을 등록하는 context manager (중단 시 interrupt용)
+    """
+    result = IngestResult(dataset_id=dataset_id)
+    try:
+        if SIDECAR_ENABLED:
+            path, column_types = _ensure_sidecar(dataset_id, csv_path, force, column_types, on_connection)
+            result.sidecar = str(path) if path else None
+            path = build_block_index(dataset_id, csv_path, force=force, on_connection=on_connection)
+            result.block_index = str(path) if path else None
+            path = build_step_index(dataset_id, csv_path, force=force, on_connection=on_connection)
+            result.step_index = str(path) if path else None
+            path = build_time_index(dataset_id, csv_path, force=force, on_connection=on_connection)
+            result.time_index = str(path) if path else None
+            path = build_sample(dataset_id, csv_path, force=force, on_connection=on_connection)
+            result.sample = str(path) if path else None
+        elif not column_types:
+            column_types = _ensure_csv_column_types(csv_path, on_connection)
+        result.column_types = column_types
+        if columns:
+            path = build_stats_index(dataset_id, csv_path, columns, force=force, on_connection=on_connection)
+            result.stats_index = str(path) if path else None
+    except duckdb.InterruptException as e:
+        result.error = str(e)
+        logger.info("[Ingest] Interrupted %s", dataset_id)
+    except Exception as e:
+        result.error = str(e)
+        logger.error("[Ingest] Failed for %s: %s", dataset_id, e)
+    return result
+
+
+def ingest_all(
+    metas: Iterable,
+    force: bool = False,
+    on_connection: Optional[OnConnection] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[IngestResult]:
+    """
+    레지스트리의 모든 데이터셋 ingest
+
+    Args:
+        metas: dataset_id, path, columns, column_types 속성을 가진 객체 목록 (DatasetMeta)
+        should_stop: 데이터셋 사이마다 확인, True면 남은 데이터셋은 건너뜀 (서버 종료)
+    """
+    metas = list(metas)
+    # 강제 종료된 이전 실행이 남긴 임시 파일 정리
+    removed = remove_stale_temp_files(SIDECAR_DIR)
+    if removed:
+        logger.info("[Ingest] Removed %d stale temp files", removed)
+    results = []
+    for m in metas:
+        if should_stop is not None and should_stop():
+            logger.info("[Ingest] Stopped with %d of %d datasets done", len(results), len(metas))
+            return results
+        results.append(
+            ingest_dataset(
+                m.dataset_id, m.path, m.columns, force=force, column_types=m.column_types, on_connection=on_connection
+            )
+        )
+    dataset_ids = {m.dataset_id for m in metas}
+    if SIDECAR_ENABLED:
+        prune_sidecars(dataset_ids)
+    prune_stats_index(dataset_ids)
+    return results
+
+
+class _IngestStop:
+    """
+    백그라운드 ingest 중지 요청 + 실행 중인 변환 연결
+    (프로세스가 DuckDB 쿼리 도중에 끝나면 abort되므로 종료 전에 interrupt하고 스레드를 기다림)
+    """
+
+    def __init__(self):
+        self._requested = False
+        self._conns: Set[duckdb.DuckDBPyConnection] = set()
+        self._lock = threading.Lock()
+
+    def is_set(self) -> bool:
+        return self._requested
+
+    def clear(self):
+        with self._lock:
+            self._requested = False
+
+    @contextmanager
+    def attach(self, conn: duckdb.DuckDBPyConnection) -> Iterator[None]:
+        """ingest_dataset의 on_connection - 중지 요청 후에는 새 쿼리를 시작하지 않음"""
+        with self._lock:
+            if self._requested:
+                raise duckdb.InterruptException("Ingest stopped")
+            self._conns.add(conn)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._conns.discard(conn)
+
+    def request(self):
+        """중지 요청 + 실행 중인 쿼리 interrupt"""
+        with self._lock:
+            # 등록 해제(→ 연결 닫기/풀 반납)와 엇갈리지 않게 lock 안에서 interrupt
+            self._requested = True
+            for conn in self._conns:
+                conn.interrupt()
+
+
+_background_thread: Optional[threading.Thread] = None
+_background_lock = threading.Lock()
+_background_stop = _IngestStop()
+# 실행 중에 다시 요청된 ingest 대상 (현재 작업이 끝나면 이어서 실행)
+_pending_metas: Optional[List] = None
+
+
+def _run_background(metas: List):
+    global _pending_metas
+    while metas is not None and not _background_stop.is_set():
+        ingest_all(metas, on_connection=_background_stop.attach, should_stop=_background_stop.is_set)
+        with _background_lock:
+            metas, _pending_metas = _pending_metas, None
+
+
+def start_background_ingest(metas: Iterable) -> bool:
+    """
+    백그라운드 스레드에서 ingest 실행 (서버 시작을 막지 않음)
+
+    ingest가 끝나기 전 요청은 CSV View로 처리되고, 끝나면 자동으로 sidecar로 전환된다.
+    이미 실행 중이면 이번 요청을 예약해 두고 현재 작업이 끝난 뒤 이어서 실행한다.
+    Returns: 새로 시작했으면 True (이미 실행 중이면 False)
+    """
+    global _background_thread, _pending_metas
+    metas = list(metas)
+    with _background_lock:
+        if _background_thread is not None and _background_thread.is_alive():
+            _pending_metas = metas
+            return False
+        _background_stop.clear()
+        _background_thread = threading.Thread(
+            target=_run_background, args=(metas,), name="aldlist-ingest", daemon=True
+        )
+        _background_thread.start()
+        return True
+
+
+def stop_background_ingest(timeout: float = INGEST_STOP_TIMEOUT) -> bool:
+    """
+    백그라운드 ingest 중지 (서버 종료 시) - 남은 데이터셋은 건너뛰고 실행 중인 변환은 interrupt
+    만들던 임시 파일은 변환 함수가 정리하고, 정리되지 못한 파일은 다음 ingest 시작 시 삭제된다.
+    Returns: 스레드가 끝났으면 True (timeout 안에 끝나지 않으면 False)
+    """
+    global _pending_metas
+    with _background_lock:
+        thread = _background_thread
+        _pending_metas = None
+    if thread is None or not thread.is_alive():
+        return True
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and time.monotonic() < deadline:
+        # interrupt와 다음 쿼리 시작이 엇갈릴 수 있으므로 끝날 때까지 반복
+        _background_stop.request()
+        thread.join(0.1)
+    if thread.is_alive():
+        logger.warning("[Ingest] Background ingest did not stop within %.0fs", timeout)
+        return False
+    logger.info("[Ingest] Background ingest stopped")
+    return True
@@ -0,0 +1,193 @@
+"""비동기 통계 작업 - 제한된 스레드 풀에서 실행하고 진행률 조회/취소 지원
+
+POST로 작업을 만들면 바로 job_id를 돌려주고, 계산은 STATS_JOB_WORKERS개 스레드에서 실행된다.
+쿼리를 실행하는 동안만 작업에 DuckDB cursor를 등록해 두었다가
+- 진행률: cursor.query_progress()
+- 취소: cursor.interrupt() (DuckDB가 쿼리를 중단하고 cursor는 풀로 반납됨)
+에 사용한다. 등록은 cursor가 풀로 반납되기 전에 해제되므로 다른 요청의 쿼리를 건드리지 않고,
+진행률 설정도 그때 원래 값으로 되돌린다. 끝난 작업은 STATS_JOB_TTL초 동안 결과를 보관한다.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import duckdb
+
+from ..core.settings import STATS_JOB_TTL, STATS_JOB_WORKERS
+from .duckdb_cache import OnConnection
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class StatsJob:
+    job_id: str
+    dataset_id: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    # 실행 중인 쿼리의 cursor (진행률/취소용)
+    _conn: Optional[duckdb.DuckDBPyConnection] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @contextmanager
+    def attach(self, conn: duckdb.DuckDBPyConnection) -> Iterator[None]:
+        """
+        compute_metrics 등의 on_connection - with 블록 동안 쿼리를 실행할 cursor 등록
+        (cursor를 풀에 반납하기 전에 등록 해제 + 진행률 설정 복원)
+        """
+        # query_progress()는 progress bar 설정이 켜져 있어야 값을 돌려줌 (출력은 끔)
+        previous = conn.execute(
+            "SELECT current_setting('enable_progress_bar'), current_setting('enable_progress_bar_print')"
+        ).fetchone()
+        conn.execute("SET enable_progress_bar = true")
+        conn.execute("SET enable_progress_bar_print = false")
+        try:
+            with self._lock:
+                self._conn = conn
+                cancelled = self.cancel_requested
+            if cancelled:
+                raise duckdb.InterruptException("Cancelled before start")
+            yield
+        finally:
+            with self._lock:
+                self._conn = None
+            try:
+                conn.execute(f"SET enable_progress_bar = {'true' if previous[0] else 'false'}")
+                conn.execute(f"SET enable_progress_bar_print = {'true' if previous[1] else 'false'}")
+            except Exception as e:
+                logger.warning("[Stats Job] Failed to restore cursor settings: %s", e)
+
+    def progress(self) -> Optional[float]:
+        """진행률 (0~100), 알 수 없으면 None"""
+        if self.status == DONE:
+            return 100.0
+        with self._lock:
+            conn = self._conn
+            if conn is None or self.status != RUNNING:
+                return None
+            try:
+                value = conn.query_progress()
+            except Exception:
+                return None
+        return value if value >= 0 else None
+
+    def cancel(self) -> bool:
+        """
+        작업 취소 요청
+        Returns: 취소 요청이 받아들여졌으면 True (이미 끝난 작업이면 False)
+        """
+        with self._lock:
+            if self.status in FINISHED_STATES:
+                return False
+            self.cancel_requested = True
+            if self._conn is not None:
+                self._conn.interrupt()
+        return True
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "dataset_id": self.dataset_id,
+            "status": self.status,
+            "progress": self.progress(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_result:
+            out["result"] = self.result
+        return out
+
+
+class JobManager:
+    """통계 작업 실행기 (제한된 스레드 풀 + 작업 목록)"""
+
+    def __init__(self, workers: int = STATS_JOB_WORKERS, ttl: float = STATS_JOB_TTL):
+        self._workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="aldlist-stats-job")
+        self._ttl = ttl
+        self._jobs: Dict[str, StatsJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        dataset_id: str,
+        fn: Callable[[OnConnection], Dict[str, Any]],
+    ) -> StatsJob:
+        """
+        작업 등록
+        fn: on_connection(StatsJob.attach)을 받아 결과(dict)를 돌려주는 함수
+        """
+        self._cleanup()
+        job = StatsJob(job_id=uuid.uuid4().hex, dataset_id=dataset_id)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: StatsJob, fn: Callable):
+        if job.cancel_requested:
+            job.finished_at = time.time()
+            job.status = CANCELLED
+            return
+        job.started_at = time.time()
+        job.status = RUNNING
+        result, error, status = None, None, DONE
+        try:
+            result = fn(job.attach)
+        except duckdb.InterruptException:
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, str(e)
+            logger.warning("[Stats Job] %s failed: %s", job.job_id, e)
+        if job.cancel_requested:
+            status, result = CANCELLED, None
+            logger.info("[Stats Job] %s cancelled", job.job_id)
+        # status는 마지막에 바꿔서 조회하는 쪽이 완료 상태에서 항상 result/finished_at을 보게 함
+        job.result, job.error, job.finished_at = result, error, time.time()
+        job.status = status
+
+    def get(self, job_id: str) -> Optional[StatsJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _cleanup(self):
+        """보관 시간이 지난 완료 작업 삭제"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > self._ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+# 전역 작업 관리자 (싱글톤 패턴)
+_job_manager = JobManager()
+
+
+def get_job_manager() -> JobManager:
+    """전역 작업 관리자 반환"""
+    return _job_manager
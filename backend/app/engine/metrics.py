@@ -0,0 +1,530 @@
+"""확장 메트릭 엔진 - 메트릭마다 SQL 집계, 결과 타입, 병합 가능한 부분 상태를 선언
+
+메트릭(MetricSpec)은 부분 상태(StateSpec)에서 최종 값을 계산한다.
+부분 상태는 행 집합마다 SQL 집계로 만들고 순서와 무관하게 합칠 수 있으므로,
+sidecar 기반 데이터셋은 STATS_BLOCK_SIZE 행 블록별 상태를 메모리에 캐시해 두고
+행 범위 요청은 범위에 완전히 포함된 블록 상태를 합치고 양 끝 구간만 스캔한다 (블록 인덱스와 같은 방식).
+
+    상태        SQL 집계                                  병합
+    moments     블록 인덱스 부분 집계 (compute_metrics)    PartialState.merge (block_index)
+    quantiles   approx_quantile(x, 0%~100% 101개 지점)      개수 가중 CDF를 합친 뒤 다시 101개 지점으로
+    histogram   histogram(구간 번호)                        구간별 개수 합
+    distinct    min(DISTINCT hash(x), K) (KMV 스케치)       합집합의 K개 최솟값
+    first/last  arg_min/arg_max(x, 행 번호)                 행 번호가 작은/큰 쪽
+
+- histogram 구간은 컬럼 전체 파일의 숫자 [min, max]를 METRIC_HISTOGRAM_BINS개로 나눈 것
+  (범위가 달라도 구간이 같으므로 step/시간 구간끼리 분포를 바로 비교할 수 있음)
+- distinct_count는 고유값이 K개 미만이면 정확, 그 이상이면 KMV 추정 (상대 오차 ≈ 1/√K)
+- first/last는 범위 안 첫/마지막 NULL이 아닌 값
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+
+from ..core.profiling import query_span, span
+from ..core.settings import (
+    METRIC_DISTINCT_SKETCH_SIZE,
+    METRIC_HISTOGRAM_BINS,
+    METRIC_STATE_CACHE_BYTES,
+    STATS_BLOCK_SIZE,
+)
+from .duckdb_cache import OnConnection, get_cache
+from .duckdb_engine import METRIC_ORDER, leased_view, row_numbered
+from .shaping import shape_metric_value
+from .sidecar import file_fingerprint
+from .sql import quote_ident
+
+logger = logging.getLogger(__name__)
+
+# compute_metrics(블록 인덱스 / 통계 인덱스)로 계산하는 기본 메트릭의 상태
+MOMENTS = "moments"
+# 분위수 스케치 지점 (0%, 1%, ..., 100%)
+QUANTILE_GRID = np.linspace(0.0, 1.0, 101)
+_QUANTILE_GRID_SQL = "[" + ", ".join(f"{q:.2f}" for q in QUANTILE_GRID) + "]"
+
+Bounds = Optional[Tuple[float, float]]
+
+
+@dataclass
+class QuantileSketch:
+    """분위수 스케치: QUANTILE_GRID 지점의 값 + 값 개수"""
+    points: np.ndarray  # float64 (오름차순)
+    count: int
+
+    def quantile(self, q: float) -> float:
+        return float(np.interp(q, QUANTILE_GRID, self.points))
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """x 이하 값의 비율 (같은 값이 여러 지점이면 가장 큰 비율)"""
+        values = np.unique(self.points)
+        ranks = QUANTILE_GRID[np.searchsorted(self.points, values, side="right") - 1]
+        return np.interp(x, values, ranks, left=0.0, right=1.0)
+
+
+@dataclass
+class HistogramState:
+    """[lo, hi]를 counts 길이만큼 같은 폭으로 나눈 구간별 개수"""
+    lo: float
+    hi: float
+    counts: np.ndarray  # int64
+
+
+@dataclass
+class DistinctSketch:
+    """KMV 스케치: 값 hash 중 가장 작은 K개 (고유값이 K개 미만이면 전부)"""
+    hashes: np.ndarray  # uint64 (오름차순, 중복 없음)
+
+
+@dataclass(frozen=True)
+class StateSpec:
+    """병합 가능한 부분 상태 - 행 집합마다 SQL 집계로 만들고 combine으로 합침"""
+    name: str
+    # (컬럼 식, 숫자 식, 행 번호 식, histogram 구간) → SELECT 항목
+    select: Callable[[str, str, str, Bounds], List[str]]
+    # SELECT 결과 값 → 상태 (행이 없거나 값이 없으면 None)
+    parse: Callable[[Sequence[Any], Bounds], Any]
+    # 여러 부분 상태(None 제외) → 하나의 상태 (순서 무관)
+    combine: Callable[[List[Any]], Any]
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    """메트릭 선언 - 어떤 부분 상태에서 어떤 타입의 값을 계산하는지"""
+    name: str
+    state: str  # STATE_SPECS 이름 (MOMENTS면 compute_metrics 결과를 그대로 사용)
+    result: str  # "int" | "number" | "value"(숫자 또는 문자열) | "histogram"
+    finalize: Optional[Callable[[Any], Any]] = None  # 합친 상태 → 응답 값
+
+
+def _parse_quantiles(values: Sequence[Any], bounds: Bounds) -> Optional[QuantileSketch]:
+    points, count = values
+    if not count or points is None:
+        return None
+    return QuantileSketch(points=np.asarray(points, dtype=np.float64), count=int(count))
+
+
+def _combine_quantiles(states: List[QuantileSketch]) -> QuantileSketch:
+    if len(states) == 1:
+        return states[0]
+    total = sum(s.count for s in states)
+    xs = np.unique(np.concatenate([s.points for s in states]))
+    cdf = sum(s.count * s.cdf(xs) for s in states) / total
+    return QuantileSketch(points=np.interp(QUANTILE_GRID, cdf, xs), count=total)
+
+
+def _histogram_select(col: str, num: str, row_id: str, bounds: Bounds) -> List[str]:
+    if bounds is None:
+        return ["NULL"]
+    lo, hi = bounds
+    if hi <= lo:
+        return [f"histogram(CASE WHEN isfinite({num}) THEN 0 END)"]
+    width = (hi - lo) / METRIC_HISTOGRAM_BINS
+    bin_expr = f"LEAST(GREATEST(CAST(FLOOR(({num} - {lo!r}) / {width!r}) AS BIGINT), 0), {METRIC_HISTOGRAM_BINS - 1})"
+    return [f"histogram(CASE WHEN isfinite({num}) THEN {bin_expr} END)"]
+
+
+def _parse_histogram(values: Sequence[Any], bounds: Bounds) -> Optional[HistogramState]:
+    (bins,) = values
+    if not bins or bounds is None:
+        return None
+    counts = np.zeros(METRIC_HISTOGRAM_BINS, dtype=np.int64)
+    counts[np.fromiter(bins.keys(), dtype=np.int64)] = np.fromiter(bins.values(), dtype=np.int64)
+    return HistogramState(lo=bounds[0], hi=bounds[1], counts=counts)
+
+
+def _combine_histograms(states: List[HistogramState]) -> HistogramState:
+    return HistogramState(lo=states[0].lo, hi=states[0].hi, counts=np.sum([s.counts for s in states], axis=0))
+
+
+def _finalize_histogram(state: HistogramState) -> Dict[str, List]:
+    if state.hi <= state.lo:
+        return {"edges": [state.lo, state.hi], "counts": [int(state.counts.sum())]}
+    edges = np.linspace(state.lo, state.hi, len(state.counts) + 1)
+    return {"edges": edges.tolist(), "counts": state.counts.tolist()}
+
+
+def _parse_distinct(values: Sequence[Any], bounds: Bounds) -> Optional[DistinctSketch]:
+    (hashes,) = values
+    if hashes is None or len(hashes) == 0:
+        return None
+    return DistinctSketch(hashes=np.unique(np.asarray(hashes, dtype=np.uint64)))
+
+
+def _combine_distinct(states: List[DistinctSketch]) -> DistinctSketch:
+    merged = np.unique(np.concatenate([s.hashes for s in states]))
+    return DistinctSketch(hashes=merged[:METRIC_DISTINCT_SKETCH_SIZE])
+
+
+def _finalize_distinct(state: DistinctSketch) -> int:
+    k = METRIC_DISTINCT_SKETCH_SIZE
+    if len(state.hashes) < k:
+        return len(state.hashes)
+    # K번째로 작은 hash가 [0, 1) 중 어디인지로 전체 고유값 수 추정
+    kth = float(state.hashes[k - 1]) / 2.0 ** 64
+    return int(round((k - 1) / kth)) if kth > 0 else k
+
+
+def _edge_select(pick: str) -> Callable[[str, str, str, Bounds], List[str]]:
+    """first(pick="min") / last(pick="max") - NULL이 아닌 값 중 행 번호가 가장 작은/큰 값"""
+    def select(col: str, num: str, row_id: str, bounds: Bounds) -> List[str]:
+        where = f"FILTER (WHERE {col} IS NOT NULL)"
+        return [f"{pick.upper()}({row_id}) {where}", f"arg_{pick}({col}, {row_id}) {where}"]
+    return select
+
+
+def _parse_edge(values: Sequence[Any], bounds: Bounds) -> Optional[Tuple[int, Any]]:
+    row, value = values
+    return None if row is None else (int(row), value)
+
+
+# 부분 상태 레지스트리: 확장 포인트
+STATE_SPECS: Dict[str, StateSpec] = {
+    "quantiles": StateSpec(
+        name="quantiles",
+        select=lambda col, num, row_id, bounds: [
+            f"approx_quantile({num}, {_QUANTILE_GRID_SQL})",
+            f"COUNT({num})",
+        ],
+        parse=_parse_quantiles,
+        combine=_combine_quantiles,
+    ),
+    "histogram": StateSpec(
+        name="histogram",
+        select=_histogram_select,
+        parse=_parse_histogram,
+        combine=_combine_histograms,
+    ),
+    "distinct": StateSpec(
+        name="distinct",
+        select=lambda col, num, row_id, bounds: [
+            f"min(DISTINCT hash({col}), {METRIC_DISTINCT_SKETCH_SIZE}) FILTER (WHERE {col} IS NOT NULL)"
+        ],
+        parse=_parse_distinct,
+        combine=_combine_distinct,
+    ),
+    "first": StateSpec(
+        name="first",
+        select=_edge_select("min"),
+        parse=_parse_edge,
+        combine=lambda states: min(states, key=lambda s: s[0]),
+    ),
+    "last": StateSpec(
+        name="last",
+        select=_edge_select("max"),
+        parse=_parse_edge,
+        combine=lambda states: max(states, key=lambda s: s[0]),
+    ),
+}
+
+# 메트릭 레지스트리: 확장 포인트 (StatsRequest.metrics에서 이름으로 선택)
+METRIC_SPECS: Dict[str, MetricSpec] = {
+    "count": MetricSpec("count", MOMENTS, "int"),
+    "non_null_count": MetricSpec("non_null_count", MOMENTS, "int"),
+    "min": MetricSpec("min", MOMENTS, "value"),
+    "max": MetricSpec("max", MOMENTS, "value"),
+    "avg": MetricSpec("avg", MOMENTS, "number"),
+    "stddev": MetricSpec("stddev", MOMENTS, "number"),
+    "p50": MetricSpec("p50", "quantiles", "number", lambda s: s.quantile(0.50)),
+    "p95": MetricSpec("p95", "quantiles", "number", lambda s: s.quantile(0.95)),
+    "p99": MetricSpec("p99", "quantiles", "number", lambda s: s.quantile(0.99)),
+    "histogram": MetricSpec("histogram", "histogram", "histogram", _finalize_histogram),
+    "distinct_count": MetricSpec("distinct_count", "distinct", "int", _finalize_distinct),
+    "first": MetricSpec("first", "first", "value", lambda s: shape_metric_value("min", s[1])),
+    "last": MetricSpec("last", "last", "value", lambda s: shape_metric_value("max", s[1])),
+}
+
+# metrics를 지정하지 않은 요청의 메트릭 (compute_metrics와 같은 6개)
+DEFAULT_METRICS = METRIC_ORDER
+
+
+def split_metrics(names: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """
+    요청 메트릭을 (기본 메트릭, 부분 상태 메트릭)으로 나누기
+    Raises: ValueError (등록되지 않은 메트릭)
+    """
+    unknown = [n for n in names if n not in METRIC_SPECS]
+    if unknown:
+        raise ValueError(f"Unsupported metrics: {unknown} (available: {list(METRIC_SPECS)})")
+    names = list(dict.fromkeys(names))
+    base = [n for n in names if METRIC_SPECS[n].state == MOMENTS]
+    extra = [n for n in names if METRIC_SPECS[n].state != MOMENTS]
+    return base, extra
+
+
+def _state_nbytes(state: Any) -> int:
+    """캐시 용량 계산용 상태 크기 (대략)"""
+    size = 64
+    for value in getattr(state, "__dict__", {}).values():
+        if isinstance(value, np.ndarray):
+            size += value.nbytes
+    return size
+
+
+class MetricStateCache:
+    """블록별 부분 상태 캐시 (LRU, key에 CSV fingerprint 포함, 상태 크기 합계로 제한)"""
+
+    def __init__(self, max_bytes: int = METRIC_STATE_CACHE_BYTES):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (상태 또는 None, 크기)
+        self._states: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """캐시된 상태 (값이 없는 블록의 None 상태도 포함)"""
+        with self._lock:
+            found = {}
+            for key in keys:
+                entry = self._states.get(key)
+                if entry is not None:
+                    self._states.move_to_end(key)
+                    found[key] = entry[0]
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+            return found
+
+    def put_many(self, states: Dict[Hashable, Any]):
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, state in states.items():
+                old = self._states.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[1]
+                size = _state_nbytes(state)
+                self._states[key] = (state, size)
+                self._bytes += size
+            while self._bytes > self._max_bytes and self._states:
+                _, (_, size) = self._states.popitem(last=False)
+                self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "states": len(self._states),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# 전역 인스턴스 (싱글톤 패턴)
+_state_cache = MetricStateCache()
+
+
+def get_state_cache() -> MetricStateCache:
+    """전역 부분 상태 캐시 반환"""
+    return _state_cache
+
+
+def _numeric_expr(col: str, numeric_columns: FrozenSet[str]) -> str:
+    """숫자 값 식 (숫자 타입 컬럼은 변환 생략)"""
+    if col in numeric_columns:
+        return quote_ident(col)
+    return f"TRY_CAST({quote_ident(col)} AS DOUBLE)"
+
+
+class _StatePlan:
+    """요청 (상태 × 컬럼)의 SELECT 항목과 결과 해석"""
+
+    def __init__(
+        self,
+        state_names: List[str],
+        columns: List[str],
+        numeric_columns: FrozenSet[str],
+        row_id: str,
+        bounds: Dict[str, Bounds],
+    ):
+        self.keys: List[Tuple[str, str]] = []
+        self.parts: List[str] = []
+        self._layout: List[Tuple[Tuple[str, str], int, int]] = []
+        self._bounds = bounds
+        for state in state_names:
+            spec = STATE_SPECS[state]
+            for col in columns:
+                parts = spec.select(quote_ident(col), _numeric_expr(col, numeric_columns), row_id, bounds.get(col))
+                self._layout.append(((state, col), len(self.parts), len(parts)))
+                self.keys.append((state, col))
+                self.parts.extend(parts)
+
+    def parse(self, values: Sequence[Any]) -> Dict[Tuple[str, str], Any]:
+        """SELECT 결과 1행 → (상태, 컬럼) -> 상태"""
+        states = {}
+        for key, offset, width in self._layout:
+            state, col = key
+            states[key] = STATE_SPECS[state].parse(values[offset: offset + width], self._bounds.get(col))
+        return states
+
+
+def _column_bounds(
+    conn: duckdb.DuckDBPyConnection,
+    view_query: str,
+    columns: List[str],
+    numeric_columns: FrozenSet[str],
+    owner: str,
+    fingerprint: Optional[str],
+) -> Dict[str, Bounds]:
+    """histogram 구간용 컬럼 전체 파일의 숫자 [min, max] (CSV 버전마다 캐시)"""
+    keys = {col: (owner, fingerprint, "__bounds", col) for col in columns}
+    cached = _state_cache.get_many(list(keys.values())) if fingerprint else {}
+    missing = [col for col in columns if keys[col] not in cached]
+    if missing:
+        parts = []
+        for col in missing:
+            num = _numeric_expr(col, numeric_columns)
+            parts += [f"MIN({num}) FILTER (WHERE isfinite({num}))", f"MAX({num}) FILTER (WHERE isfinite({num}))"]
+        row = conn.execute(f"SELECT {', '.join(parts)} FROM {view_query}").fetchone()
+        fresh = {}
+        for i, col in enumerate(missing):
+            lo, hi = row[i * 2], row[i * 2 + 1]
+            fresh[keys[col]] = None if lo is None else (float(lo), float(hi))
+        if fingerprint:
+            _state_cache.put_many(fresh)
+        cached.update(fresh)
+    return {col: cached[keys[col]] for col in columns}
+
+
+def _blocked_states(
+    conn: duckdb.DuckDBPyConnection,
+    source: str,
+    row_id: str,
+    plan: _StatePlan,
+    owner: str,
+    fingerprint: str,
+    row_start: int,
+    row_end: int,
+) -> Dict[Tuple[str, str], List[Any]]:
+    """범위에 완전히 포함된 블록은 캐시된 상태 (없는 블록만 한 번에 계산), 양 끝은 직접 스캔"""
+    size = STATS_BLOCK_SIZE
+    first_block = -(-row_start // size)  # 범위에 완전히 포함된 첫 블록
+    end_block = row_end // size  # 범위에 완전히 포함된 마지막 블록 + 1
+    parts: Dict[Tuple[str, str], List[Any]] = {key: [] for key in plan.keys}
+
+    if first_block < end_block:
+        edges = [(row_start, first_block * size), (end_block * size, row_end)]
+        cache_keys = {
+            (key, block): (owner, fingerprint, key[0], key[1], block)
+            for key in plan.keys
+            for block in range(first_block, end_block)
+        }
+        cached = _state_cache.get_many(list(cache_keys.values()))
+        missing = sorted({block for (key, block), ck in cache_keys.items() if ck not in cached})
+        if missing:
+            lo, hi = missing[0] * size, (missing[-1] + 1) * size
+            query = (
+                f"SELECT {row_id} // {size} AS __block, {', '.join(plan.parts)} FROM {source} "
+                f"WHERE {row_id} >= {lo} AND {row_id} < {hi} GROUP BY __block"
+            )
+            with query_span(conn, query):
+                rows = conn.execute(query).fetchall()
+            fresh = {}
+            for row in rows:
+                block = int(row[0])
+                for key, state in plan.parse(row[1:]).items():
+                    fresh[(owner, fingerprint, key[0], key[1], block)] = state
+            _state_cache.put_many(fresh)
+            cached.update(fresh)
+        for (key, block), ck in cache_keys.items():
+            state = cached.get(ck)
+            if state is not None:
+                parts[key].append(state)
+    else:
+        # 블록 하나도 온전히 포함되지 않는 짧은 범위는 그냥 스캔
+        edges = [(row_start, row_end)]
+
+    edges = [(lo, hi) for lo, hi in edges if lo < hi]
+    if edges:
+        where = " OR ".join(f"({row_id} >= {lo} AND {row_id} < {hi})" for lo, hi in edges)
+        query = f"SELECT {', '.join(plan.parts)} FROM {source} WHERE {where}"
+        with query_span(conn, query):
+            row = conn.execute(query).fetchone()
+        for key, state in plan.parse(row).items():
+            if state is not None:
+                parts[key].append(state)
+    return parts
+
+
+def compute_state_metrics(
+    csv_path: str,
+    columns: List[str],
+    metric_names: Sequence[str],
+    row_start: int = 0,
+    row_end: Optional[int] = None,
+    dataset_id: Optional[str] = None,
+    on_connection: Optional[OnConnection] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    부분 상태 메트릭 계산 (기본 메트릭은 compute_metrics로 계산)
+
+    sidecar 기반 View면 블록별 상태 캐시를 사용하고, CSV View면 범위를 한 번 스캔한다.
+    Args:
+        metric_names: METRIC_SPECS 이름 (MOMENTS 메트릭은 무시)
+        on_connection: 쿼리를 실행하는 동안 cursor를 등록하는 context manager (비동기 작업의 진행률 조회/취소용)
+    Returns: 컬럼 -> {메트릭: 값} (값이 없으면 None)
+    """
+    specs = [METRIC_SPECS[n] for n in metric_names if METRIC_SPECS[n].state != MOMENTS]
+    state_names = list(dict.fromkeys(spec.state for spec in specs))
+    if not state_names or not columns:
+        return {col: {} for col in columns}
+
+    cache = get_cache()
+    with leased_view(csv_path, dataset_id) as view:
+        view_query, row_indexed = view.query, view.row_indexed
+        source, row_id = row_numbered(view_query, row_indexed)
+        numeric_columns = view.numeric_columns
+        fingerprint = file_fingerprint(csv_path)
+        owner = dataset_id or csv_path
+
+        with cache.cursor(on_connection) as conn:
+            total_rows = conn.execute(f"SELECT COUNT(*) FROM {view_query}").fetchone()[0]
+            row_end = total_rows if row_end is None else min(row_end, total_rows)
+            row_start = min(row_start, row_end)
+
+            bounds: Dict[str, Bounds] = {}
+            if "histogram" in state_names:
+                bounds = _column_bounds(conn, view_query, columns, numeric_columns, owner, fingerprint)
+            plan = _StatePlan(state_names, columns, numeric_columns, row_id, bounds)
+
+            if row_indexed and fingerprint and _state_cache.enabled:
+                parts = _blocked_states(conn, source, row_id, plan, owner, fingerprint, row_start, row_end)
+            else:
+                query = (
+                    f"SELECT {', '.join(plan.parts)} FROM {source} "
+                    f"WHERE {row_id} >= {row_start} AND {row_id} < {row_end}"
+                )
+                with query_span(conn, query):
+                    row = conn.execute(query).fetchone()
+                parts = {key: [state] for key, state in plan.parse(row).items() if state is not None}
+
+    logger.debug(
+        "[Metrics] %s for %d columns, rows [%d, %d)",
+        ", ".join(spec.name for spec in specs), len(columns), row_start, row_end,
+    )
+    with span("shaping"):
+        merged = {key: STATE_SPECS[key[0]].combine(states) for key, states in parts.items() if states}
+        return {
+            col: {
+                spec.name: (spec.finalize(merged[(spec.state, col)]) if (spec.state, col) in merged else None)
+                for spec in specs
+            }
+            for col in columns
+        }
@@ -0,0 +1,251 @@
+"""여러 데이터셋을 한 번에 읽는 multi-file 소스
+
+데이터셋마다 View를 만들어 따로 스캔하는 대신, 같은 종류의 파일을 하나의
+`read_parquet([...])` / `read_csv([...])`로 묶어서 DuckDB가 파일들을 병렬로 스캔하게 한다.
+`filename=true`로 각 행이 어느 파일에서 왔는지 알 수 있고, `union_by_name=true`로
+컬럼 구성이 다른 파일도 이름 기준으로 합친다 (없는 컬럼은 NULL).
+
+- sidecar가 있는 데이터셋은 Parquet 소스, 없는 데이터셋은 CSV 소스로 나뉜다.
+- 소스 종류마다 컬럼 타입이 다를 수 있으므로 (Parquet은 숫자 타입, CSV는 문자열) 따로 집계한다.
+- CSV는 데이터셋 View와 같이 all_varchar로 읽고, 멤버 타입 카탈로그가 모두 숫자인 컬럼만 TRY_CAST해서
+  단일 데이터셋 통계와 결과가 같다.
+
+가상 데이터셋(union_relation)은 소스별 SELECT를 `UNION ALL BY NAME`으로 이어 붙여 하나의 테이블로 만든다.
+모든 행에 `source_dataset` 컬럼이 붙고, 소스에 없는 컬럼은 `NULL AS col`로 채운다.
+Parquet과 CSV 멤버가 섞일 때 한쪽이 문자열인 컬럼은 공통 타입인 VARCHAR가 된다 (통계는 TRY_CAST로 계산).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.profiling import query_span
+from ..core.registry import get_registry
+from ..core.settings import SIDECAR_ENABLED
+from .duckdb_cache import get_cache
+from .duckdb_engine import METRICS, fetch_preview, metric_select_parts, reshape_metrics
+from .shaping import shape_metric_value
+from .sidecar import STORAGE_TYPES, find_sidecar, is_numeric_type, replace_clause
+from .sql import quote_ident, quote_literal
+
+# 가상 데이터셋 행이 어느 데이터셋에서 왔는지 (dataset_id)
+SOURCE_DATASET_COLUMN = "source_dataset"
+
+
+@dataclass
+class MultiSource:
+    """같은 종류(parquet/csv) 파일 묶음"""
+    kind: str  # "parquet" | "csv"
+    # 파일 경로 -> dataset_id (DuckDB filename 컬럼 값과 같은 문자열)
+    paths: Dict[str, str] = field(default_factory=dict)
+    # CSV 소스에서 숫자 타입으로 읽을 컬럼 (멤버 타입 카탈로그를 합친 것)
+    column_types: Dict[str, str] = field(default_factory=dict)
+
+    def from_clause(self) -> str:
+        """filename 컬럼이 포함된 multi-file FROM 절"""
+        files = "[" + ", ".join(quote_literal(p) for p in self.paths) + "]"
+        if self.kind == "parquet":
+            return f"read_parquet({files}, filename=true, union_by_name=true)"
+        source = f"read_csv({files}, filename=true, union_by_name=true, header=true, all_varchar=true)"
+        replace = replace_clause(self.column_types, strict=False)
+        return f"(SELECT * {replace} FROM {source})" if replace else source
+
+    def dataset_expr(self) -> str:
+        """filename → dataset_id 식 (파일이 하나면 상수)"""
+        if len(self.paths) == 1:
+            return quote_literal(next(iter(self.paths.values())))
+        cases = " ".join(f"WHEN {quote_literal(p)} THEN {quote_literal(d)}" for p, d in self.paths.items())
+        return f"CASE filename {cases} END"
+
+
+def group_sources(members: Sequence[Tuple[str, str]]) -> List[MultiSource]:
+    """
+    (dataset_id, csv_path) 목록을 소스 종류별로 묶기
+    최신 sidecar가 있으면 Parquet, 없으면 CSV
+    """
+    parquet = MultiSource(kind="parquet")
+    csv = MultiSource(kind="csv")
+    for dataset_id, csv_path in members:
+        sidecar = find_sidecar(dataset_id, csv_path) if SIDECAR_ENABLED else None
+        if sidecar is not None:
+            parquet.paths[str(sidecar)] = dataset_id
+        else:
+            csv.paths[str(Path(csv_path).resolve())] = dataset_id
+    csv.column_types = _merged_column_types(csv.paths.values())
+    return [s for s in (parquet, csv) if s.paths]
+
+
+def _merged_column_types(dataset_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    CSV 멤버 타입 카탈로그 합치기 - 컬럼이 있는 모든 멤버가 숫자로 추정한 컬럼만 (int와 double이 섞이면 double)
+    카탈로그를 모르는 멤버가 있으면 모든 컬럼을 문자열 그대로 읽음
+    """
+    registry = get_registry()
+    merged: Dict[str, str] = {}
+    text_columns = set()
+    for dataset_id in dataset_ids:
+        meta = registry.get(dataset_id)
+        if meta is None or not meta.column_types:
+            return {}
+        for col in meta.columns:
+            type_name = meta.column_types.get(col)
+            if type_name not in STORAGE_TYPES or col in text_columns:
+                text_columns.add(col)
+                merged.pop(col, None)
+            else:
+                merged[col] = type_name if merged.get(col, type_name) == type_name else "double"
+    return merged
+
+
+def _grouped_metrics_query(source: MultiSource, columns: List[str]) -> str:
+    """파일별 GROUP BY로 모든 컬럼 메트릭을 한 번에 계산하는 쿼리"""
+    select_parts = ["filename", f"{METRICS['count']('*')} AS __count"]
+    for i, col in enumerate(columns):
+        col_quoted = quote_ident(col)
+        for metric_name in ("non_null_count", "min", "max", "avg", "stddev"):
+            select_parts.append(f"{METRICS[metric_name](col_quoted)} AS {quote_ident(f'{i}__{metric_name}')}")
+    return f"SELECT {', '.join(select_parts)} FROM {source.from_clause()} GROUP BY filename"
+
+
+def compute_batch_metrics(
+    members: Sequence[Tuple[str, str]],
+    columns_by_dataset: Dict[str, List[str]],
+    columns: List[str],
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    여러 데이터셋의 전체 파일 통계를 소스 종류마다 한 번의 쿼리로 계산
+
+    Args:
+        members: (dataset_id, csv_path) 목록
+        columns_by_dataset: 데이터셋별 실제 컬럼 (없는 컬럼은 결과에서 제외)
+        columns: 요청 컬럼
+    Returns: dataset_id -> 컬럼 -> 메트릭 (compute_metrics와 같은 형식)
+    """
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {dataset_id: {} for dataset_id, _ in members}
+    cache = get_cache()
+
+    for source in group_sources(members):
+        # 이 소스의 파일 중 하나라도 가진 컬럼만 조회 (union_by_name이라도 전부 없으면 바인딩 오류)
+        present = {c for dataset_id in source.paths.values() for c in columns_by_dataset.get(dataset_id, [])}
+        source_columns = [c for c in columns if c in present]
+        if not source_columns:
+            continue
+
+        query = _grouped_metrics_query(source, source_columns)
+        with cache.cursor() as conn, query_span(conn, query):
+            rows = conn.execute(query).fetchall()
+
+        for row in rows:
+            dataset_id = source.paths.get(row[0])
+            if dataset_id is None:
+                continue
+            own_columns = set(columns_by_dataset.get(dataset_id, []))
+            count = int(row[1] or 0)
+            for i, col in enumerate(source_columns):
+                if col not in own_columns:
+                    continue
+                non_null, min_v, max_v, avg, stddev = row[2 + i * 5: 2 + (i + 1) * 5]
+                results[dataset_id][col] = {
+                    "count": count,
+                    "non_null_count": shape_metric_value("non_null_count", non_null),
+                    "min": shape_metric_value("min", min_v),
+                    "max": shape_metric_value("max", max_v),
+                    "avg": shape_metric_value("avg", avg),
+                    "stddev": shape_metric_value("stddev", stddev),
+                }
+
+        # 행이 없는 파일은 GROUP BY 결과에 나오지 않음
+        for dataset_id in source.paths.values():
+            for col in source_columns:
+                if col in columns_by_dataset.get(dataset_id, []):
+                    results[dataset_id].setdefault(col, {"count": 0, "non_null_count": 0})
+    return results
+
+
+def union_relation(
+    members: Sequence[Tuple[str, str]],
+    columns_by_dataset: Dict[str, List[str]],
+    columns: List[str],
+) -> str:
+    """
+    여러 데이터셋을 하나의 테이블로 읽는 서브쿼리 (FROM 절에 그대로 사용)
+
+    소스 종류마다 multi-file 스캔 하나 + source_dataset 컬럼, 소스의 어느 파일에도 없는 컬럼은 NULL.
+    소스 안에서 일부 파일에만 있는 컬럼은 union_by_name이 NULL로 채운다.
+    """
+    selects = []
+    for source in group_sources(members):
+        present = {c for dataset_id in source.paths.values() for c in columns_by_dataset.get(dataset_id, [])}
+        parts = [f"{source.dataset_expr()} AS {quote_ident(SOURCE_DATASET_COLUMN)}"]
+        for col in columns:
+            parts.append(quote_ident(col) if col in present else f"NULL AS {quote_ident(col)}")
+        selects.append(f"SELECT {', '.join(parts)} FROM {source.from_clause()}")
+    return "(" + " UNION ALL BY NAME ".join(selects) + ")"
+
+
+def preview_union(
+    members: Sequence[Tuple[str, str]],
+    columns_by_dataset: Dict[str, List[str]],
+    columns: List[str],
+    offset: int = 0,
+    limit: int = 2000,
+    layout: str = "rows",
+) -> Tuple[List[Any], List[str]]:
+    """
+    가상 데이터셋 미리보기 (source_dataset + columns, 전체 멤버를 이어 붙인 행 번호 기준 LIMIT/OFFSET)
+    Returns: preview_rows와 같은 (rows, columns)
+    """
+    relation = union_relation(members, columns_by_dataset, columns)
+    with get_cache().cursor() as conn:
+        return fetch_preview(conn, relation, offset, limit, [SOURCE_DATASET_COLUMN, *columns], layout=layout)
+
+
+def compute_union_metrics(
+    members: Sequence[Tuple[str, str]],
+    columns_by_dataset: Dict[str, List[str]],
+    columns: List[str],
+    by_dataset: bool = False,
+) -> Tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Dict[str, Dict[str, Any]]]]]:
+    """
+    가상 데이터셋 전체 통계 - 모든 멤버를 한 번의 병렬 스캔으로 집계
+
+    by_dataset=True면 GROUPING SETS로 같은 스캔에서 데이터셋별 통계도 함께 계산
+    (NULL로 채워진 행도 count에 포함, non_null_count는 실제 값만)
+    Returns: (전체 메트릭, dataset_id -> 메트릭 또는 None) - compute_metrics와 같은 형식
+    """
+    relation = union_relation(members, columns_by_dataset, columns)
+    source_col = quote_ident(SOURCE_DATASET_COLUMN)
+    with get_cache().cursor() as conn:
+        # 소스 종류가 섞이면 타입이 VARCHAR로 합쳐지므로 실제 결과 타입으로 TRY_CAST 여부 결정
+        described = conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()
+        numeric_columns = frozenset(row[0] for row in described if is_numeric_type(row[1]))
+        select_parts, metric_keys = metric_select_parts(columns, numeric_columns)
+        if by_dataset:
+            query = (
+                f"SELECT GROUPING({source_col}), {source_col}, {', '.join(select_parts)} "
+                f"FROM {relation} GROUP BY GROUPING SETS ((), ({source_col}))"
+            )
+        else:
+            query = f"SELECT 1, NULL, {', '.join(select_parts)} FROM {relation}"
+        with query_span(conn, query):
+            rows = conn.execute(query).fetchall()
+
+    total: Dict[str, Dict[str, Any]] = {}
+    per_dataset: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for row in rows:
+        metrics = reshape_metrics(columns, metric_keys, row[2:])
+        if row[0]:
+            total = metrics
+        else:
+            # 데이터셋 자신에게 없는 컬럼은 전부 NULL이므로 결과에서 제외
+            own = set(columns_by_dataset.get(row[1], []))
+            per_dataset[row[1]] = {c: m for c, m in metrics.items() if c in own}
+    if not by_dataset:
+        return total, None
+    # 행이 없는 데이터셋은 GROUP BY 결과에 나오지 않음
+    for dataset_id, _ in members:
+        per_dataset.setdefault(
+            dataset_id, {c: {"count": 0, "non_null_count": 0} for c in columns_by_dataset.get(dataset_id, [])}
+        )
+    return total, per_dataset
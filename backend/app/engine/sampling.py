@@ -0,0 +1,198 @@
+"""근사 통계 (mode=approx) - 표본으로 빠르게 계산하고 신뢰구간 함께 반환
+
+큰 trace를 탐색하며 클릭할 때마다 모든 행의 AVG/STDDEV를 정확히 계산할 필요는 없다.
+ingest 시 sidecar에서 균등 표본(reservoir)을 `{dataset_id}_{fingerprint}.sample.parquet`로
+저장해 두고, 요청 범위의 표본 행(__row_id로 필터)만 집계한다.
+범위 안 표본이 너무 적으면 sidecar의 그 범위에서 reservoir 표본을 직접 뽑고,
+범위가 표본 크기보다 작으면 그냥 정확히 계산한다.
+범위 행 수는 sidecar Parquet footer의 행 수로 계산한다 (COUNT(*) 스캔 없음).
+
+저장된 표본이 없으면 (sidecar가 없는 CSV View, STATS_SAMPLE_FILE_ROWS 이하의 작은 파일, ingest 전)
+근사 계산을 하지 않고 정확히 계산해서 approximate=False로 반환한다.
+CSV View에서 표본을 뽑으려면 어차피 CSV 전체를 파싱해야 하므로 근사가 더 빠르지 않다.
+
+- count: 범위 행 수 (정확)
+- non_null_count: 표본 비율로 추정
+- min/max: 표본의 최솟값/최댓값 (실제 범위보다 좁을 수 있음)
+- avg/stddev: 표본 값 + avg의 95% 신뢰구간 (유한 모집단 보정)
+- p50/p95: 표본에 대한 approx_quantile (t-digest)
+"""
+from __future__ import annotations
+
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from ..core.fileio import replace_on_success
+from ..core.profiling import query_span
+from ..core.settings import SIDECAR_DIR, STATS_SAMPLE_FILE_ROWS, STATS_SAMPLE_ROWS
+from .duckdb_cache import OnConnection, get_cache
+from .duckdb_engine import compute_metrics, leased_view, row_numbered
+from .shaping import shape_metric_value
+from .sidecar import ROW_ID_COLUMN, build_connection, file_fingerprint, find_sidecar, parquet_row_count, sidecar_path
+from .sql import quote_ident, quote_literal
+
+logger = logging.getLogger(__name__)
+
+STATS_MODES = ("exact", "approx")
+# 95% 신뢰구간 z 값
+Z_95 = 1.959964
+# 저장된 표본에서 범위 안 행이 이보다 적으면 범위에서 직접 표본 추출
+MIN_INDEXED_SAMPLE = max(STATS_SAMPLE_ROWS // 10, 100)
+# 표본 추출 seed (같은 요청은 같은 결과)
+SAMPLE_SEED = 42
+
+
+def sample_path(dataset_id: str, fingerprint: str) -> Path:
+    """sidecar 버전에 대응하는 표본 경로"""
+    return SIDECAR_DIR / f"{dataset_id}_{fingerprint}.sample.parquet"
+
+
+def find_sample(dataset_id: str, csv_path: str) -> Optional[Path]:
+    """현재 CSV 버전에 맞는 표본이 있으면 경로 반환"""
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    path = sample_path(dataset_id, fingerprint)
+    return path if path.exists() else None
+
+
+def build_sample(
+    dataset_id: str, csv_path: str, force: bool = False, on_connection: Optional[OnConnection] = None
+) -> Optional[Path]:
+    """
+    sidecar에서 균등 표본 생성 (이미 최신이면 재사용)
+    Returns: 표본 경로 (sidecar가 없거나 행 수가 STATS_SAMPLE_FILE_ROWS 이하라 표본이 필요 없으면 None)
+    """
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    source = sidecar_path(dataset_id, fingerprint)
+    if not source.exists():
+        return None
+    target = sample_path(dataset_id, fingerprint)
+    if target.exists() and not force:
+        return target
+
+    source_sql = f"read_parquet({quote_literal(str(source))})"
+    with replace_on_success(target) as tmp, build_connection(on_connection) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM {source_sql}").fetchone()[0]
+        if total <= STATS_SAMPLE_FILE_ROWS:
+            return None
+        conn.execute(
+            f"COPY (SELECT * FROM (SELECT * FROM {source_sql} "
+            f"USING SAMPLE reservoir({STATS_SAMPLE_FILE_ROWS} ROWS) REPEATABLE ({SAMPLE_SEED})) "
+            f"ORDER BY {quote_ident(ROW_ID_COLUMN)}) "
+            f"TO {quote_literal(str(tmp))} (FORMAT PARQUET, COMPRESSION ZSTD)"
+        )
+
+    logger.info("[Sample] Built %s (%d rows)", target.name, STATS_SAMPLE_FILE_ROWS)
+    return target
+
+
+def _sample_select_parts(columns: List[str], numeric_columns: FrozenSet[str]) -> List[str]:
+    """표본 집계 SELECT 항목 (__n + 컬럼별 7개)"""
+    parts = ["COUNT(*) AS __n"]
+    for col in columns:
+        col_quoted = quote_ident(col)
+        num = col_quoted if col in numeric_columns else f"TRY_CAST({col_quoted} AS DOUBLE)"
+        parts += [
+            f"COUNT({col_quoted})",
+            f"MIN({col_quoted})",
+            f"MAX({col_quoted})",
+            f"COUNT({num})",
+            f"AVG({num})",
+            f"STDDEV({num})",
+            f"approx_quantile({num}, [0.5, 0.95])",
+        ]
+    return parts
+
+
+def _approx_metric(total: int, sample_n: int, values) -> Dict[str, Any]:
+    """표본 집계 → 근사 메트릭 (compute_metrics 형식 + 근사 필드)"""
+    non_null, min_v, max_v, num_count, avg, stddev, quantiles = values
+    metric = {
+        "count": total,
+        "non_null_count": round(non_null * total / sample_n) if sample_n else 0,
+        "min": shape_metric_value("min", min_v),
+        "max": shape_metric_value("max", max_v),
+        "avg": shape_metric_value("avg", avg),
+        "stddev": shape_metric_value("stddev", stddev),
+        "approximate": True,
+        "sample_size": sample_n,
+    }
+    if quantiles:
+        metric["p50"] = shape_metric_value("avg", quantiles[0])
+        metric["p95"] = shape_metric_value("avg", quantiles[1])
+    if avg is not None and stddev is not None and num_count > 1:
+        # 범위 안 숫자 값 개수 추정치로 유한 모집단 보정 (표본이 범위 전체면 구간 폭 0)
+        population = num_count * total / sample_n
+        fpc = math.sqrt(max(population - num_count, 0) / (population - 1)) if population > 1 else 0.0
+        margin = Z_95 * float(stddev) / math.sqrt(num_count) * fpc
+        metric["avg_ci_low"] = float(avg) - margin
+        metric["avg_ci_high"] = float(avg) + margin
+    return metric
+
+
+def compute_approx_metrics(
+    csv_path: str,
+    columns: List[str],
+    row_start: int = 0,
+    row_end: Optional[int] = None,
+    dataset_id: Optional[str] = None,
+    on_connection: Optional[OnConnection] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    표본 기반 근사 통계
+    저장된 표본이 없거나 범위가 STATS_SAMPLE_ROWS행 이하면 정확히 계산 (approximate=False)
+    on_connection: 쿼리를 실행하는 동안 cursor를 등록하는 context manager (비동기 작업의 진행률 조회/취소용)
+    Returns: 컬럼 -> 메트릭 (approximate, sample_size, avg_ci_low/high, p50/p95 포함)
+    """
+    def exact(start: int, end: Optional[int]) -> Dict[str, Dict[str, Any]]:
+        metrics = compute_metrics(csv_path, columns, start, end, dataset_id=dataset_id, on_connection=on_connection)
+        for metric in metrics.values():
+            metric["approximate"] = False
+        return metrics
+
+    cache = get_cache()
+    with leased_view(csv_path, dataset_id) as view:
+        view_query, row_indexed = view.query, view.row_indexed
+        source, row_id = row_numbered(view_query, row_indexed)
+        sample_file = find_sample(dataset_id, csv_path) if dataset_id and row_indexed else None
+        sidecar = find_sidecar(dataset_id, csv_path) if sample_file is not None else None
+        if sidecar is None:
+            return exact(row_start, row_end)
+
+        with cache.cursor(on_connection) as conn:
+            total_rows = parquet_row_count(conn, sidecar)
+        row_end = total_rows if row_end is None else min(row_end, total_rows)
+        row_start = min(row_start, row_end)
+        total = row_end - row_start
+        if total <= STATS_SAMPLE_ROWS:
+            return exact(row_start, row_end)
+
+        numeric_columns = view.numeric_columns
+        select = ", ".join(_sample_select_parts(columns, numeric_columns))
+        where = f"{row_id} >= {row_start} AND {row_id} < {row_end}"
+
+        with cache.cursor(on_connection) as conn:
+            # 저장된 균등 표본 중 범위 안 행 (균등 표본의 부분집합도 그 범위의 균등 표본)
+            query = f"SELECT {select} FROM read_parquet({quote_literal(str(sample_file))}) WHERE {where}"
+            with query_span(conn, query):
+                row = conn.execute(query).fetchone()
+            if row[0] < MIN_INDEXED_SAMPLE:
+                # 좁은 범위 - sidecar의 그 범위에서만 표본 추출 (row group 통계로 범위 밖은 건너뜀)
+                query = (
+                    f"SELECT {select} FROM (SELECT * FROM {source} WHERE {where}) "
+                    f"USING SAMPLE reservoir({STATS_SAMPLE_ROWS} ROWS) REPEATABLE ({SAMPLE_SEED})"
+                )
+                with query_span(conn, query):
+                    row = conn.execute(query).fetchone()
+
+    sample_n = int(row[0])
+    logger.debug("[Stats] Approximate metrics from %d sampled rows of %d", sample_n, total)
+    return {
+        col: _approx_metric(total, sample_n, row[1 + i * 7: 1 + (i + 1) * 7])
+        for i, col in enumerate(columns)
+    }
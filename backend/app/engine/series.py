@@ -0,0 +1,336 @@
+"""시계열 다운샘플링 - 차트용으로 행 수를 줄인 (x, y) 점 목록
+
+전체 trace를 그리려고 원본 행을 preview로 모두 받는 대신, 서버에서 화면에 보이는 모양을
+유지하는 점만 골라서 보낸다. x는 행 번호(시간 순서), y는 숫자로 변환한 값.
+
+- minmax: 구간(bucket)마다 최솟값/최댓값 행 2개 (피크가 사라지지 않음)
+- lttb: minmax로 후보를 먼저 줄인 뒤 Largest-Triangle-Three-Buckets로 N개 선택 (MinMaxLTTB)
+
+bucket 집계는 DuckDB GROUP BY 한 번으로 모든 컬럼을 계산한다.
+Date/Time 컬럼이 있으면 최솟값/최댓값 행의 시간 라벨("Date Time")도 같은 집계에서 함께 고른다
+(선택된 행의 라벨을 찾으려고 파일을 다시 스캔하지 않음).
+전체 파일 기준 minmax 결과(SERIES_PYRAMID_BUCKETS개 bucket)는 컬럼별로 메모리에 캐시해두고,
+그보다 거친 해상도 요청은 캐시된 점을 NumPy로 다시 bucket해서 응답한다 (파일을 다시 스캔하지 않음).
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional
+
+import numpy as np
+
+from ..core.profiling import query_span, span as profile_span
+from ..core.settings import (
+    DATE_COLUMN,
+    SERIES_CACHE_MAX_COLUMNS,
+    SERIES_PYRAMID_BUCKETS,
+    TIME_COLUMN,
+)
+from .duckdb_cache import get_cache
+from .duckdb_engine import leased_view, row_numbered
+from .sidecar import file_fingerprint
+from .sql import quote_ident
+
+SERIES_METHODS = ("minmax", "lttb")
+# lttb는 (점 수 × 이 값)개 minmax bucket에서 후보를 고름
+LTTB_PRESELECT_RATIO = 2
+
+
+@dataclass
+class SeriesLevel:
+    """컬럼 하나의 minmax 점 (x 오름차순)"""
+    x: np.ndarray  # int64 행 번호
+    y: np.ndarray  # float64 값 (NULL/숫자 아님은 제외됨)
+    t: Optional[np.ndarray] = None  # 시간 라벨 (object, Date/Time 컬럼이 없으면 None)
+
+    def take(self, index) -> "SeriesLevel":
+        """index 위치의 점만 남긴 SeriesLevel"""
+        return SeriesLevel(x=self.x[index], y=self.y[index], t=None if self.t is None else self.t[index])
+
+
+def _value_expr(col: str, numeric_columns: FrozenSet[str]) -> str:
+    """y 값 표현식 (숫자 타입 컬럼은 변환 생략)"""
+    if col in numeric_columns:
+        return f"CAST({quote_ident(col)} AS DOUBLE)"
+    return f"TRY_CAST({quote_ident(col)} AS DOUBLE)"
+
+
+def time_label_expr(columns: List[str]) -> Optional[str]:
+    """시간 라벨 ("Date Time") SQL 식 - Date/Time 컬럼이 없으면 None"""
+    time_columns = [c for c in (DATE_COLUMN, TIME_COLUMN) if c in columns]
+    if not time_columns:
+        return None
+    return " || ' ' || ".join(f"COALESCE(CAST({quote_ident(c)} AS VARCHAR), '')" for c in time_columns)
+
+
+def _minmax_query(
+    source: str,
+    row_id: str,
+    columns: List[str],
+    row_start: int,
+    row_end: int,
+    buckets: int,
+    numeric_columns: FrozenSet[str] = frozenset(),
+    label: Optional[str] = None,
+) -> str:
+    """
+    행 범위를 buckets개 구간으로 나눠 컬럼별 최솟값/최댓값과 그 행 번호를 구하는 쿼리
+    label(시간 라벨 식)이 있으면 같은 행의 라벨도 함께 (행 번호와 라벨을 struct 하나로 골라서 어긋나지 않음)
+    Returns: 컬럼마다 (min x, min y, max x, max y[, min t, max t])
+    """
+    span = max(row_end - row_start, 1)
+    values = ", ".join(
+        f"{_value_expr(col, numeric_columns)} AS __v{i}" for i, col in enumerate(columns)
+    )
+    scan = f"""
+        SELECT {row_id} AS __x, {values}{f", {label} AS __t" if label else ""}
+        FROM {source}
+        WHERE {row_id} >= {row_start} AND {row_id} < {row_end}
+    """
+    group = f"GROUP BY (__x - {row_start}) * {buckets} // {span}"
+    if label is None:
+        aggregates = ", ".join(
+            f"arg_min(__x, __v{i}), MIN(__v{i}), arg_max(__x, __v{i}), MAX(__v{i})"
+            for i in range(len(columns))
+        )
+        return f"SELECT {aggregates} FROM ({scan}) {group}"
+    aggregates = ", ".join(
+        f"arg_min({{'x': __x, 't': __t}}, __v{i}) AS __lo{i}, MIN(__v{i}) AS __min{i}, "
+        f"arg_max({{'x': __x, 't': __t}}, __v{i}) AS __hi{i}, MAX(__v{i}) AS __max{i}"
+        for i in range(len(columns))
+    )
+    fields = ", ".join(
+        f"__lo{i}.x, __min{i}, __hi{i}.x, __max{i}, __lo{i}.t, __hi{i}.t" for i in range(len(columns))
+    )
+    return f"SELECT {fields} FROM (SELECT {aggregates} FROM ({scan}) {group})"
+
+
+def _merge_points(x_min, y_min, x_max, y_max, t_min=None, t_max=None) -> SeriesLevel:
+    """bucket별 (최솟값 점, 최댓값 점)을 x 순서의 점 목록으로 합치기 (같은 행은 한 번만)"""
+    y = np.concatenate([y_min, y_max]).astype(np.float64)
+    valid = ~np.isnan(y)
+    # 값이 모두 NULL인 bucket은 행 번호도 NULL(NaN)이므로 정수 변환 전에 제외
+    x = np.concatenate([x_min, x_max])[valid].astype(np.int64)
+    t = np.concatenate([t_min, t_max])[valid] if t_min is not None else None
+    x, index = np.unique(x, return_index=True)
+    return SeriesLevel(x=x, y=y[valid][index], t=None if t is None else t[index])
+
+
+def _labels(array) -> np.ndarray:
+    """fetchnumpy 문자열 결과 → object 배열 (NULL → None)"""
+    return np.ma.filled(np.ma.asarray(array, dtype=object), None)
+
+
+def _filled(array) -> np.ndarray:
+    """fetchnumpy 결과(NULL은 masked)를 float 배열로 (NULL → NaN)"""
+    return np.ma.filled(np.ma.asarray(array).astype(np.float64), np.nan)
+
+
+def query_minmax(
+    conn,
+    source: str,
+    row_id: str,
+    columns: List[str],
+    row_start: int,
+    row_end: int,
+    buckets: int,
+    numeric_columns: FrozenSet[str] = frozenset(),
+    label: Optional[str] = None,
+) -> Dict[str, SeriesLevel]:
+    """DuckDB에서 bucket별 minmax 점 계산 (모든 컬럼 한 번의 스캔, label이 있으면 시간 라벨 포함)"""
+    query = _minmax_query(source, row_id, columns, row_start, row_end, buckets, numeric_columns, label)
+    with query_span(conn, query):
+        result = conn.execute(query).fetchnumpy()
+    arrays = list(result.values())
+    width = 4 if label is None else 6
+    levels = {}
+    for i, col in enumerate(columns):
+        parts = arrays[i * width: (i + 1) * width]
+        x_min, y_min, x_max, y_max = (_filled(a) for a in parts[:4])
+        labels = [_labels(a) for a in parts[4:]]
+        levels[col] = _merge_points(x_min, y_min, x_max, y_max, *labels)
+    return levels
+
+
+def rebucket_minmax(level: SeriesLevel, row_start: int, row_end: int, buckets: int) -> SeriesLevel:
+    """더 촘촘한 minmax 점을 buckets개 구간의 minmax로 다시 집계 (NumPy)"""
+    level = level.take((level.x >= row_start) & (level.x < row_end))
+    x, y, t = level.x, level.y, level.t
+    if len(x) == 0:
+        return level
+    span = max(row_end - row_start, 1)
+    bucket = (x - row_start) * buckets // span
+    # bucket 안에서 y 오름차순 → 각 bucket의 첫 점이 최솟값, 마지막 점이 최댓값
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    last = np.r_[first[1:] - 1, len(order) - 1]
+    labels = () if t is None else (t[order[first]], t[order[last]])
+    return _merge_points(x[order[first]], y[order[first]], x[order[last]], y[order[last]], *labels)
+
+
+def lttb(level: SeriesLevel, points: int) -> SeriesLevel:
+    """
+    Largest-Triangle-Three-Buckets
+    첫 점/끝 점을 고정하고, 가운데 구간마다 이전 선택점과 다음 구간 평균점으로 만든
+    삼각형 넓이가 가장 큰 점을 선택
+    """
+    n = len(level.x)
+    if points >= n or points < 3:
+        return level
+    x = level.x.astype(np.float64)
+    y = level.y
+    # 가운데 점들을 points - 2개 구간으로 나눔
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # 구간별 평균점 (다음 구간 평균은 벡터로 미리 계산, 마지막 구간의 다음은 끝 점)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    next_x = np.r_[avg_x[1:], x[-1]]
+    next_y = np.r_[avg_y[1:], y[-1]]
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[prev] - next_x[i]) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (next_y[i] - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        selected[i + 1] = prev
+    return level.take(selected)
+
+
+class SeriesPyramidCache:
+    """컬럼별 전체 파일 minmax 점 캐시 (LRU, key에 CSV fingerprint 포함)"""
+
+    def __init__(self, max_columns: int = SERIES_CACHE_MAX_COLUMNS):
+        self._max_columns = max_columns
+        self._lock = threading.Lock()
+        self._levels: "OrderedDict[Hashable, SeriesLevel]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_many(self, keys: List[Hashable]) -> Dict[Hashable, SeriesLevel]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                level = self._levels.get(key)
+                if level is not None:
+                    self._levels.move_to_end(key)
+                    found[key] = level
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+            return found
+
+    def put(self, key: Hashable, level: SeriesLevel):
+        if self._max_columns <= 0:
+            return
+        with self._lock:
+            self._levels[key] = level
+            self._levels.move_to_end(key)
+            while len(self._levels) > self._max_columns:
+                self._levels.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._levels.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "columns": len(self._levels),
+                "points": int(sum(len(level.x) for level in self._levels.values())),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# 전역 인스턴스 (싱글톤 패턴)
+_pyramid_cache = SeriesPyramidCache()
+
+
+def get_pyramid_cache() -> SeriesPyramidCache:
+    """전역 다운샘플링 캐시 반환"""
+    return _pyramid_cache
+
+
+def downsample_series(
+    csv_path: str,
+    columns: List[str],
+    points: int,
+    method: str = "minmax",
+    row_start: int = 0,
+    row_end: Optional[int] = None,
+    dataset_id: Optional[str] = None,
+    all_columns: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    컬럼별 다운샘플링 점 계산
+
+    Args:
+        points: 컬럼당 최대 점 수
+        method: "minmax" | "lttb"
+        all_columns: 데이터셋 전체 컬럼 (시간 라벨 컬럼 확인용)
+    Returns: {"row_start", "row_end", "total_rows", "pyramid", "series": {컬럼: {"x", "y", "time"?}}}
+    """
+    if method not in SERIES_METHODS:
+        raise ValueError(f"Unsupported method: {method}")
+    cache = get_cache()
+    with leased_view(csv_path, dataset_id) as view:
+        view_query, row_indexed = view.query, view.row_indexed
+        source, row_id = row_numbered(view_query, row_indexed)
+        numeric_columns = view.numeric_columns
+        # minmax는 bucket당 최대 2점, lttb는 후보를 넉넉히 뽑은 뒤 points개 선택
+        buckets = max(points // 2, 1) if method == "minmax" else points * LTTB_PRESELECT_RATIO
+        label = time_label_expr(all_columns or [])
+
+        with cache.cursor() as conn:
+            total_rows = conn.execute(f"SELECT COUNT(*) FROM {view_query}").fetchone()[0]
+            row_end = total_rows if row_end is None else min(row_end, total_rows)
+            row_start = min(row_start, row_end)
+            span = row_end - row_start
+
+            # 요청 bucket 하나가 캐시 bucket 하나 이상을 덮으면 캐시된 전체 파일 점에서 다시 집계
+            fingerprint = file_fingerprint(csv_path) if dataset_id else None
+            use_pyramid = fingerprint is not None and span * SERIES_PYRAMID_BUCKETS >= total_rows * buckets
+            if use_pyramid:
+                keys = {col: (dataset_id, fingerprint, col, label is not None) for col in columns}
+                cached = _pyramid_cache.get_many(list(keys.values()))
+                missing = [col for col in columns if keys[col] not in cached]
+                if missing:
+                    built = query_minmax(
+                        conn, source, row_id, missing, 0, total_rows, SERIES_PYRAMID_BUCKETS, numeric_columns, label
+                    )
+                    for col, level in built.items():
+                        _pyramid_cache.put(keys[col], level)
+                        cached[keys[col]] = level
+                levels = {
+                    col: rebucket_minmax(cached[keys[col]], row_start, row_end, buckets) for col in columns
+                }
+            else:
+                levels = query_minmax(
+                    conn, source, row_id, columns, row_start, row_end, buckets, numeric_columns, label
+                )
+
+            if method == "lttb":
+                levels = {col: lttb(level, points) for col, level in levels.items()}
+
+    series = {}
+    with profile_span("shaping"):
+        for col, level in levels.items():
+            entry: Dict[str, Any] = {"x": level.x.tolist(), "y": level.y.tolist()}
+            if level.t is not None:
+                entry["time"] = level.t.tolist()
+            series[col] = entry
+    return {
+        "row_start": row_start,
+        "row_end": row_end,
+        "total_rows": int(total_rows),
+        "pyramid": use_pyramid,
+        "series": series,
+    }
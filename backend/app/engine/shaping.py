@@ -0,0 +1,146 @@
+"""쿼리 결과 → API 응답 값 변환
+
+값 하나씩 변환하지 않고 컬럼(또는 같은 메트릭) 단위로 한 번에 변환한다.
+- preview: fetchnumpy로 컬럼 배열을 받아 tolist()로 변환 (셀마다 Python 객체를 만드는 fetchall보다 빠름)
+- 메트릭: 같은 메트릭 값을 모아서 이미 최종 타입인 값은 그대로 두고 나머지만 변환
+- JSON: FastAPI의 jsonable_encoder(값마다 재귀 검사)를 거치지 않고 바로 직렬화
+"""
+from __future__ import annotations
+
+import datetime
+import decimal
+import json
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from ..core.profiling import span
+
+
+def shape_metric_value(metric_name: str, value: Any) -> Any:
+    """메트릭 값 타입 정리 (숫자 가능하면 숫자, 아니면 문자열 유지)"""
+    if value is None:
+        return None
+    if metric_name in ("count", "non_null_count"):
+        return int(value)
+    if metric_name in ("min", "max"):
+        # 숫자 타입 컬럼(sidecar)은 DuckDB가 이미 숫자로 반환
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float):
+            return int(value) if value.is_integer() else value
+        # MIN/MAX는 원본 값 유지 (문자열/숫자 모두 가능)
+        # 숫자로 변환 가능하면 변환, 아니면 문자열로 유지
+        try:
+            float_val = float(value)
+            # 정수인지 확인
+            if float_val.is_integer():
+                return int(float_val)
+            return float_val
+        except (ValueError, TypeError):
+            return str(value)
+    if metric_name in ("avg", "stddev"):
+        if isinstance(value, float):
+            return value
+        # 숫자 메트릭 (TRY_CAST로 이미 NULL 처리됨)
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+    return value
+
+
+# 메트릭별로 변환 없이 그대로 응답에 쓸 수 있는 타입 (DuckDB가 이미 그 타입으로 반환)
+_READY_TYPES: Dict[str, tuple] = {
+    "count": (int, type(None)),
+    "non_null_count": (int, type(None)),
+    "min": (int, type(None)),
+    "max": (int, type(None)),
+    "avg": (float, type(None)),
+    "stddev": (float, type(None)),
+}
+
+
+def shape_metric_values(metric_name: str, values: Sequence[Any]) -> List[Any]:
+    """
+    shape_metric_value의 일괄 버전 (여러 컬럼의 같은 메트릭)
+    이미 최종 타입인 값은 그대로 두고, DOUBLE 컬럼의 MIN/MAX는 numpy로 정수 여부를 한 번에 판정
+    """
+    ready = _READY_TYPES.get(metric_name)
+    if ready is None:
+        return [shape_metric_value(metric_name, v) for v in values]
+    extremes = metric_name in ("min", "max")
+    if extremes:
+        # float은 아래에서 한 번에 정수 여부 판정
+        ready = ready + (float,)
+    out = [v if type(v) in ready else shape_metric_value(metric_name, v) for v in values]
+    if extremes:
+        floats = [i for i, v in enumerate(values) if type(v) is float]
+        if floats:
+            arr = np.array([values[i] for i in floats], dtype=np.float64)
+            integral = np.isfinite(arr) & (arr == np.floor(arr))
+            for i, value, is_int in zip(floats, arr.tolist(), integral.tolist()):
+                out[i] = int(value) if is_int else value
+    return out
+
+
+def reshape_metric_row(
+    columns: List[str],
+    metric_names: Sequence[str],
+    values: Sequence[Any],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    컬럼 × 메트릭 순서로 나열된 집계 결과 1행 → 컬럼별 메트릭 dict
+    (values[i * len(metric_names) + j] = columns[i]의 metric_names[j])
+    """
+    width = len(metric_names)
+    shaped = [shape_metric_values(name, values[j::width]) for j, name in enumerate(metric_names)]
+    return {col: dict(zip(metric_names, col_values)) for col, col_values in zip(columns, zip(*shaped))}
+
+
+def column_values(array: np.ndarray) -> List[Any]:
+    """fetchnumpy 컬럼 배열 → Python 값 목록 (NULL은 masked 값이라 None이 됨)"""
+    if array.dtype.kind in "Mm":
+        # 날짜/시간 타입은 datetime 객체로 (ns 단위 그대로 tolist()하면 정수가 됨)
+        unit = "datetime64[us]" if array.dtype.kind == "M" else "timedelta64[us]"
+        array = array.astype(unit).astype(object)
+    return array.tolist()
+
+
+def numpy_to_columns(arrays: Mapping[str, np.ndarray], columns: List[str]) -> List[List[Any]]:
+    """fetchnumpy 결과 → 컬럼별 값 목록 (columns 순서)"""
+    return [column_values(arrays[col]) for col in columns]
+
+
+def numpy_to_rows(arrays: Mapping[str, np.ndarray], columns: List[str]) -> List[Dict[str, Any]]:
+    """fetchnumpy 결과 → 행 dict 목록 (컬럼 값 목록을 zip으로 묶어 셀 단위 Python 루프 없이 생성)"""
+    return [dict(zip(columns, row)) for row in zip(*numpy_to_columns(arrays, columns))]
+
+
+def _json_default(value: Any) -> Any:
+    """json.dumps가 모르는 값 (jsonable_encoder와 같은 표현)"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    응답 JSON 직렬화 (Starlette JSONResponse와 같은 옵션)
+    dict/list/str/숫자만 있는 큰 응답에서 jsonable_encoder의 값별 검사를 건너뜀
+    """
+    with span("serialize"):
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+            default=_json_default,
+        ).encode("utf-8")
@@ -0,0 +1,285 @@
+"""Parquet sidecar 저장소 - CSV를 한 번만 파싱해서 컬럼 저장소로 변환
+
+CSV View(read_csv)는 저장된 쿼리일 뿐이라 요청마다 CSV 전체를 다시 파싱한다.
+sidecar는 CSV 하나당 한 번만 만들어 두는 타입 지정 + 압축 Parquet 파일이며,
+파일명 + mtime + 크기로 만든 fingerprint를 파일 이름에 넣어 CSV가 바뀌면 자동으로 무효화된다.
+
+CSV는 문자열 Parquet 사본으로 한 번만 파싱하고, 컬럼 타입 카탈로그 추정과 숫자 컬럼 변환은
+그 사본에서 한다 (타입 추정용으로 CSV를 다시 파싱하지 않음).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Set
+
+import duckdb
+
+from ..core.fileio import replace_on_success, temp_file
+from ..core.settings import SIDECAR_DIR
+from .sql import quote_ident, quote_literal
+
+logger = logging.getLogger(__name__)
+
+# sidecar 포맷이 바뀌면 올려서 기존 파일을 자동으로 재생성
+# v2: 0부터 시작하는 행 번호 컬럼(__row_id) 추가
+SIDECAR_VERSION = 2
+
+# CSV 행 순서를 나타내는 합성 컬럼 (row group min/max 통계로 범위 조회 시 건너뛰기 가능)
+ROW_ID_COLUMN = "__row_id"
+# row group이 작을수록 행 범위 조회 시 읽는 양이 줄어듦 (압축률과의 절충)
+ROW_GROUP_SIZE = 16384
+
+# 숫자로 저장할 DuckDB 타입 (나머지는 원본 문자열 그대로 VARCHAR 유지)
+NUMERIC_TYPES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT",
+    "FLOAT", "DOUBLE",
+}
+
+# 타입 카탈로그 → sidecar 저장 타입 (나머지는 원본 문자열 그대로 VARCHAR)
+STORAGE_TYPES = {"int": "BIGINT", "double": "DOUBLE"}
+
+# 연결을 쓰는 동안 적용할 context manager (비동기 작업의 진행률 조회/취소, ingest 중단 시 interrupt용 연결 등록)
+# with 블록이 끝나면 연결이 풀로 반납되거나 닫히기 전에 등록을 해제해야 함
+OnConnection = Callable[[duckdb.DuckDBPyConnection], ContextManager[None]]
+
+_build_locks: Dict[str, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def file_fingerprint(csv_path: str | Path) -> Optional[str]:
+    """CSV 파일 fingerprint (파일명 + 크기 + mtime + 포맷 버전), 파일이 없으면 None"""
+    p = Path(csv_path)
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    raw = f"{p.name}|{st.st_size}|{st.st_mtime_ns}|v{SIDECAR_VERSION}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def sidecar_path(dataset_id: str, fingerprint: str) -> Path:
+    """fingerprint에 해당하는 sidecar 파일 경로"""
+    return SIDECAR_DIR / f"{dataset_id}_{fingerprint}.parquet"
+
+
+def find_sidecar(dataset_id: str, csv_path: str | Path) -> Optional[Path]:
+    """현재 CSV 버전에 맞는 sidecar가 있으면 경로 반환"""
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    path = sidecar_path(dataset_id, fingerprint)
+    return path if path.exists() else None
+
+
+def is_numeric_type(type_name: str) -> bool:
+    """숫자 DuckDB 타입인지 (TRY_CAST 없이 집계 가능)"""
+    return type_name in NUMERIC_TYPES or type_name.startswith("DECIMAL")
+
+
+def catalog_type(type_name: str) -> str:
+    """DuckDB 타입 → 타입 카탈로그 이름 (int/double/date/time/timestamp/string)"""
+    if type_name in NUMERIC_TYPES:
+        return "double" if type_name in ("FLOAT", "DOUBLE") else "int"
+    if type_name.startswith("DECIMAL"):
+        return "double"
+    if type_name.startswith("TIMESTAMP"):
+        return "timestamp"
+    if type_name in ("DATE", "TIME"):
+        return type_name.lower()
+    return "string"
+
+
+def _type_checks(col: str) -> List[tuple[str, str]]:
+    """
+    문자열 컬럼 타입 판정 조건 (앞에서부터 모든 값이 만족하는 첫 타입, 없으면 string)
+    형식(정규식)을 먼저 확인하고 맞는 값만 CAST - 실패하는 CAST는 느리고,
+    DuckDB CAST는 '1.5' → 2, '2025/01/06' → TIME 00:00처럼 관대함
+    """
+    date = "[0-9]{4}[-/.][0-9]{1,2}[-/.][0-9]{1,2}"
+    time = "[0-9]{1,2}:[0-9]{2}(:[0-9]{2}([.][0-9]+)?)?"
+    number = "[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)([eE][+-]?[0-9]+)?"
+
+    def matches(pattern: str, cast: Optional[str] = None) -> str:
+        match = f"regexp_full_match({col}, '\\s*{pattern}\\s*')"
+        if cast is None:
+            return match
+        # CASE로 감싸야 형식이 맞는 값만 CAST (AND는 양쪽을 모두 계산)
+        return f"CASE WHEN {match} THEN TRY_CAST({col} AS {cast}) IS NOT NULL ELSE false END"
+
+    return [
+        ("int", matches("[+-]?[0-9]+", "BIGINT")),
+        ("double", matches(number)),
+        ("date", matches(date, "DATE")),
+        ("time", matches(time, "TIME")),
+        ("timestamp", matches(f"{date}[ T]{time}", "TIMESTAMP")),
+    ]
+
+
+def infer_column_types(conn: duckdb.DuckDBPyConnection, source: str) -> Dict[str, str]:
+    """
+    컬럼별 타입 카탈로그 추정 (ingest 시 한 번, 결과는 레지스트리에 저장)
+
+    source: FROM 절 - staged 문자열 Parquet 사본, 기존 sidecar 또는 all_varchar CSV
+    이미 숫자 타입인 컬럼은 저장 타입 그대로, 문자열 컬럼은 값 형식으로 판정 (집계 쿼리 한 번)
+    Returns: 컬럼 -> "int" | "double" | "date" | "time" | "timestamp" | "string"
+    """
+    described = [row for row in conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall() if row[0] != ROW_ID_COLUMN]
+    column_types = {name: catalog_type(type_name) for name, type_name, *_ in described}
+    text_columns = [name for name, type_name, *_ in described if type_name == "VARCHAR"]
+    if not text_columns:
+        return column_types
+
+    select_parts: List[str] = []
+    for name in text_columns:
+        col = quote_ident(name)
+        select_parts.append(f"COUNT({col})")
+        select_parts.extend(f"COUNT_IF({check})" for _, check in _type_checks(col))
+    row = conn.execute(f"SELECT {', '.join(select_parts)} FROM {source}").fetchone()
+
+    width = 1 + len(_type_checks(""))
+    for i, name in enumerate(text_columns):
+        non_null, *matched = row[i * width: (i + 1) * width]
+        # 값이 하나도 없는 컬럼은 문자열 (sniffer와 같음)
+        column_types[name] = next(
+            (type_name for (type_name, _), count in zip(_type_checks(""), matched) if non_null and count == non_null),
+            "string",
+        )
+    return column_types
+
+
+def parquet_row_count(conn: duckdb.DuckDBPyConnection, path: str | Path) -> int:
+    """Parquet 파일 행 수 (footer 메타데이터만 읽음)"""
+    row = conn.execute(f"SELECT SUM(num_rows) FROM parquet_file_metadata({quote_literal(str(path))})").fetchone()
+    return int(row[0] or 0)
+
+
+def parquet_source(path: str | Path) -> str:
+    """Parquet 파일 FROM 절"""
+    return f"read_parquet({quote_literal(str(path))})"
+
+
+def replace_clause(column_types: Dict[str, str], strict: bool = True) -> str:
+    """
+    타입 카탈로그에서 숫자(int/double)인 컬럼만 저장 타입으로 바꾸는 `SELECT *` 뒤 REPLACE 절 (없으면 빈 문자열)
+    날짜/시간/텍스트는 원본 문자열 그대로 둔다.
+    strict=False면 TRY_CAST - 카탈로그 추정 후 바뀐 파일에서도 View 생성이 실패하지 않음 (안 맞는 값은 NULL)
+    """
+    cast = "CAST" if strict else "TRY_CAST"
+    replaced = [
+        f"{cast}({quote_ident(name)} AS {STORAGE_TYPES[type_name]}) AS {quote_ident(name)}"
+        for name, type_name in column_types.items()
+        if type_name in STORAGE_TYPES
+    ]
+    return f"REPLACE ({', '.join(replaced)})" if replaced else ""
+
+
+@contextmanager
+def build_connection(on_connection: Optional[OnConnection] = None) -> Iterator[duckdb.DuckDBPyConnection]:
+    """파생 파일(sidecar, 인덱스, 표본) 생성용 전용 연결 - on_connection이 있으면 쓰는 동안 등록"""
+    conn = duckdb.connect()
+    try:
+        if on_connection is None:
+            yield conn
+        else:
+            with on_connection(conn):
+                yield conn
+    finally:
+        conn.close()
+
+
+def _get_build_lock(dataset_id: str) -> threading.Lock:
+    with _build_locks_guard:
+        if dataset_id not in _build_locks:
+            _build_locks[dataset_id] = threading.Lock()
+        return _build_locks[dataset_id]
+
+
+def _remove_stale(dataset_id: str, keep: Path):
+    """같은 데이터셋의 이전 버전 sidecar(및 같은 버전에서 파생된 파일 외) 삭제"""
+    for old in SIDECAR_DIR.glob(f"{dataset_id}_*.parquet"):
+        if old.name.split(".")[0] != keep.stem:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def build_sidecar(
+    dataset_id: str,
+    csv_path: str | Path,
+    force: bool = False,
+    column_types: Optional[Dict[str, str]] = None,
+    on_column_types: Optional[Callable[[Dict[str, str]], None]] = None,
+    on_connection: Optional[OnConnection] = None,
+) -> Optional[Path]:
+    """
+    CSV를 Parquet sidecar로 변환 (이미 최신이면 재사용)
+
+    column_types(레지스트리 타입 카탈로그)가 없으면 staged 사본에서 추정해서 on_column_types로 전달한다.
+    on_connection: 변환하는 동안 연결을 등록하는 context manager (ingest 중단 시 interrupt용)
+    임시 파일에 쓴 뒤 rename하므로 읽는 쪽에서 절반만 쓰인 파일을 볼 일은 없다.
+    Returns: sidecar 경로 (CSV가 없으면 None)
+    """
+    csv_path = Path(csv_path).resolve()
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+
+    target = sidecar_path(dataset_id, fingerprint)
+    with _get_build_lock(dataset_id):
+        if target.exists() and not force:
+            return target
+
+        SIDECAR_DIR.mkdir(parents=True, exist_ok=True)
+        csv_literal = quote_literal(str(csv_path))
+        with replace_on_success(target) as tmp, temp_file(target, "stage") as staged, build_connection(on_connection) as conn:
+            # 1단계: CSV → 문자열 Parquet 사본 (CSV 파싱은 이 한 번뿐, CSV 행 순서 유지)
+            conn.execute(
+                f"COPY (SELECT * FROM read_csv({csv_literal}, header=true, all_varchar=true)) "
+                f"TO {quote_literal(str(staged))} (FORMAT PARQUET)"
+            )
+            # 2단계: 타입 카탈로그가 없으면 사본에서 추정
+            if not column_types:
+                column_types = infer_column_types(conn, parquet_source(staged))
+                if on_column_types is not None:
+                    on_column_types(column_types)
+            # 3단계: 숫자 컬럼 변환 + 파일 내 행 번호를 __row_id로 저장 + 압축
+            def copy_row_numbered(replace: str):
+                conn.execute(
+                    f"COPY (SELECT file_row_number AS {quote_ident(ROW_ID_COLUMN)}, * EXCLUDE (file_row_number) {replace} "
+                    f"FROM read_parquet({quote_literal(str(staged))}, file_row_number=true) "
+                    f"ORDER BY file_row_number) "
+                    f"TO {quote_literal(str(tmp))} "
+                    f"(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {ROW_GROUP_SIZE})"
+                )
+
+            try:
+                copy_row_numbered(replace_clause(column_types))
+            except duckdb.InterruptException:
+                raise
+            except duckdb.Error as e:
+                # 카탈로그와 맞지 않는 값이 있으면 전체 문자열로라도 저장 (CSV 재파싱 없이 사본에서)
+                logger.warning("[Sidecar] Typed conversion failed for %s, storing as VARCHAR: %s", dataset_id, e)
+                copy_row_numbered("")
+
+        _remove_stale(dataset_id, keep=target)
+        logger.info("[Sidecar] Built %s for dataset %s", target.name, dataset_id)
+        return target
+
+
+def prune_sidecars(dataset_ids: Set[str]):
+    """레지스트리에 없는 데이터셋(CSV 삭제 등)의 sidecar 삭제"""
+    if not SIDECAR_DIR.exists():
+        return
+    for path in SIDECAR_DIR.glob("*.parquet"):
+        dataset_id = path.name.split(".")[0].rsplit("_", 1)[0]
+        if dataset_id not in dataset_ids:
+            try:
+                path.unlink()
+            except OSError:
+                pass
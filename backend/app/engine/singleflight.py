@@ -0,0 +1,139 @@
+"""요청 합치기(single-flight) + 짧은 TTL 결과 캐시
+
+같은 데이터셋을 여러 사용자가 동시에 열거나 프론트엔드가 같은 요청을 중복으로 보내면
+동일한 preview/stats 쿼리가 각각 DuckDB 스캔을 실행한다.
+같은 key의 계산이 이미 진행 중이면 새로 실행하지 않고 그 결과를 기다려서 함께 받고,
+끝난 결과는 RESULT_CACHE_TTL초 동안 재사용한다.
+
+key에는 CSV fingerprint(파일명 + 크기 + mtime)를 넣어서 CSV가 바뀌면 자동으로 다른 key가 된다.
+캐시된 결과는 여러 요청이 공유하므로 호출하는 쪽에서 수정하면 안 된다.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..core.settings import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL
+from .sidecar import file_fingerprint
+
+
+class _Call:
+    """진행 중인 계산 (같은 key를 기다리는 요청들이 공유)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """동일 key 동시 요청 합치기 + TTL 결과 캐시"""
+
+    def __init__(self, ttl: float = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # key -> (만료 시각, 결과)
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self._hits = 0  # TTL 캐시에서 응답
+        self._coalesced = 0  # 진행 중인 계산에 합류
+        self._misses = 0  # 새로 계산
+
+    def do(self, key: Hashable, fn: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        key에 대한 결과 반환 (캐시 → 진행 중인 계산 합류 → 새로 계산 순)
+        fn이 예외를 던지면 기다리던 요청 모두에게 같은 예외를 전달하고 캐시하지 않음
+        cacheable(result)가 False면 기다리던 요청에는 전달하지만 TTL 캐시에는 넣지 않음
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._results.move_to_end(key)
+                    self._hits += 1
+                    return cached[1]
+                del self._results[key]
+
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._misses += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.error is None and self._ttl > 0 and (cacheable is None or cacheable(call.result)):
+                    self._results[key] = (time.monotonic() + self._ttl, call.result)
+                    self._results.move_to_end(key)
+                    while len(self._results) > self._max_entries:
+                        self._results.popitem(last=False)
+            call.done.set()
+        return call.result
+
+    def clear(self):
+        """결과 캐시 비우기 (진행 중인 계산은 그대로)"""
+        with self._lock:
+            self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._results),
+                "in_flight": len(self._calls),
+                "ttl": self._ttl,
+                "hits": self._hits,
+                "coalesced": self._coalesced,
+                "misses": self._misses,
+            }
+
+
+# 전역 인스턴스 (싱글톤 패턴)
+_singleflight = SingleFlight()
+
+
+def get_singleflight() -> SingleFlight:
+    """전역 single-flight 인스턴스 반환"""
+    return _singleflight
+
+
+def coalesce(
+    kind: str,
+    dataset_id: str,
+    csv_path: str,
+    params: Tuple,
+    fn: Callable[[], Any],
+    cacheable: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    (kind, dataset_id, CSV fingerprint, params)를 key로 fn 결과 공유
+    CSV가 없어서 fingerprint를 만들 수 없으면 그냥 실행
+    """
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return fn()
+    return _singleflight.do((kind, dataset_id, fingerprint, params), fn, cacheable)
+
+
+def metrics_ok(metrics: Dict[str, Dict[str, Any]]) -> bool:
+    """컬럼별 메트릭에 error가 없는지 (쿼리 실패 결과는 TTL 동안 캐시하지 않음)"""
+    return not any(m.get("error") for m in metrics.values())
@@ -0,0 +1,13 @@
+"""SQL 문자열 헬퍼"""
+
+
+def quote_ident(name: str) -> str:
+    """식별자 따옴표 처리"""
+    escaped = name.replace('"', '""')
+    return f'"{escaped}"'
+
+
+def quote_literal(value: str) -> str:
+    """문자열 리터럴 따옴표 처리 (파일 경로 등)"""
+    escaped = value.replace("'", "''")
+    return f"'{escaped}'"
@@ -0,0 +1,159 @@
+"""전체 파일 통계 인덱스 - ingest 시 한 번 계산해서 저장
+
+row_range 없는 통계 요청(전체 파일)은 매번 COUNT/MIN/MAX/AVG/STDDEV를 다시 계산할 필요가 없다.
+CSV 버전(크기 + mtime)마다 모든 컬럼 통계를 `metadata/stats/{dataset_id}.json`에 저장해 두고,
+API는 CSV 버전이 일치할 때만 인덱스로 응답한다 (불일치 시 compute_metrics로 fallback).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..core.fileio import write_json_atomic
+from ..core.settings import STATS_INDEX_DIR
+from .duckdb_cache import OnConnection
+from .duckdb_engine import compute_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _source_version(csv_path: str) -> Optional[Dict[str, int]]:
+    """CSV 버전 정보 (파일이 없으면 None)"""
+    try:
+        st = Path(csv_path).stat()
+    except OSError:
+        return None
+    return {"size_bytes": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def index_path(dataset_id: str) -> Path:
+    """데이터셋 통계 인덱스 파일 경로"""
+    return STATS_INDEX_DIR / f"{dataset_id}.json"
+
+
+def _read_index(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def build_stats_index(
+    dataset_id: str,
+    csv_path: str,
+    columns: List[str],
+    force: bool = False,
+    on_connection: Optional[OnConnection] = None,
+) -> Optional[Path]:
+    """
+    전체 파일 통계 인덱스 생성 (같은 CSV 버전의 인덱스가 있으면 건너뜀)
+    Returns: 인덱스 파일 경로 (CSV가 없거나 계산 실패 시 None)
+    """
+    version = _source_version(csv_path)
+    if version is None or not columns:
+        return None
+
+    path = index_path(dataset_id)
+    existing = _read_index(path)
+    if (
+        not force
+        and existing is not None
+        and existing.get("source") == version
+        and set(columns) <= set(existing.get("metrics", {}))
+    ):
+        return path
+
+    metrics = compute_metrics(csv_path, columns, dataset_id=dataset_id, on_connection=on_connection)
+    failed = [c for c, m in metrics.items() if m.get("error")]
+    if failed:
+        logger.warning("[Stats Index] Skipped %s: %s", dataset_id, metrics[failed[0]]["error"])
+        return None
+
+    write_json_atomic(path, {
+        "dataset_id": dataset_id,
+        "source": version,
+        "metrics": metrics,
+    })
+    get_stats_index().invalidate(dataset_id)
+    logger.info("[Stats Index] Built %s (%d columns)", path.name, len(columns))
+    return path
+
+
+def prune_stats_index(dataset_ids: Set[str]):
+    """레지스트리에 없는 데이터셋의 통계 인덱스 삭제"""
+    if not STATS_INDEX_DIR.exists():
+        return
+    for path in STATS_INDEX_DIR.glob("*.json"):
+        if path.stem not in dataset_ids:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            get_stats_index().invalidate(path.stem)
+
+
+class StatsIndex:
+    """통계 인덱스 메모리 캐시 (인덱스 파일이 바뀌면 다시 읽음)"""
+
+    def __init__(self):
+        # dataset_id -> (인덱스 파일 mtime_ns, 인덱스 내용)
+        self._entries: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        path = index_path(dataset_id)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except OSError:
+            self.invalidate(dataset_id)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(dataset_id)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+
+        data = _read_index(path)
+        if data is None:
+            return None
+        with self._lock:
+            self._entries[dataset_id] = (mtime_ns, data)
+        return data
+
+    def lookup(
+        self,
+        dataset_id: str,
+        csv_path: str,
+        columns: List[str],
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        전체 파일 통계 조회
+        Returns: 컬럼별 메트릭 (인덱스가 없거나 CSV 버전이 다르거나 컬럼이 빠져 있으면 None)
+        """
+        data = self._load(dataset_id)
+        if data is None or data.get("source") != _source_version(csv_path):
+            return None
+        metrics = data.get("metrics", {})
+        if any(c not in metrics for c in columns):
+            return None
+        return {c: dict(metrics[c]) for c in columns}
+
+    def invalidate(self, dataset_id: Optional[str] = None):
+        """메모리 캐시 무효화 (dataset_id가 없으면 전체)"""
+        with self._lock:
+            if dataset_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(dataset_id, None)
+
+
+# 전역 인스턴스 (싱글톤 패턴)
+_stats_index = StatsIndex()
+
+
+def get_stats_index() -> StatsIndex:
+    """전역 통계 인덱스 반환"""
+    return _stats_index
@@ -0,0 +1,138 @@
+"""레시피 step 구간 인덱스 - 연속된 같은 step 행의 경계
+
+ALD trace는 레시피 step(`Step ID`, `Step Name`) 순서로 기록된다.
+같은 step 값이 연속된 행 구간(segment)을 ingest 시 한 번 계산해서
+sidecar 옆에 `{dataset_id}_{fingerprint}.steps.parquet`로 저장한다.
+(같은 step이 나중에 다시 나오면 별도 구간)
+
+구간 경계는 "행 번호 - step 안에서의 순번"이 구간마다 일정하다는 점을 이용해
+윈도 함수 한 번으로 계산한다.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+
+from ..core.fileio import replace_on_success
+from ..core.settings import SIDECAR_DIR, STEP_ID_COLUMN, STEP_NAME_COLUMN
+from .sidecar import ROW_ID_COLUMN, OnConnection, build_connection, file_fingerprint, sidecar_path
+from .sql import quote_ident, quote_literal
+
+logger = logging.getLogger(__name__)
+
+# StatsRequest.group_by 특수 값: step 구간별 통계
+STEP_GROUP = "step"
+
+
+def step_columns(columns: List[str]) -> List[str]:
+    """데이터셋에 있는 step 컬럼 (Step ID, Step Name 순서)"""
+    return [c for c in (STEP_ID_COLUMN, STEP_NAME_COLUMN) if c in columns]
+
+
+def key_alias(i: int) -> str:
+    """인덱스 파일의 i번째 step 컬럼 이름 (원본 컬럼과 이름이 겹치지 않게)"""
+    return f"__key_{i}"
+
+
+def segments_query(source: str, row_id: str, keys: List[str]) -> str:
+    """
+    step 구간 계산 쿼리
+    Returns: __key_0.., row_start, row_end (row_end는 구간 끝 + 1) - row_start 순
+    """
+    key_list = ", ".join(quote_ident(k) for k in keys)
+    key_select = ", ".join(f"{quote_ident(k)} AS {key_alias(i)}" for i, k in enumerate(keys))
+    return f"""
+    SELECT {key_select}, MIN({row_id}) AS row_start, MAX({row_id}) + 1 AS row_end
+    FROM (
+        SELECT {key_list}, {row_id},
+               {row_id} - ROW_NUMBER() OVER (PARTITION BY {key_list} ORDER BY {row_id}) AS __segment
+        FROM {source}
+    )
+    GROUP BY {key_list}, __segment
+    ORDER BY row_start
+    """
+
+
+def step_index_path(dataset_id: str, fingerprint: str) -> Path:
+    """sidecar 버전에 대응하는 step 구간 인덱스 경로"""
+    return SIDECAR_DIR / f"{dataset_id}_{fingerprint}.steps.parquet"
+
+
+def find_step_index(dataset_id: str, csv_path: str) -> Optional[Path]:
+    """현재 CSV 버전에 맞는 step 구간 인덱스가 있으면 경로 반환"""
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    path = step_index_path(dataset_id, fingerprint)
+    return path if path.exists() else None
+
+
+def build_step_index(
+    dataset_id: str, csv_path: str, force: bool = False, on_connection: Optional[OnConnection] = None
+) -> Optional[Path]:
+    """
+    sidecar에서 step 구간 인덱스 생성 (이미 최신이면 재사용)
+    Returns: 인덱스 경로 (sidecar가 없거나 step 컬럼이 없으면 None)
+    """
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    source = sidecar_path(dataset_id, fingerprint)
+    if not source.exists():
+        return None
+    target = step_index_path(dataset_id, fingerprint)
+    if target.exists() and not force:
+        return target
+
+    source_sql = f"read_parquet({quote_literal(str(source))})"
+    with replace_on_success(target) as tmp, build_connection(on_connection) as conn:
+        described = conn.execute(f"DESCRIBE SELECT * FROM {source_sql}").fetchall()
+        keys = step_columns([row[0] for row in described])
+        if not keys:
+            return None
+        query = segments_query(source_sql, quote_ident(ROW_ID_COLUMN), keys)
+        conn.execute(f"COPY ({query}) TO {quote_literal(str(tmp))} (FORMAT PARQUET)")
+
+    logger.info("[Step Index] Built %s", target.name)
+    return target
+
+
+def _rows_to_segments(rows: List[tuple], keys: List[str]) -> List[Dict[str, Any]]:
+    n = len(keys)
+    return [
+        {
+            "key": dict(zip(keys, row[:n])),
+            "row_start": int(row[n]),
+            "row_end": int(row[n + 1]),
+        }
+        for row in rows
+    ]
+
+
+def load_step_segments(
+    conn: duckdb.DuckDBPyConnection,
+    view_query: str,
+    keys: List[str],
+    index_path: Optional[Path] = None,
+    row_indexed: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    step 구간 목록 (인덱스가 있으면 인덱스, 없으면 View에서 계산)
+    Returns: [{"key": {step 컬럼: 값}, "row_start", "row_end"}, ...]
+    """
+    if index_path is not None:
+        rows = conn.execute(
+            f"SELECT * FROM read_parquet({quote_literal(str(index_path))}) ORDER BY row_start"
+        ).fetchall()
+        return _rows_to_segments(rows, keys)
+
+    if row_indexed:
+        source, row_id = view_query, quote_ident(ROW_ID_COLUMN)
+    else:
+        # CSV View에는 행 번호가 없으므로 읽은 순서대로 번호를 붙임
+        source, row_id = f"(SELECT ROW_NUMBER() OVER () - 1 AS __rn, * FROM {view_query})", "__rn"
+    rows = conn.execute(segments_query(source, row_id, keys)).fetchall()
+    return _rows_to_segments(rows, keys)
@@ -0,0 +1,155 @@
+"""시간 인덱스 - Date + Time 문자열을 timestamp로 합친 정렬 인덱스
+
+trace는 `Date`, `Time` 문자열 컬럼이 따로 있어서 시간 구간으로 자르려면 매번 전체 행을
+파싱해야 한다. ingest 시 sidecar에서 한 번 파싱해서
+`{dataset_id}_{fingerprint}.ts.parquet` (`__ts`, `__row_id`, timestamp 순 정렬)로 저장하고,
+요청 시에는 메모리에 올린 배열에서 이진 탐색으로 time_range → 행 범위를 구한다.
+
+time_range는 [start, end) 구간이며, 해당 시각의 행들을 모두 포함하는 행 범위로 변환된다.
+(trace는 시간 순서로 기록되므로 보통 정확히 그 구간의 행들과 같다)
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import duckdb
+import numpy as np
+
+from ..core.fileio import replace_on_success
+from ..core.settings import DATE_COLUMN, SIDECAR_DIR, TIME_COLUMN, TIMESTAMP_FORMATS
+from .sidecar import ROW_ID_COLUMN, OnConnection, build_connection, file_fingerprint, sidecar_path
+from .sql import quote_ident, quote_literal
+
+logger = logging.getLogger(__name__)
+
+# 인덱스 파일의 timestamp 컬럼
+TS_COLUMN = "__ts"
+# 메모리에 올려두는 인덱스 수 (300k행 인덱스 ≈ 5MB)
+_MAX_LOADED = 16
+
+
+def timestamp_expr(columns: List[str]) -> Optional[str]:
+    """
+    Date + Time 컬럼을 TIMESTAMP로 파싱하는 SQL 식 (TIMESTAMP_FORMATS 순서로 시도, 실패하면 NULL)
+    Date 컬럼이 없으면 None, Time 컬럼이 없으면 Date 컬럼만 파싱
+    """
+    if DATE_COLUMN not in columns:
+        return None
+    text = f"CAST({quote_ident(DATE_COLUMN)} AS VARCHAR)"
+    if TIME_COLUMN in columns:
+        text = f"{text} || ' ' || CAST({quote_ident(TIME_COLUMN)} AS VARCHAR)"
+    formats = "[" + ", ".join(quote_literal(f) for f in TIMESTAMP_FORMATS) + "]"
+    return f"try_strptime({text}, {formats})"
+
+
+def time_index_path(dataset_id: str, fingerprint: str) -> Path:
+    """sidecar 버전에 대응하는 시간 인덱스 경로"""
+    return SIDECAR_DIR / f"{dataset_id}_{fingerprint}.ts.parquet"
+
+
+def find_time_index(dataset_id: str, csv_path: str) -> Optional[Path]:
+    """현재 CSV 버전에 맞는 시간 인덱스가 있으면 경로 반환"""
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    path = time_index_path(dataset_id, fingerprint)
+    return path if path.exists() else None
+
+
+def build_time_index(
+    dataset_id: str, csv_path: str, force: bool = False, on_connection: Optional[OnConnection] = None
+) -> Optional[Path]:
+    """
+    sidecar에서 시간 인덱스 생성 (이미 최신이면 재사용)
+    Returns: 인덱스 경로 (sidecar가 없거나 Date 컬럼이 없으면 None)
+    """
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        return None
+    source = sidecar_path(dataset_id, fingerprint)
+    if not source.exists():
+        return None
+    target = time_index_path(dataset_id, fingerprint)
+    if target.exists() and not force:
+        return target
+
+    source_sql = f"read_parquet({quote_literal(str(source))})"
+    with replace_on_success(target) as tmp, build_connection(on_connection) as conn:
+        described = conn.execute(f"DESCRIBE SELECT * FROM {source_sql}").fetchall()
+        ts = timestamp_expr([row[0] for row in described])
+        if ts is None:
+            return None
+        row_id = quote_ident(ROW_ID_COLUMN)
+        conn.execute(
+            f"COPY (SELECT * FROM (SELECT {ts} AS {TS_COLUMN}, {row_id} FROM {source_sql}) "
+            f"WHERE {TS_COLUMN} IS NOT NULL ORDER BY {TS_COLUMN}, {row_id}) "
+            f"TO {quote_literal(str(tmp))} (FORMAT PARQUET, COMPRESSION ZSTD)"
+        )
+
+    logger.info("[Time Index] Built %s", target.name)
+    return target
+
+
+def to_micros(value: datetime) -> int:
+    """
+    datetime → 인덱스와 같은 기준의 마이크로초
+    CSV 시각은 timezone 없는 현장 시각이므로 timezone 정보는 무시하고 벽시계 값 그대로 비교
+    """
+    return int(np.datetime64(value.replace(tzinfo=None), "us").astype(np.int64))
+
+
+@dataclass
+class TimeIndex:
+    """timestamp 순으로 정렬된 (timestamp, 행 번호) 배열"""
+    ts: np.ndarray  # int64 마이크로초 (오름차순)
+    rows: np.ndarray  # int64 행 번호
+    in_order: bool  # 행 순서와 시간 순서가 같음 (구간 → 행 범위가 정확히 일치)
+
+    def bounds(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        """[start, end) 시각의 행을 모두 포함하는 행 범위 [row_start, row_end) (없으면 (0, 0))"""
+        lo = 0 if start is None else int(np.searchsorted(self.ts, to_micros(start), side="left"))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, to_micros(end), side="left"))
+        if lo >= hi:
+            return 0, 0
+        if self.in_order:
+            return int(self.rows[lo]), int(self.rows[hi - 1]) + 1
+        selected = self.rows[lo:hi]
+        return int(selected.min()), int(selected.max()) + 1
+
+
+_loaded: "OrderedDict[Path, TimeIndex]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def load_time_index(path: Path) -> TimeIndex:
+    """시간 인덱스 파일을 배열로 읽기 (경로에 fingerprint가 있으므로 경로 기준으로 캐시)"""
+    with _loaded_lock:
+        index = _loaded.get(path)
+        if index is not None:
+            _loaded.move_to_end(path)
+            return index
+
+    conn = duckdb.connect()
+    try:
+        arrays = conn.execute(
+            f"SELECT epoch_us({TS_COLUMN}) AS ts, {quote_ident(ROW_ID_COLUMN)} AS row_id "
+            f"FROM read_parquet({quote_literal(str(path))})"
+        ).fetchnumpy()
+    finally:
+        conn.close()
+    ts = np.asarray(arrays["ts"], dtype=np.int64)
+    rows = np.asarray(arrays["row_id"], dtype=np.int64)
+    index = TimeIndex(ts=ts, rows=rows, in_order=bool(np.all(np.diff(rows) > 0)))
+
+    with _loaded_lock:
+        _loaded[path] = index
+        _loaded.move_to_end(path)
+        while len(_loaded) > _MAX_LOADED:
+            _loaded.popitem(last=False)
+    return index
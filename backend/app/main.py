@@ -1,22 +1,60 @@
 """FastAPI 메인 애플리케이션"""
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from .api.batch import router as batch_router
 from .api.datasets import router as datasets_router
+from .api.jobs import router as jobs_router
 from .api.stats import router as stats_router
+from .api.system import router as system_router
+from .api.virtual import router as virtual_router
 from .core.auto_scan import ensure_metadata
+from .core.profiling import ProfilingMiddleware, configure_logging
+from .core.settings import WATCH_ENABLED
+from .core.watcher import get_watcher
+from .engine.duckdb_cache import PoolTimeout
+from .engine.ingest import stop_background_ingest
+from .engine.shaping import dump_json
+
+configure_logging()
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """기본 JSON 응답 - dump_json으로 직렬화 (serialize span에 시간이 기록됨, 출력 바이트는 JSONResponse와 같음)"""
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
 
 app = FastAPI(
     title="ALDList API",
     description="CSV 데이터 분석 API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ProfiledJSONResponse,
 )
 
 # 서버 시작 시 메타데이터 확인 및 자동 생성
 @app.on_event("startup")
 async def startup_event():
-    """서버 시작 시 메타데이터 자동 확인"""
+    """서버 시작 시 메타데이터 자동 확인 + CSV 변경 감시 시작"""
     ensure_metadata()
+    if WATCH_ENABLED:
+        get_watcher().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """CSV 변경 감시 중지 → 백그라운드 ingest 중지 (DuckDB 쿼리 도중에 프로세스가 끝나면 abort됨)"""
+    await get_watcher().stop()
+    await asyncio.to_thread(stop_background_ingest)
+
+# DuckDB cursor 풀이 가득 찬 경우: 서버 과부하이므로 503 반환 (클라이언트 재시도 가능)
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # CORS 설정
 app.add_middleware(
@@ -25,11 +63,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
+# 요청별 span 시간(Server-Timing 헤더) + /metrics 지표 (가장 바깥에서 전체 시간 측정)
+app.add_middleware(ProfilingMiddleware)
+
 # 라우터 등록
 app.include_router(datasets_router)
 app.include_router(stats_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
+app.include_router(system_router)
+app.include_router(virtual_router)
 
 
 @app.get("/")
@@ -43,7 +89,13 @@ def root():
             "datasets": "/api/datasets",
             "preview": "/api/datasets/{dataset_id}/preview",
             "stats": "/api/datasets/{dataset_id}/stats",
-            "columns": "/api/datasets/{dataset_id}/columns"
+            "stats_jobs": "/api/datasets/{dataset_id}/stats/jobs",
+            "stats_batch": "/api/stats/batch",
+            "virtual_datasets": "/api/virtual-datasets",
+            "columns": "/api/datasets/{dataset_id}/columns",
+            "cache_stats": "/api/cache/stats",
+            "profile": "/api/profile/requests",
+            "metrics": "/metrics"
         }
     }
 
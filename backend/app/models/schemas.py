@@ -1,8 +1,14 @@
 """API 스키마 정의"""
-from typing import List, Optional, Union
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
 
 
+class Histogram(BaseModel):
+    edges: List[float]  # 구간 경계 (len(counts) + 1개, 컬럼 전체 파일의 [min, max] 기준)
+    counts: List[int]
+
+
 class Metric(BaseModel):
     count: Optional[int] = None
     non_null_count: Optional[int] = None
@@ -11,6 +17,19 @@ class Metric(BaseModel):
     avg: Optional[float] = None
     stddev: Optional[float] = None
     error: Optional[str] = None
+    # mode="approx"일 때만: 표본 기반 근사값 여부, 표본 행 수, avg 95% 신뢰구간, 분위수
+    approximate: Optional[bool] = None
+    sample_size: Optional[int] = None
+    avg_ci_low: Optional[float] = None
+    avg_ci_high: Optional[float] = None
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    # metrics로 요청한 경우만: 분위수, 고정 구간 히스토그램, 근사 고유값 수, 범위 안 첫/마지막 값
+    p99: Optional[float] = None
+    histogram: Optional[Histogram] = None
+    distinct_count: Optional[int] = None
+    first: Optional[Union[float, str]] = None
+    last: Optional[Union[float, str]] = None
 
 
 class RowRange(BaseModel):
@@ -18,14 +37,71 @@ class RowRange(BaseModel):
     end: Optional[int] = Field(gt=0, default=None)
 
 
+class TimeRange(BaseModel):
+    # [start, end) 시각 (Date + Time 기준, 생략하면 처음/끝까지)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
 class StatsRequest(BaseModel):
     columns: List[str]  # 전체 컬럼 목록 (유효성 검사용)
     row_range: Optional[RowRange] = None
+    # 시간 구간 (시간 인덱스로 행 범위로 변환, row_range와 함께 주면 두 범위의 교집합)
+    time_range: Optional[TimeRange] = None
     # 확장 포인트: 계산할 컬럼 선택 (없으면 columns 전체 사용)
     compute_columns: Optional[List[str]] = None  # 선택적으로 일부 컬럼만 계산 (None이면 columns 전체)
+    # 그룹별 통계: 컬럼 이름(값별 그룹) 또는 "step"(연속된 step 구간별 그룹)
+    group_by: Optional[str] = None
+    # exact(기본): 모든 행으로 정확히 계산 | approx: 표본 기반 근사값 + 신뢰구간 (큰 파일 탐색용)
+    mode: str = "exact"
+    # 계산할 메트릭 (없으면 count/non_null_count/min/max/avg/stddev)
+    # 예: ["avg", "p50", "p95", "p99", "histogram", "distinct_count", "first", "last"]
+    metrics: Optional[List[str]] = None
+
+
+class GroupStats(BaseModel):
+    key: Dict[str, Any]  # 그룹 기준 컬럼 값 (예: {"Step ID": 3, "Step Name": "Purge"})
+    row_start: int  # 그룹의 첫 행
+    row_end: int  # 그룹의 마지막 행 + 1
+    row_count: int
+    metrics: dict[str, Metric]
 
 
 class StatsResponse(BaseModel):
     metrics: dict[str, Metric]
+    # group_by 요청일 때만: 행 순서대로 그룹별 통계 (metrics는 비어 있음)
+    groups: Optional[List[GroupStats]] = None
+
 
+class BatchStatsRequest(BaseModel):
+    dataset_ids: List[str] = Field(min_length=1)
+    columns: List[str] = Field(min_length=1)
 
+
+class DatasetStats(BaseModel):
+    metrics: dict[str, Metric]
+    # 요청했지만 이 데이터셋에 없는 컬럼
+    missing_columns: List[str] = []
+
+
+class BatchStatsResponse(BaseModel):
+    datasets: dict[str, DatasetStats]
+    not_found: List[str] = []  # 레지스트리에 없는 dataset_id
+
+
+class VirtualDatasetRequest(BaseModel):
+    name: Optional[str] = None
+    dataset_ids: List[str] = []  # 명시적인 멤버
+    pattern: Optional[str] = None  # 파일명 glob (예: "2025-01-*.csv")
+
+
+class VirtualStatsRequest(BaseModel):
+    columns: Optional[List[str]] = None  # None이면 멤버 컬럼 합집합 전체
+    by_dataset: bool = False  # True면 같은 스캔에서 데이터셋별 통계도 계산
+
+
+class VirtualStatsResponse(BaseModel):
+    metrics: dict[str, Metric]
+    # by_dataset=True일 때 dataset_id -> 통계 (데이터셋에 없는 컬럼은 missing_columns)
+    datasets: Optional[dict[str, DatasetStats]] = None
+    members: List[str]
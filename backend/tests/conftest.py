@@ -0,0 +1,40 @@
+"""테스트 공통 설정 - app.core.settings가 import 시점에 환경 변수를 읽으므로 가장 먼저 임시 경로 지정"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(tempfile.mkdtemp(prefix="aldlist-test-"))
+os.environ.setdefault("DATA_DIR", str(_ROOT / "data"))
+os.environ.setdefault("META_DIR", str(_ROOT / "metadata"))
+os.environ.setdefault("CACHE_DIR", str(_ROOT / "cache"))
+os.environ.setdefault("WATCH_ENABLED", "0")
+os.environ.setdefault("RESULT_CACHE_TTL", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def write_trace_csv(path: Path, rows: int, offset: float = 0.0, step_cycle: int = 0) -> Path:
+    """
+    No./Step ID/Step Name/TempAct_U/PressAct 컬럼의 작은 trace CSV (100행마다 다음 step)
+    step_cycle > 0이면 step이 0..step_cycle-1을 반복 (같은 step이 떨어진 구간에 다시 나옴)
+    """
+    lines = ["No.,Step ID,Step Name,TempAct_U,PressAct"]
+    for i in range(rows):
+        step = i // 100 % step_cycle if step_cycle else i // 100
+        press = "" if i % 7 == 3 else f"{(i % 13) * 0.25 + offset:.2f}"
+        lines.append(f"{i + 1},{step},STEP_{step},{500 + (i % 10) * 0.1 + offset:.1f},{press}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def trace_csvs(tmp_path):
+    """(dataset_id, csv_path, rows) 3개"""
+    return [
+        (f"ds_test{i}", str(write_trace_csv(tmp_path / f"trace_{i}.csv", rows, offset=i)), rows)
+        for i, rows in enumerate((1500, 2500, 3500))
+    ]
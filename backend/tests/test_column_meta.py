@@ -0,0 +1,59 @@
+"""패턴 규칙 매칭 - 하나로 합친 정규식과 규칙별 순차 매칭이 같은 규칙/그룹을 반환"""
+import re
+
+import pytest
+
+from app.core.column_meta import (
+    PATTERNS_PATH,
+    PatternMatcher,
+    PatternRule,
+    _load_yaml_cached,
+    _parse_patterns,
+)
+
+
+def _sequential(matcher: PatternMatcher, col: str):
+    for rule in matcher.rules:
+        m = rule.regex.match(col)
+        if m:
+            return rule, tuple(m.groups())
+    return None
+
+
+def _matcher(*patterns: str) -> PatternMatcher:
+    return PatternMatcher({}, [PatternRule(regex=re.compile(p), meta={"i": i}) for i, p in enumerate(patterns)], {})
+
+
+COLUMNS = ["aa", "ab", "X_1", "X_12", "TempAct_U", "MFC3_Flow", "k[1", "k1", "abab", "", "zz"]
+
+
+@pytest.mark.parametrize(
+    "patterns,combined",
+    [
+        (["(X)_(\\d)", "(a)(b)?", "^TempAct_(U|L)$", "MFC(\\d+)_(\\w+)"], True),
+        # 문자 클래스 안의 \1은 8진수 문자 - 역참조가 아님
+        (["(X)_(\\d)", "k[\\1]", "(z)z"], True),
+        # 역참조가 있으면 합치지 않음 (합치면 \1이 첫 규칙의 그룹을 가리킴)
+        (["(X)_(\\d)", "(a)\\1"], False),
+        (["(X)_(\\d)", "(?P<p>ab)(?P=p)"], False),
+        (["(X)_(\\d)", "(a)?(?(1)a|b)"], False),
+    ],
+)
+def test_combined_matches_sequential(patterns, combined):
+    matcher = _matcher(*patterns)
+    assert (matcher._combined is not None) == combined
+    for col in COLUMNS:
+        assert matcher.match(col) == _sequential(matcher, col), col
+
+
+def test_backreference_rule_matches():
+    matcher = _matcher("(X)_(\\d)", "(a)\\1")
+    rule, groups = matcher.match("aa")
+    assert rule.meta == {"i": 1} and groups == ("a",)
+
+
+def test_project_patterns_match_sequential():
+    matcher = PatternMatcher(*_parse_patterns(_load_yaml_cached(PATTERNS_PATH)))
+    assert matcher._combined is not None
+    for col in COLUMNS + ["TempAct_U", "TempSet_CL", "HeaterTC_L", "CascadeTC_C", "Unknown"]:
+        assert matcher.match(col) == _sequential(matcher, col), col
@@ -0,0 +1,67 @@
+"""DuckDB View 캐시 - lease 중인 View는 eviction되어도 쿼리가 끝날 때까지 DROP되지 않음"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.engine.duckdb_cache import DuckDBCache
+
+
+def _view_names(cache: DuckDBCache):
+    with cache.cursor() as conn:
+        return {row[0] for row in conn.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall()}
+
+
+def test_eviction_defers_drop_until_release(trace_csvs):
+    cache = DuckDBCache(pool_size=2, max_datasets=1, pinned=())
+    (id_a, path_a, rows_a), (id_b, path_b, _), _ = trace_csvs
+
+    lease_a = cache.acquire_view(id_a, path_a)
+    with cache.view(id_b, path_b):
+        pass  # A는 예산 초과로 캐시에서 빠짐
+
+    stats = cache.stats()
+    assert stats["lru"] == [id_b]
+    assert stats["evictions"] == 1
+    assert stats["deferred_drops"] == 1
+    # 빌린 View는 아직 쿼리 가능
+    with cache.cursor() as conn:
+        assert conn.execute(f"SELECT COUNT(*) FROM {lease_a.query}").fetchone()[0] == rows_a
+
+    cache.release_view(lease_a)
+    assert lease_a.query not in _view_names(cache)
+
+
+def test_source_change_while_leased(trace_csvs):
+    cache = DuckDBCache(pool_size=2, max_datasets=4, pinned=())
+    dataset_id, path, rows = trace_csvs[0]
+    lease = cache.acquire_view(dataset_id, path)
+    cache.clear_view(dataset_id)  # CSV 변경 감지 등으로 무효화
+    with cache.cursor() as conn:
+        assert conn.execute(f"SELECT COUNT(*) FROM {lease.query}").fetchone()[0] == rows
+    cache.release_view(lease)
+    assert lease.query not in _view_names(cache)
+
+
+def test_eviction_under_concurrent_queries(trace_csvs):
+    """예산 1개, 6 스레드가 3개 데이터셋을 번갈아 조회 - 모든 쿼리가 성공하고 View가 남지 않음"""
+    cache = DuckDBCache(pool_size=6, max_datasets=1, pinned=())
+    barrier = threading.Barrier(6)
+
+    def work(i):
+        if i < 6:
+            barrier.wait()
+        dataset_id, path, rows = trace_csvs[i % len(trace_csvs)]
+        with cache.view(dataset_id, path) as view, cache.cursor() as conn:
+            count, total = conn.execute(
+                f"SELECT COUNT(*), SUM(TRY_CAST(\"TempAct_U\" AS DOUBLE)) FROM {view.query}"
+            ).fetchone()
+        return count == rows and total is not None
+
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(work, range(120)))
+
+    assert all(results)
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert stats["leased"] == 0
+    # 반납이 끝나면 캐시에 남은 항목의 View만 존재
+    assert len(_view_names(cache)) == stats["entries"] == 1
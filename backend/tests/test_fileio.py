@@ -0,0 +1,56 @@
+"""임시 파일 헬퍼 - 성공하면 rename, 실패하거나 쓰지 않으면 target은 그대로, 중단된 실행이 남긴 파일 정리"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.fileio import remove_stale_temp_files, replace_on_success, temp_file
+
+
+def test_replace_on_success(tmp_path):
+    target = tmp_path / "a.parquet"
+    with replace_on_success(target) as tmp:
+        assert tmp.name.startswith(".a.parquet.") and tmp.name.endswith(".tmp")
+        tmp.write_text("new")
+    assert target.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.parquet"]
+
+
+def test_failure_or_no_output_keeps_target(tmp_path):
+    target = tmp_path / "a.parquet"
+    target.write_text("old")
+    with pytest.raises(RuntimeError):
+        with replace_on_success(target) as tmp, temp_file(target, "stage") as staged:
+            assert staged.name.endswith(".stage.tmp")
+            staged.write_text("staged")
+            tmp.write_text("partial")
+            raise RuntimeError("copy failed")
+    with replace_on_success(target):
+        pass
+    assert target.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.parquet"]
+
+
+def test_remove_stale_temp_files(tmp_path):
+    target = tmp_path / "a.parquet"
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_pid = int(finished.stdout)
+    stale = [
+        tmp_path / f".a.parquet.{dead_pid}.1.tmp",
+        tmp_path / f".a.parquet.{dead_pid}.1.stage.tmp",
+        # 이전 실행과 pid가 같아도 이 프로세스가 사용 중이 아니면 삭제
+        tmp_path / f".a.parquet.{os.getpid()}.1.tmp",
+    ]
+    kept = [
+        tmp_path / f".a.parquet.{os.getppid()}.1.tmp",  # 살아 있는 다른 프로세스
+        tmp_path / ".other.json.x1y2z3.tmp",  # write_json_atomic 등 다른 이름
+    ]
+    for path in stale + kept:
+        path.write_text("x")
+
+    with temp_file(target, "stage") as in_use:
+        in_use.write_text("x")
+        assert remove_stale_temp_files(tmp_path) == len(stale)
+        assert in_use.exists()
+    assert sorted(tmp_path.iterdir()) == sorted(kept)
@@ -0,0 +1,101 @@
+"""그룹별 통계 - step 구간(ASOF 조인 / 윈도 함수)과 값별 GROUP BY를 직접 계산한 결과와 비교"""
+import itertools
+
+import duckdb
+import pytest
+
+from app.core.registry import DatasetMeta
+from app.engine import duckdb_cache
+from app.engine.duckdb_engine import compute_grouped_metrics
+from app.engine.sidecar import build_sidecar
+from app.engine.steps import build_step_index, find_step_index
+
+from conftest import write_trace_csv
+
+COLUMNS = ["TempAct_U", "PressAct"]
+STEP_KEYS = ["Step ID", "Step Name"]
+ROW_RANGES = [(0, None), (150, 1234)]
+COLUMN_TYPES = {"No.": "int", "Step ID": "int", "Step Name": "string", "TempAct_U": "double", "PressAct": "double"}
+
+
+class _Registry:
+    """모든 데이터셋에 trace CSV 타입 카탈로그 (sidecar가 없는 CSV View도 ingest 후처럼 타입이 있음)"""
+
+    def get(self, dataset_id):
+        return DatasetMeta(dataset_id, "", "", 0, 0.0, list(COLUMN_TYPES), column_types=COLUMN_TYPES)
+
+
+@pytest.fixture(autouse=True)
+def _catalog(monkeypatch):
+    monkeypatch.setattr(duckdb_cache, "get_registry", _Registry)
+
+
+def _rows(path: str, row_start: int, row_end):
+    """(행 번호, Step ID, Step Name, TempAct_U, PressAct) - 행 범위만"""
+    rows = duckdb.sql(
+        f"SELECT row_number() OVER () - 1, \"Step ID\", \"Step Name\", TempAct_U, PressAct FROM read_csv('{path}')"
+    ).fetchall()
+    return [r for r in rows if r[0] >= row_start and (row_end is None or r[0] < row_end)]
+
+
+def _expected_metrics(rows):
+    metrics = {}
+    for i, col in enumerate(COLUMNS, start=3):
+        values = [r[i] for r in rows if r[i] is not None]
+        metrics[col] = {
+            "count": len(rows),
+            "non_null_count": len(values),
+            "min": min(values),
+            "max": max(values),
+            "avg": sum(values) / len(values),
+        }
+    return metrics
+
+
+def _assert_groups(groups, expected):
+    assert [(g["key"], g["row_start"], g["row_end"], g["row_count"]) for g in groups] == [
+        (key, rows[0][0], rows[-1][0] + 1, len(rows)) for key, rows in expected
+    ]
+    for group, (_, rows) in zip(groups, expected):
+        for col, metric in _expected_metrics(rows).items():
+            actual = group["metrics"][col]
+            for name, value in metric.items():
+                assert actual[name] == pytest.approx(value), (group["key"], col, name)
+
+
+@pytest.fixture
+def cycled_csv(tmp_path):
+    """step 0,1,2가 반복되는 CSV (같은 step 값이 떨어진 여러 구간)"""
+    return str(write_trace_csv(tmp_path / "cycled.csv", 2000, step_cycle=3))
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+@pytest.mark.parametrize("row_start,row_end", ROW_RANGES)
+def test_step_segments_match_direct(trace_csvs, cycled_csv, indexed, row_start, row_end):
+    for dataset_id, path in ((trace_csvs[1][0], trace_csvs[1][1]), ("ds_cycled", cycled_csv)):
+        dataset_id = f"{dataset_id}_{'indexed' if indexed else 'plain'}"
+        if indexed:
+            build_sidecar(dataset_id, path, force=True)
+            assert build_step_index(dataset_id, path, force=True) is not None
+        assert (find_step_index(dataset_id, path) is not None) == indexed
+
+        groups = compute_grouped_metrics(path, COLUMNS, STEP_KEYS, row_start, row_end, dataset_id, segmented=True)
+        rows = _rows(path, row_start, row_end)
+        expected = [
+            (dict(zip(STEP_KEYS, key)), list(segment))
+            for key, segment in itertools.groupby(rows, key=lambda r: (r[1], r[2]))
+        ]
+        _assert_groups(groups, expected)
+
+
+@pytest.mark.parametrize("row_start,row_end", ROW_RANGES)
+def test_value_groups_match_direct(cycled_csv, row_start, row_end):
+    groups = compute_grouped_metrics(cycled_csv, COLUMNS, ["Step ID"], row_start, row_end, "ds_cycled_values")
+    rows = _rows(cycled_csv, row_start, row_end)
+    # 값별 그룹은 떨어진 구간을 합침 - 그룹 순서는 첫 행 순서
+    expected = [
+        ({"Step ID": step}, [r for r in rows if r[1] == step])
+        for step in dict.fromkeys(r[1] for r in rows)
+    ]
+    assert len(groups) == 3
+    _assert_groups(groups, expected)
@@ -0,0 +1,70 @@
+"""백그라운드 ingest - 서버 종료 시 실행 중인 변환을 interrupt하고 스레드가 끝날 때까지 기다림"""
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+from app.engine import ingest
+from app.engine.sidecar import build_connection
+
+from test_jobs import LONG_QUERY
+
+
+class _Meta:
+    def __init__(self, dataset_id, path):
+        self.dataset_id = dataset_id
+        self.path = path
+        self.columns = None
+        self.column_types = {"TempAct_U": "double"}
+
+
+def test_stop_interrupts_running_build(trace_csvs, monkeypatch):
+    started = threading.Event()
+    built = []
+
+    def slow_sidecar(dataset_id, csv_path, force=False, column_types=None, on_column_types=None, on_connection=None):
+        built.append(dataset_id)
+        with build_connection(on_connection) as conn:
+            started.set()
+            conn.execute(LONG_QUERY).fetchone()
+
+    monkeypatch.setattr(ingest, "build_sidecar", slow_sidecar)
+    assert ingest.start_background_ingest(_Meta(d, p) for d, p, _ in trace_csvs)
+    assert started.wait(10)
+    time.sleep(0.05)
+
+    began = time.monotonic()
+    assert ingest.stop_background_ingest(timeout=10)
+    assert time.monotonic() - began < 5
+    # 남은 데이터셋은 시작하지 않음
+    assert built == [trace_csvs[0][0]]
+
+
+def test_server_shutdown_during_ingest_exits_cleanly(tmp_path):
+    """DuckDB 쿼리 도중 프로세스가 끝나면 'terminate called without an active exception'으로 abort됨"""
+    script = textwrap.dedent(f"""
+        import sys
+        from pathlib import Path
+        sys.path[:0] = [{str(Path(__file__).resolve().parents[1])!r}, {str(Path(__file__).resolve().parent)!r}]
+        from conftest import write_trace_csv
+        for i in range(3):
+            write_trace_csv(Path({str(tmp_path / "data")!r}) / f"trace_{{i}}.csv", 200000, offset=i)
+        from fastapi.testclient import TestClient
+        from app.main import app
+        with TestClient(app) as client:
+            client.get("/")
+    """)
+    env = {
+        **os.environ,
+        "DATA_DIR": str(tmp_path / "data"),
+        "META_DIR": str(tmp_path / "metadata"),
+        "CACHE_DIR": str(tmp_path / "cache"),
+        "WATCH_ENABLED": "0",
+    }
+    finished = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=120)
+
+    assert finished.returncode == 0, finished.stderr[-2000:]
+    assert not list((tmp_path / "cache" / "sidecar").glob(".*.tmp"))
@@ -0,0 +1,138 @@
+"""비동기 통계 작업 - 취소, 작업이 끝난 뒤 cursor 상태"""
+import threading
+import time
+from contextlib import contextmanager
+
+import duckdb
+
+from app.engine.duckdb_cache import DuckDBCache
+from app.engine.duckdb_engine import compute_grouped_metrics
+from app.engine.jobs import CANCELLED, DONE, FINISHED_STATES, JobManager
+from app.engine.sampling import compute_approx_metrics
+
+LONG_QUERY = "SELECT SUM(i) FROM range(20000000000) t(i)"
+
+
+def _wait(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _progress_settings(conn):
+    return conn.execute(
+        "SELECT current_setting('enable_progress_bar'), current_setting('enable_progress_bar_print')"
+    ).fetchone()
+
+
+def test_cursor_settings_restored_after_job():
+    cache = DuckDBCache(pool_size=1, max_datasets=0, pinned=())
+    with cache.cursor() as conn:
+        before = _progress_settings(conn)
+
+    def run(on_connection):
+        with cache.cursor(on_connection) as conn:
+            assert _progress_settings(conn) == (True, False)
+            return {"value": conn.execute("SELECT 42").fetchone()[0]}
+
+    manager = JobManager(workers=1, ttl=60)
+    job = manager.submit("ds_test", run)
+    _wait(lambda: job.status in FINISHED_STATES)
+
+    assert job.status == DONE
+    assert job.result == {"value": 42}
+    assert job._conn is None
+    with cache.cursor() as conn:
+        assert _progress_settings(conn) == before
+
+
+def test_cancel_interrupts_running_query():
+    cache = DuckDBCache(pool_size=1, max_datasets=0, pinned=())
+
+    def run(on_connection):
+        with cache.cursor(on_connection) as conn:
+            conn.execute(LONG_QUERY).fetchone()
+        return {}
+
+    manager = JobManager(workers=1, ttl=60)
+    job = manager.submit("ds_test", run)
+    _wait(lambda: job._conn is not None)
+    time.sleep(0.05)
+    assert job.cancel()
+    _wait(lambda: job.status in FINISHED_STATES)
+
+    assert job.status == CANCELLED
+    assert job.result is None
+    assert not job.cancel()  # 이미 끝난 작업
+    # interrupt된 cursor는 풀로 돌아와서 다음 요청이 그대로 사용
+    with cache.cursor() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_cancel_after_query_does_not_touch_returned_cursor():
+    """작업이 cursor를 반납한 뒤의 취소는 같은 cursor를 빌린 다른 요청을 interrupt하지 않음"""
+    cache = DuckDBCache(pool_size=1, max_datasets=0, pinned=())
+    released = threading.Event()
+    proceed = threading.Event()
+
+    def run(on_connection):
+        with cache.cursor(on_connection) as conn:
+            conn.execute("SELECT 1").fetchone()
+        released.set()
+        proceed.wait(10)
+        return {}
+
+    manager = JobManager(workers=1, ttl=60)
+    job = manager.submit("ds_test", run)
+    assert released.wait(10)
+
+    outcome = {}
+
+    def other_request():
+        with cache.cursor() as conn:  # pool_size=1이라 작업이 쓰던 cursor
+            try:
+                outcome["value"] = conn.execute("SELECT SUM(i) FROM range(300000000) t(i)").fetchone()[0]
+            except duckdb.InterruptException:
+                outcome["interrupted"] = True
+
+    thread = threading.Thread(target=other_request)
+    thread.start()
+    time.sleep(0.02)
+    job.cancel()
+    thread.join(30)
+    proceed.set()
+    _wait(lambda: job.status in FINISHED_STATES)
+
+    assert "interrupted" not in outcome
+    assert outcome["value"] == 300000000 * (300000000 - 1) // 2
+    assert job.status == CANCELLED
+
+
+def test_approx_metrics_attach_cursor(trace_csvs):
+    _, path, rows = trace_csvs[0]
+    attached = []
+
+    @contextmanager
+    def on_connection(conn):
+        attached.append(conn)
+        yield
+
+    metrics = compute_approx_metrics(path, ["TempAct_U"], 0, None, on_connection=on_connection)
+    assert attached
+    assert metrics["TempAct_U"]["count"] == rows
+
+
+def test_grouped_metrics_attach_cursor(trace_csvs):
+    """group_by 작업도 cursor를 등록해서 DELETE로 interrupt 가능"""
+    _, path, rows = trace_csvs[0]
+    attached = []
+
+    @contextmanager
+    def on_connection(conn):
+        attached.append(conn)
+        yield
+
+    groups = compute_grouped_metrics(path, ["TempAct_U"], ["Step ID"], on_connection=on_connection)
+    assert attached
+    assert sum(g["row_count"] for g in groups) == rows
@@ -0,0 +1,175 @@
+"""병합 가능한 부분 상태 - 블록별 상태를 합친 결과가 범위 전체를 직접 계산한 값과 같은지"""
+import math
+
+import duckdb
+import numpy as np
+import pytest
+
+from app.core.settings import METRIC_DISTINCT_SKETCH_SIZE
+from app.engine import block_index, metrics
+from app.engine.block_index import PartialState, build_block_index
+from app.engine.duckdb_engine import compute_metrics
+from app.engine.metrics import (
+    STATE_SPECS,
+    DistinctSketch,
+    QuantileSketch,
+    QUANTILE_GRID,
+    compute_state_metrics,
+    get_state_cache,
+)
+from app.engine.sidecar import build_sidecar
+
+BLOCK_SIZE = 256
+ROW_RANGES = [(0, None), (100, 3300), (256, 1024), (7, 200)]
+RANK_TOLERANCE = 0.03
+
+
+def _partial(values: np.ndarray) -> PartialState:
+    finite = values[~np.isnan(values)]
+    if len(finite) == 0:
+        return PartialState(non_null=0)
+    return PartialState(
+        non_null=len(finite),
+        min=float(finite.min()),
+        max=float(finite.max()),
+        num_count=len(finite),
+        sum=float(finite.sum()),
+        m2=float(((finite - finite.mean()) ** 2).sum()),
+    )
+
+
+def _chunks(values: np.ndarray, rng: np.random.Generator):
+    cuts = np.sort(rng.choice(np.arange(1, len(values)), size=15, replace=False))
+    return np.split(values, cuts)
+
+
+def test_partial_state_merge_matches_direct():
+    rng = np.random.default_rng(0)
+    values = rng.normal(500.0, 3.0, 5000)
+    values[rng.choice(len(values), 300, replace=False)] = np.nan
+    chunks = _chunks(values, rng)
+
+    merged = PartialState()
+    for i in rng.permutation(len(chunks)):
+        merged.merge(_partial(chunks[i]))
+    result = merged.to_metrics(len(values))
+
+    finite = values[~np.isnan(values)]
+    assert result["count"] == len(values)
+    assert result["non_null_count"] == len(finite)
+    assert result["min"] == pytest.approx(finite.min())
+    assert result["max"] == pytest.approx(finite.max())
+    assert result["avg"] == pytest.approx(finite.mean(), rel=1e-12)
+    assert result["stddev"] == pytest.approx(finite.std(ddof=1), rel=1e-9)
+
+
+def test_quantile_merge_close_to_direct():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0.0, 100.0, 20000)
+    sketches = [
+        QuantileSketch(points=np.quantile(chunk, QUANTILE_GRID), count=len(chunk))
+        for chunk in _chunks(values, rng)
+    ]
+    merged = STATE_SPECS["quantiles"].combine(sketches)
+
+    assert merged.count == len(values)
+    for q in (0.05, 0.5, 0.95, 0.99):
+        assert merged.quantile(q) == pytest.approx(np.quantile(values, q), abs=1.0)
+
+
+def test_distinct_merge_equals_sketch_of_union():
+    rng = np.random.default_rng(2)
+    k = METRIC_DISTINCT_SKETCH_SIZE
+    hashes = rng.integers(0, 2 ** 63, size=k * 20, dtype=np.uint64) * np.uint64(2)
+    chunks = _chunks(hashes, rng)
+    sketches = [DistinctSketch(hashes=np.unique(chunk)[:k]) for chunk in chunks]
+
+    merged = STATE_SPECS["distinct"].combine(sketches)
+    np.testing.assert_array_equal(merged.hashes, np.unique(hashes)[:k])
+    estimate = metrics._finalize_distinct(merged)
+    assert abs(estimate - len(np.unique(hashes))) < 4 * len(hashes) / math.sqrt(k)
+
+    # 고유값이 K개 미만이면 정확
+    small = [DistinctSketch(hashes=np.unique(chunk)) for chunk in _chunks(hashes[: k // 2], rng)]
+    assert metrics._finalize_distinct(STATE_SPECS["distinct"].combine(small)) == len(np.unique(hashes[: k // 2]))
+
+
+def test_first_last_merge_picks_edge_rows():
+    states = [(40, "b"), (7, "a"), (93, "c")]
+    assert STATE_SPECS["first"].combine(states) == (7, "a")
+    assert STATE_SPECS["last"].combine(states) == (93, "c")
+
+
+@pytest.fixture
+def blocked_dataset(trace_csvs, monkeypatch):
+    """sidecar + BLOCK_SIZE행 블록 인덱스가 있는 데이터셋 (블록 상태 캐시는 비운 상태)"""
+    monkeypatch.setattr(block_index, "STATS_BLOCK_SIZE", BLOCK_SIZE)
+    monkeypatch.setattr(metrics, "STATS_BLOCK_SIZE", BLOCK_SIZE)
+    dataset_id, path, rows = trace_csvs[2]
+    dataset_id = f"{dataset_id}_blocks"
+    build_sidecar(dataset_id, path, force=True)
+    assert build_block_index(dataset_id, path, force=True) is not None
+    get_state_cache().clear()
+    yield dataset_id, path, rows
+    get_state_cache().clear()
+
+
+def _direct(path: str, sql: str, row_start: int, row_end):
+    """CSV 원본에서 행 범위를 직접 집계 (블록/캐시 없이)"""
+    row_end = 10 ** 9 if row_end is None else row_end
+    return duckdb.sql(
+        f"SELECT {sql} FROM (SELECT *, row_number() OVER () - 1 AS __rn FROM read_csv('{path}')) "
+        f"WHERE __rn >= {row_start} AND __rn < {row_end}"
+    ).fetchone()
+
+
+@pytest.mark.parametrize("row_start,row_end", ROW_RANGES)
+def test_block_moments_match_direct(blocked_dataset, row_start, row_end):
+    dataset_id, path, _ = blocked_dataset
+    result = compute_metrics(path, ["TempAct_U", "PressAct"], row_start, row_end, dataset_id=dataset_id)
+    for col in ("TempAct_U", "PressAct"):
+        count, non_null, lo, hi, avg, stddev = _direct(
+            path, f'COUNT(*), COUNT("{col}"), MIN("{col}"), MAX("{col}"), AVG("{col}"), STDDEV("{col}")',
+            row_start, row_end,
+        )
+        metric = result[col]
+        assert (metric["count"], metric["non_null_count"]) == (count, non_null)
+        assert metric["min"] == pytest.approx(lo)
+        assert metric["max"] == pytest.approx(hi)
+        assert metric["avg"] == pytest.approx(avg, rel=1e-12)
+        assert metric["stddev"] == pytest.approx(stddev, rel=1e-9)
+
+
+@pytest.mark.parametrize("row_start,row_end", ROW_RANGES)
+def test_block_states_match_direct(blocked_dataset, row_start, row_end):
+    dataset_id, path, _ = blocked_dataset
+    names = ["p50", "p95", "distinct_count", "first", "last"]
+    # 두 번째 호출은 캐시된 블록 상태를 합침
+    for attempt in range(2):
+        result = compute_state_metrics(path, ["TempAct_U", "PressAct"], names, row_start, row_end, dataset_id)
+        if row_end is None or row_end - row_start >= 2 * BLOCK_SIZE:
+            assert get_state_cache().stats()["hits" if attempt else "states"] > 0
+        for col in ("TempAct_U", "PressAct"):
+            (distinct,) = _direct(path, f'COUNT(DISTINCT "{col}")', row_start, row_end)
+            first, last = _direct(
+                path, f'arg_min("{col}", __rn) FILTER (WHERE "{col}" IS NOT NULL), '
+                      f'arg_max("{col}", __rn) FILTER (WHERE "{col}" IS NOT NULL)',
+                row_start, row_end,
+            )
+            metric = result[col]
+            # 분위수 스케치는 근사 - 결과 양쪽의 실제 값이 정확한 분포에서 순위 q ± RANK_TOLERANCE인 값 사이
+            # (이산 컬럼은 인접한 두 값 사이로 보간된 값이 나올 수 있음)
+            for name, q in (("p50", 0.5), ("p95", 0.95)):
+                value = metric[name]
+                lo, hi, floor, ceil = _direct(
+                    path,
+                    f'quantile_disc("{col}", {max(q - RANK_TOLERANCE, 0.0)!r}), '
+                    f'quantile_disc("{col}", {min(q + RANK_TOLERANCE, 1.0)!r}), '
+                    f'MAX("{col}") FILTER (WHERE "{col}" <= {value!r}), '
+                    f'MIN("{col}") FILTER (WHERE "{col}" >= {value!r})',
+                    row_start, row_end,
+                )
+                assert lo <= ceil and floor <= hi
+            assert metric["distinct_count"] == distinct
+            assert metric["first"] == pytest.approx(first)
+            assert metric["last"] == pytest.approx(last)
@@ -0,0 +1,109 @@
+"""근사 통계 - 저장된 표본 / 좁은 범위 재표본의 신뢰구간, 표본이 없으면 정확히 계산"""
+import math
+
+import duckdb
+import pytest
+
+from app.engine import sampling
+from app.engine.duckdb_engine import compute_metrics
+from app.engine.sampling import Z_95, build_sample, compute_approx_metrics
+from app.engine.sidecar import build_sidecar, parquet_row_count
+
+COLUMNS = ["TempAct_U", "PressAct"]
+SAMPLE_FILE_ROWS = 500
+SAMPLE_ROWS = 200
+MIN_INDEXED_SAMPLE = 100
+
+
+def test_approx_without_sample_is_exact(trace_csvs):
+    dataset_id, path, rows = trace_csvs[2]
+    columns = ["TempAct_U", "PressAct"]
+
+    approx = compute_approx_metrics(path, columns, 0, None, dataset_id=dataset_id)
+    exact = compute_metrics(path, columns, 0, None, dataset_id=dataset_id)
+
+    for col in columns:
+        assert approx[col]["approximate"] is False
+        assert approx[col]["count"] == rows
+        assert {k: v for k, v in approx[col].items() if k != "approximate"} == exact[col]
+
+
+@pytest.fixture
+def sampled_dataset(trace_csvs, monkeypatch):
+    """sidecar + SAMPLE_FILE_ROWS행 표본이 있는 3500행 데이터셋"""
+    monkeypatch.setattr(sampling, "STATS_SAMPLE_FILE_ROWS", SAMPLE_FILE_ROWS)
+    monkeypatch.setattr(sampling, "STATS_SAMPLE_ROWS", SAMPLE_ROWS)
+    monkeypatch.setattr(sampling, "MIN_INDEXED_SAMPLE", MIN_INDEXED_SAMPLE)
+    dataset_id, path, rows = trace_csvs[2]
+    dataset_id = f"{dataset_id}_sampled"
+    sidecar = build_sidecar(dataset_id, path, force=True)
+    sample = build_sample(dataset_id, path, force=True)
+    assert sample is not None
+    return dataset_id, path, rows, sidecar, sample
+
+
+def _direct_avg(path: str, col: str, row_start: int, row_end: int) -> float:
+    return duckdb.sql(
+        f"SELECT AVG(\"{col}\") FROM (SELECT *, row_number() OVER () - 1 AS __rn FROM read_csv('{path}')) "
+        f"WHERE __rn >= {row_start} AND __rn < {row_end}"
+    ).fetchone()[0]
+
+
+def test_build_sample_reservoir(sampled_dataset, trace_csvs, monkeypatch):
+    _, _, rows, sidecar, sample = sampled_dataset
+    row_ids = [r[0] for r in duckdb.sql(f"SELECT __row_id FROM read_parquet('{sample}')").fetchall()]
+    assert len(row_ids) == SAMPLE_FILE_ROWS
+    assert row_ids == sorted(set(row_ids))
+    assert 0 <= row_ids[0] and row_ids[-1] < rows
+    # 전체에 고르게 퍼짐 (앞/뒤 절반 모두 포함)
+    assert 0.3 < sum(r < rows / 2 for r in row_ids) / len(row_ids) < 0.7
+    assert parquet_row_count(duckdb.connect(), sidecar) == rows
+
+    # 표본 크기 이하의 작은 파일은 표본을 만들지 않음
+    small_id, small_path, _ = trace_csvs[0]
+    build_sidecar(f"{small_id}_small", small_path, force=True)
+    monkeypatch.setattr(sampling, "STATS_SAMPLE_FILE_ROWS", 2000)
+    assert build_sample(f"{small_id}_small", small_path, force=True) is None
+
+
+@pytest.mark.parametrize(
+    "row_start,row_end,resampled",
+    [
+        (0, None, False),  # 저장된 표본 전체
+        (500, 3000, False),  # 저장된 표본 중 범위 안 행
+        (1000, 1600, True),  # 범위 안 표본이 MIN_INDEXED_SAMPLE보다 적음 → 범위에서 재표본
+    ],
+)
+def test_approx_metrics_cover_true_mean(sampled_dataset, row_start, row_end, resampled):
+    dataset_id, path, rows, _, sample = sampled_dataset
+    end = rows if row_end is None else row_end
+    in_range = duckdb.sql(
+        f"SELECT COUNT(*) FROM read_parquet('{sample}') WHERE __row_id >= {row_start} AND __row_id < {end}"
+    ).fetchone()[0]
+    assert (in_range < MIN_INDEXED_SAMPLE) == resampled
+
+    approx = compute_approx_metrics(path, COLUMNS, row_start, row_end, dataset_id=dataset_id)
+    for col in COLUMNS:
+        metric = approx[col]
+        assert metric["approximate"] is True
+        assert metric["count"] == end - row_start
+        assert metric["sample_size"] == (SAMPLE_ROWS if resampled else in_range)
+        assert metric["avg_ci_low"] < metric["avg_ci_high"]
+        assert metric["avg_ci_low"] <= _direct_avg(path, col, row_start, end) <= metric["avg_ci_high"]
+
+
+def test_confidence_interval_finite_population_correction():
+    # avg 10, stddev 2, 숫자 값 100개 표본 / 1000행 → 모집단 1000개 추정
+    values = (100, 1.0, 20.0, 100, 10.0, 2.0, None)
+    metric = sampling._approx_metric(1000, 100, values)
+    margin = Z_95 * 2.0 / math.sqrt(100) * math.sqrt((1000 - 100) / (1000 - 1))
+    assert metric["avg_ci_low"] == pytest.approx(10.0 - margin)
+    assert metric["avg_ci_high"] == pytest.approx(10.0 + margin)
+
+    # 표본이 범위 전체면 구간 폭 0
+    full = sampling._approx_metric(100, 100, values)
+    assert full["avg_ci_low"] == full["avg_ci_high"] == pytest.approx(10.0)
+    # NULL이 섞여도 범위 안 숫자 값을 모두 봤으면 폭 0
+    with_nulls = sampling._approx_metric(120, 120, values)
+    assert with_nulls["avg_ci_high"] - with_nulls["avg_ci_low"] == pytest.approx(0.0)
+    assert with_nulls["non_null_count"] == 100
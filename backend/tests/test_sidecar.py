@@ -0,0 +1,83 @@
+"""sidecar 타입 카탈로그 - staged 사본에서 추정, CSV View도 같은 타입으로 읽음"""
+import duckdb
+
+from app.core.registry import DatasetMeta
+from app.engine import duckdb_cache
+from app.engine.duckdb_cache import DuckDBCache
+from app.engine.sidecar import ROW_ID_COLUMN, build_sidecar, infer_column_types
+
+EXPECTED_TYPES = {
+    "No.": "int",
+    "Step ID": "int",
+    "Step Name": "string",
+    "TempAct_U": "double",
+    "PressAct": "double",
+}
+
+
+class _Registry:
+    def __init__(self, *metas):
+        self._by_id = {m.dataset_id: m for m in metas}
+
+    def get(self, dataset_id):
+        return self._by_id.get(dataset_id)
+
+
+def test_build_sidecar_infers_types_from_staged_copy(trace_csvs):
+    dataset_id, path, _ = trace_csvs[0]
+    inferred = {}
+    sidecar = build_sidecar(f"{dataset_id}_types", path, force=True, on_column_types=inferred.update)
+
+    assert inferred == EXPECTED_TYPES
+    described = {row[0]: row[1] for row in duckdb.sql(f"DESCRIBE SELECT * FROM read_parquet('{sidecar}')").fetchall()}
+    assert described[ROW_ID_COLUMN] == "BIGINT"
+    assert described["Step ID"] == "BIGINT"
+    assert described["TempAct_U"] == "DOUBLE"
+    assert described["Step Name"] == "VARCHAR"
+
+
+def test_infer_column_types_checks_value_format():
+    conn = duckdb.connect()
+    conn.execute(
+        "CREATE TABLE t AS SELECT * FROM (VALUES "
+        "('1', '1.0', '2025/01/06', '08:00:01', '2025-01-06 08:00:00', '1.5', NULL::VARCHAR), "
+        "('-2', '2', '2025-01-07', '23:59:59.5', '2025/01/06T08:00:00', 'x', NULL)"
+        ") v(a, b, c, d, e, f, g)"
+    )
+    assert infer_column_types(conn, "t") == {
+        "a": "int",
+        "b": "double",
+        "c": "date",
+        "d": "time",
+        "e": "timestamp",
+        "f": "string",
+        "g": "string",
+    }
+
+
+def test_csv_view_matches_sidecar_view(trace_csvs, monkeypatch):
+    dataset_id, path, _ = trace_csvs[1]
+    sidecar_id, csv_id = f"{dataset_id}_parquet", f"{dataset_id}_csv"
+    build_sidecar(sidecar_id, path, force=True)
+    meta = DatasetMeta(csv_id, path, "trace_1.csv", 0, 0.0, list(EXPECTED_TYPES), column_types=EXPECTED_TYPES)
+    monkeypatch.setattr(duckdb_cache, "get_registry", lambda: _Registry(meta))
+
+    cache = DuckDBCache(pool_size=1, max_datasets=4, pinned=())
+    select = f"SELECT * EXCLUDE ({ROW_ID_COLUMN}) FROM {{}} ORDER BY \"No.\""
+    extremes = "SELECT MIN(\"Step ID\"), MAX(\"Step ID\"), MIN(\"TempAct_U\"), MAX(\"PressAct\") FROM {}"
+    with cache.view(sidecar_id, path) as parquet_view:
+        with cache.cursor() as conn:
+            parquet_rows = conn.execute(select.format(parquet_view.query)).fetchall()
+            parquet_extremes = conn.execute(extremes.format(parquet_view.query)).fetchone()
+    monkeypatch.setattr(duckdb_cache, "SIDECAR_ENABLED", False)
+    with cache.view(csv_id, path) as csv_view:
+        assert not csv_view.row_indexed
+        assert csv_view.numeric_columns == parquet_view.numeric_columns - {ROW_ID_COLUMN}
+        with cache.cursor() as conn:
+            csv_rows = conn.execute(f"SELECT * FROM {csv_view.query} ORDER BY \"No.\"").fetchall()
+            csv_extremes = conn.execute(extremes.format(csv_view.query)).fetchone()
+
+    assert csv_rows == parquet_rows
+    # 문자열 비교였다면 MAX("Step ID")는 '9'
+    assert csv_extremes == parquet_extremes
+    assert csv_extremes[1] == 24
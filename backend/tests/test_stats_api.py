@@ -0,0 +1,81 @@
+"""통계 API - group_by 요청은 동기(/stats)와 비동기 작업(/stats/jobs)이 같은 그룹별 통계를 반환"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import stats as stats_api
+from app.core.registry import DatasetMeta
+from app.engine import duckdb_cache
+from app.main import app
+
+COLUMN_TYPES = {"No.": "int", "Step ID": "int", "Step Name": "string", "TempAct_U": "double", "PressAct": "double"}
+
+
+class _Registry:
+    def __init__(self, meta):
+        self._meta = meta
+
+    def get(self, dataset_id):
+        return self._meta if dataset_id == self._meta.dataset_id else None
+
+
+@pytest.fixture
+def client(trace_csvs, monkeypatch):
+    dataset_id, path, _ = trace_csvs[0]
+    meta = DatasetMeta(dataset_id, path, "trace_0.csv", 0, 0.0, list(COLUMN_TYPES), column_types=COLUMN_TYPES)
+    registry = _Registry(meta)
+    monkeypatch.setattr(stats_api, "get_dataset", registry.get)
+    monkeypatch.setattr(duckdb_cache, "get_registry", lambda: registry)
+    # with 블록 없이 만들어서 startup(메타데이터 스캔, 감시) 이벤트는 실행하지 않음
+    return TestClient(app), dataset_id
+
+
+def _run_job(client, dataset_id, body):
+    response = client.post(f"/api/datasets/{dataset_id}/stats/jobs", json=body)
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + 10
+    while True:
+        job = client.get(f"/api/stats/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_group_by_job_matches_sync_stats(client):
+    client, dataset_id = client
+    body = {"columns": ["TempAct_U"], "group_by": "Step ID"}
+
+    sync = client.post(f"/api/datasets/{dataset_id}/stats", json=body)
+    assert sync.status_code == 200, sync.text
+    job = _run_job(client, dataset_id, body)
+
+    assert job["status"] == "done"
+    assert job["result"]["metrics"] == {}
+    assert job["result"]["groups"] == sync.json()["groups"]
+    assert [g["key"]["Step ID"] for g in job["result"]["groups"]] == list(range(15))
+
+
+@pytest.mark.parametrize("path", ["stats", "stats/jobs"])
+def test_group_by_rejects_approx_and_bad_column(client, path):
+    client, dataset_id = client
+    url = f"/api/datasets/{dataset_id}/{path}"
+    approx = client.post(url, json={"columns": ["TempAct_U"], "group_by": "Step ID", "mode": "approx"})
+    assert approx.status_code == 400
+    unknown = client.post(url, json={"columns": ["TempAct_U"], "group_by": "Nope"})
+    assert unknown.status_code == 400
+
+
+def test_group_by_returns_requested_metrics_only(client):
+    client, dataset_id = client
+    body = {"columns": ["TempAct_U"], "group_by": "step", "metrics": ["avg"]}
+
+    sync = client.post(f"/api/datasets/{dataset_id}/stats", json=body).json()
+    job = _run_job(client, dataset_id, body)
+
+    for groups in (sync["groups"], job["result"]["groups"]):
+        metric = groups[0]["metrics"]["TempAct_U"]
+        assert metric["avg"] == pytest.approx(500.45)
+        assert metric["count"] is None and metric["max"] is None
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+결과 변환(shaping) 마이크로 벤치마크 - 이전(값 단위 Python 루프) vs 현재(컬럼 단위 일괄 변환)
+
+넓은 합성 trace(기본 207컬럼 × 10,000행)를 메모리 DuckDB에 만들고 같은 쿼리 결과로
+- preview 행 dict 생성: fetchall + 셀 루프 vs fetchnumpy + 컬럼 zip
+- 메트릭 reshape: (컬럼, 메트릭)마다 shape_metric_value vs 메트릭별 일괄 변환
+- 응답 JSON 직렬화: jsonable_encoder + json.dumps vs dump_json
+을 비교한다. 두 방식의 결과가 같은지도 확인한다.
+
+    python bench/bench_shaping.py --rows 10000 --columns 207
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.engine.duckdb_engine import METRIC_ORDER, metric_select_parts, reshape_metrics  # noqa: E402
+from app.engine.shaping import dump_json, numpy_to_rows, shape_metric_value  # noqa: E402
+from app.engine.sql import quote_ident  # noqa: E402
+
+
+def create_table(conn: duckdb.DuckDBPyConnection, rows: int, columns: int, varchar: bool) -> List[str]:
+    """합성 trace 테이블 (No., Date, Time + 센서 컬럼), varchar=True면 CSV View처럼 전부 문자열"""
+    sensors = max(columns - 3, 1)
+    parts = [
+        'range AS "No."',
+        "strftime(TIMESTAMP '2025-01-06 08:00:00' + to_seconds(range), '%Y/%m/%d') AS \"Date\"",
+        "strftime(TIMESTAMP '2025-01-06 08:00:00' + to_seconds(range), '%H:%M:%S') AS \"Time\"",
+    ]
+    for i in range(sensors):
+        # 일부 컬럼은 정수 값, 일부는 NULL 포함
+        if i % 5 == 0:
+            expr = f"(range % {i + 7})"
+        elif i % 7 == 0:
+            expr = f"CASE WHEN range % 11 = 0 THEN NULL ELSE round(random() * 500, 3) END"
+        else:
+            expr = f"round({i} + random() * 100, 3)"
+        parts.append(f"{expr} AS {quote_ident(f'Sensor_{i:03d}')}")
+    table = "t_varchar" if varchar else "t_typed"
+    select = f"SELECT {', '.join(parts)} FROM range({rows})"
+    if varchar:
+        select = f"SELECT COLUMNS(*)::VARCHAR FROM ({select})"
+    conn.execute(f"CREATE OR REPLACE TABLE {table} AS {select}")
+    return [row[0] for row in conn.execute(f"DESCRIBE {table}").fetchall()]
+
+
+def legacy_rows(conn: duckdb.DuckDBPyConnection, query: str, columns: List[str]) -> List[Dict[str, Any]]:
+    """이전 preview 변환: fetchall 후 셀마다 dict에 넣기"""
+    result = conn.execute(query).fetchall()
+    rows = []
+    for row in result:
+        row_dict = {}
+        for i, col in enumerate(columns):
+            row_dict[col] = row[i] if i < len(row) else None
+        rows.append(row_dict)
+    return rows
+
+
+def legacy_reshape(columns: List[str], metric_keys, values) -> Dict[str, Dict[str, Any]]:
+    """이전 메트릭 변환: (컬럼, 메트릭)마다 shape_metric_value"""
+    metrics: Dict[str, Dict[str, Any]] = {col: {} for col in columns}
+    for (col, metric_name), value in zip(metric_keys, values):
+        metrics[col][metric_name] = shape_metric_value(metric_name, value)
+    return metrics
+
+
+def legacy_dump(content: Any) -> bytes:
+    """이전 응답 직렬화: FastAPI 기본 경로 (jsonable_encoder → JSONResponse)"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    """repeat번 실행한 시간의 중앙값 (ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="결과 변환 before/after 벤치마크")
+    parser.add_argument("--rows", type=int, default=10000, help="preview 행 수 (기본 10000 = PREVIEW_LIMIT_MAX)")
+    parser.add_argument("--columns", type=int, default=207, help="컬럼 수 (기본 207)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)")
+    args = parser.parse_args()
+
+    conn = duckdb.connect()
+    print(f"rows={args.rows} columns={args.columns} repeat={args.repeat} (중앙값 ms)\n")
+    print(f"{'case':<46}{'before':>10}{'after':>10}{'speedup':>9}")
+
+    for varchar in (True, False):
+        label = "varchar(CSV View)" if varchar else "typed(sidecar)"
+        columns = create_table(conn, args.rows, args.columns, varchar)
+        table = "t_varchar" if varchar else "t_typed"
+        query = f"SELECT {', '.join(quote_ident(c) for c in columns)} FROM {table}"
+
+        numeric = frozenset() if varchar else frozenset(c for c in columns if c not in ("Date", "Time"))
+        select_parts, metric_keys = metric_select_parts(columns, numeric)
+        metric_row = conn.execute(f"SELECT {', '.join(select_parts)} FROM {table}").fetchone()
+        assert [m for _, m in metric_keys[:len(METRIC_ORDER)]] == list(METRIC_ORDER)
+
+        rows_before = legacy_rows(conn, query, columns)
+        rows_after = numpy_to_rows(conn.execute(query).fetchnumpy(), columns)
+        assert rows_before == rows_after, "preview 행 결과 불일치"
+        metrics_before = legacy_reshape(columns, metric_keys, metric_row)
+        metrics_after = reshape_metrics(columns, metric_keys, metric_row)
+        assert json.dumps(metrics_before) == json.dumps(metrics_after), "메트릭 결과 불일치"
+        response = {"columns": columns, "rows": rows_after}
+        assert legacy_dump(response) == dump_json(response), "JSON 결과 불일치"
+
+        cases = [
+            ("preview rows (fetch + dict)",
+             lambda: legacy_rows(conn, query, columns),
+             lambda: numpy_to_rows(conn.execute(query).fetchnumpy(), columns)),
+            ("metrics reshape",
+             lambda: legacy_reshape(columns, metric_keys, metric_row),
+             lambda: reshape_metrics(columns, metric_keys, metric_row)),
+            ("preview JSON encode",
+             lambda: legacy_dump(response),
+             lambda: dump_json(response)),
+        ]
+        for name, before, after in cases:
+            t_before = measure(before, args.repeat)
+            t_after = measure(after, args.repeat)
+            print(f"{label + ' ' + name:<46}{t_before:>10.2f}{t_after:>10.2f}{t_before / t_after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+엔진 + HTTP 부하 벤치마크
+
+합성 ALD trace(bench/trace_gen.py)로 임시 작업 디렉토리를 만들고
+스캔 → ingest(sidecar) 후 다음 시나리오를 동시성 단계별로 실행한다.
+
+- engine.preview_rows / engine.compute_metrics / engine.build_meta_map / engine.get_dataset
+- http.datasets / http.preview / http.stats / http.series (같은 프로세스에서 uvicorn 실행, 또는 --url)
+
+시나리오마다 p50/p99/mean/max 지연(ms), 처리량(req/s), 오류 수를 재고 마지막에 peak RSS를 더해
+JSON으로 출력한다. --baseline으로 이전 결과를 주면 p99가 허용 비율 이상 느려진 시나리오를 표시하고
+종료 코드 1을 반환한다.
+
+    python bench/run_bench.py --rows 300000 --files 2 --concurrency 1,8 --json bench.json
+    python bench/run_bench.py --baseline bench.json --tolerance 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# app 설정은 import 시점의 환경 변수로 정해지므로, app 모듈은 main()에서 환경을 준비한 뒤 import한다
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "aldlist-bench"
+STATS_COLUMNS = 20  # 통계/시계열 요청당 컬럼 수
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """정렬된 값의 q 분위수 (선형 보간)"""
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def peak_rss_mb() -> float:
+    """프로세스 peak RSS (MB, Linux는 KB 단위, macOS는 바이트 단위)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(call: Callable[[random.Random], None], requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """call을 requests번 (동시 concurrency개) 실행하고 지연 분포/처리량 집계"""
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def one(i: int):
+        rng = random.Random(seed * 1_000_003 + i)
+        t0 = time.perf_counter()
+        try:
+            call(rng)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            return
+        elapsed = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencies.append(elapsed)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+    }
+
+
+def random_range(rng: random.Random, total_rows: int, max_span: int) -> tuple:
+    """[start, end) 임의 행 범위 (span ≤ max_span)"""
+    span = rng.randint(1, max(1, min(max_span, total_rows)))
+    start = rng.randint(0, max(0, total_rows - span))
+    return start, start + span
+
+
+def numeric_columns(meta) -> List[str]:
+    """ingest에서 추정한 컬럼 타입 기준 숫자 컬럼 (통계/시계열 요청 대상)"""
+    return [c for c, t in (meta.column_types or {}).items() if t in ("int", "double")]
+
+
+def prepare_workspace(workdir: Path, rows: int, files: int, seed: int, regenerate: bool) -> Dict[str, float]:
+    """작업 디렉토리에 합성 trace 생성 + 스캔 + ingest (단계별 소요 시간 반환)"""
+    from trace_gen import DEFAULT_SCHEMA, load_columns, write_trace
+
+    from app.core.registry import get_registry, load_registry
+    from app.core.scanner import scan_metadata
+    from app.engine.ingest import ingest_all
+
+    data_dir = workdir / "data"
+    manifest_path = workdir / "manifest.json"
+    manifest = {"rows": rows, "files": files, "seed": seed}
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    current = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+    if regenerate or current != manifest:
+        for old in data_dir.glob("bench_trace_*.csv"):
+            old.unlink()
+        columns = load_columns(DEFAULT_SCHEMA)
+        for i in range(files):
+            write_trace(data_dir / f"bench_trace_{i:03d}.csv", columns, rows, seed=seed + i)
+        manifest_path.write_text(json.dumps(manifest))
+    timings["generate_s"] = round(time.perf_counter() - t0, 3)
+
+    t0 = time.perf_counter()
+    scan_metadata(full=True)
+    get_registry().reload()
+    timings["scan_s"] = round(time.perf_counter() - t0, 3)
+
+    t0 = time.perf_counter()
+    results = ingest_all(load_registry())
+    failed = [r for r in results if r.error]
+    if failed:
+        raise RuntimeError(f"ingest 실패: {failed[0].dataset_id}: {failed[0].error}")
+    timings["ingest_s"] = round(time.perf_counter() - t0, 3)
+    get_registry().reload()
+    return timings
+
+
+def engine_scenarios(metas, total_rows: int, preview_limit: int, max_span: int) -> Dict[str, Callable]:
+    """엔진 함수 직접 호출 시나리오"""
+    from app.core.column_meta import build_meta_map
+    from app.core.registry import get_dataset
+    from app.engine.duckdb_engine import compute_metrics, preview_rows
+
+    numeric = {m.dataset_id: numeric_columns(m) for m in metas}
+
+    def preview(rng):
+        meta = rng.choice(metas)
+        offset = rng.randint(0, max(0, total_rows - preview_limit))
+        preview_rows(meta.path, offset, preview_limit, dataset_id=meta.dataset_id)
+
+    def metrics(rng):
+        meta = rng.choice(metas)
+        columns = rng.sample(numeric[meta.dataset_id], min(STATS_COLUMNS, len(numeric[meta.dataset_id])))
+        start, end = random_range(rng, total_rows, max_span)
+        compute_metrics(meta.path, columns, start, end, dataset_id=meta.dataset_id)
+
+    def meta_map(rng):
+        meta = rng.choice(metas)
+        build_meta_map(meta.dataset_id, meta.columns)
+
+    def lookup(rng):
+        if get_dataset(rng.choice(metas).dataset_id) is None:
+            raise LookupError("dataset not found")
+
+    return {
+        "engine.preview_rows": preview,
+        "engine.compute_metrics": metrics,
+        "engine.build_meta_map": meta_map,
+        "engine.get_dataset": lookup,
+    }
+
+
+def http_scenarios(base_url: str, metas, total_rows: int, preview_limit: int, max_span: int) -> Dict[str, Callable]:
+    """HTTP 엔드포인트 시나리오 (urllib, 응답 본문까지 읽음)"""
+    numeric = {m.dataset_id: numeric_columns(m) for m in metas}
+
+    def request(path: str, body: Optional[dict] = None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(
+            base_url + path, data=data, headers={"Content-Type": "application/json"} if data else {}
+        )
+        with urllib.request.urlopen(req, timeout=120) as res:
+            res.read()
+
+    def datasets(rng):
+        request("/api/datasets")
+
+    def preview(rng):
+        meta = rng.choice(metas)
+        offset = rng.randint(0, max(0, total_rows - preview_limit))
+        request(f"/api/datasets/{meta.dataset_id}/preview?offset={offset}&limit={preview_limit}")
+
+    def stats(rng):
+        meta = rng.choice(metas)
+        columns = rng.sample(numeric[meta.dataset_id], min(STATS_COLUMNS, len(numeric[meta.dataset_id])))
+        start, end = random_range(rng, total_rows, max_span)
+        request(f"/api/datasets/{meta.dataset_id}/stats", {"columns": columns, "row_range": {"start": start, "end": end}})
+
+    def series(rng):
+        meta = rng.choice(metas)
+        columns = rng.sample(numeric[meta.dataset_id], min(4, len(numeric[meta.dataset_id])))
+        start, end = random_range(rng, total_rows, max_span)
+        params = urllib.parse.urlencode(
+            {"columns": ",".join(columns), "points": 2000, "row_start": start, "row_end": end}
+        )
+        request(f"/api/datasets/{meta.dataset_id}/series?{params}")
+
+    return {
+        "http.datasets": datasets,
+        "http.preview": preview,
+        "http.stats": stats,
+        "http.series": series,
+    }
+
+
+def start_server():
+    """같은 프로세스에서 uvicorn 실행 (빈 포트), Returns: (base_url, server)"""
+    import uvicorn
+
+    from app.main import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("uvicorn 서버가 시작되지 않았습니다")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """baseline 대비 p99가 (1 + tolerance)배를 넘은 시나리오 목록"""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in report["results"]:
+        old = previous.get((r["scenario"], r["concurrency"]))
+        if old and old["p99_ms"] > 0 and r["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{r['scenario']} (c={r['concurrency']}): p99 {old['p99_ms']:.1f} → {r['p99_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ALDList 엔진/HTTP 부하 벤치마크")
+    parser.add_argument("--rows", type=int, default=100000, help="파일당 행 수")
+    parser.add_argument("--files", type=int, default=2, help="합성 trace 파일 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR, help="DATA_DIR/META_DIR/CACHE_DIR를 만들 디렉토리")
+    parser.add_argument("--regenerate", action="store_true", help="같은 설정의 데이터가 있어도 다시 생성")
+    parser.add_argument("--concurrency", default="1,8", help="동시성 단계 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=200, help="시나리오/동시성 단계당 요청 수")
+    parser.add_argument("--preview-limit", type=int, default=2000)
+    parser.add_argument("--max-span", type=int, default=50000, help="통계/시계열 요청의 최대 행 범위")
+    parser.add_argument("--only", default="", help="실행할 시나리오 접두어 (예: engine. 또는 http.stats)")
+    parser.add_argument("--url", default="", help="이미 떠 있는 서버 주소 (같은 DATA_DIR을 봐야 함, 없으면 내장 서버)")
+    parser.add_argument("--json", type=Path, default=None, help="결과 JSON 저장 경로 (없으면 stdout)")
+    parser.add_argument("--baseline", type=Path, default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p99 허용 증가 비율")
+    parser.add_argument("--verbose", action="store_true", help="서버/엔진 로그 출력")
+    args = parser.parse_args()
+
+    workdir = args.workdir.resolve()
+    for name, sub in (("DATA_DIR", "data"), ("META_DIR", "meta"), ("CACHE_DIR", "cache")):
+        (workdir / sub).mkdir(parents=True, exist_ok=True)
+        os.environ[name] = str(workdir / sub)
+    os.environ.setdefault("WATCH_ENABLED", "0")
+    os.environ.setdefault("LOG_LEVEL", "DEBUG" if args.verbose else "WARNING")
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    with quiet:
+        timings = prepare_workspace(workdir, args.rows, args.files, args.seed, args.regenerate)
+        from app.core.registry import load_registry
+
+        metas = load_registry()
+        scenarios = engine_scenarios(metas, args.rows, args.preview_limit, args.max_span)
+        server = None
+        if not args.only or args.only.startswith("http"):
+            base_url = args.url.rstrip("/")
+            if not base_url:
+                base_url, server = start_server()
+            scenarios.update(http_scenarios(base_url, metas, args.rows, args.preview_limit, args.max_span))
+
+        results = []
+        for name, call in scenarios.items():
+            if args.only and not name.startswith(args.only):
+                continue
+            for level in levels:
+                result = run_scenario(call, args.requests, level, args.seed + level)  # 단계마다 다른 요청 (결과 캐시 재사용 방지)
+                results.append({"scenario": name, **result})
+                print(
+                    f"{name:26s} c={level:<3d} p50={result['p50_ms']:9.2f}ms p99={result['p99_ms']:9.2f}ms "
+                    f"{result['throughput_rps']:9.1f} req/s errors={result['errors']}",
+                    file=sys.stderr,
+                )
+
+        if server is not None:
+            server.should_exit = True
+
+    report = {
+        "config": {
+            "rows": args.rows,
+            "files": args.files,
+            "columns": len(metas[0].columns) if metas else 0,
+            "requests": args.requests,
+            "concurrency": levels,
+            "preview_limit": args.preview_limit,
+            "max_span": args.max_span,
+            "cpu_count": os.cpu_count(),
+        },
+        "prepare": timings,
+        "results": results,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        args.json.write_text(text + "\n", encoding="utf-8")
+        print(f"✅ {args.json}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"⚠️  회귀: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
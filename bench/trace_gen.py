@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+합성 ALD trace CSV 생성기 (벤치마크용)
+
+실제 trace와 같은 스키마(metadata/datasets.json의 207컬럼, 순서 그대로)로 CSV를 만든다.
+스키마 파일이 없으면 patterns.yaml 센서 계열로 207컬럼을 구성한다.
+값은 column_meta/patterns.yaml로 판정한 센서 계열(type)마다 레시피 step에 따라 만든다.
+
+- No. / Recipe(Table) Name / Step ID / Step Name / Date / Time: 1초 간격, step 구간이 연속
+- temperature: zone별 설정값 + 잡음, heater/apc: 0~100%, pressure: step별 압력 + 잡음
+- valve: step마다 열림(1)/닫힘(0), gas: 공정 step에서만 유량, aux/unknown: 잡음
+- `Unnamed: N` 컬럼은 실제 파일처럼 빈 값
+
+    python bench/trace_gen.py --rows 100000 --files 3 --out /tmp/aldlist-bench/data
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = PROJECT_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import duckdb  # noqa: E402
+
+from app.core.column_meta import generate_meta_for_column, get_pattern_matcher  # noqa: E402
+from app.engine.sql import quote_literal  # noqa: E402
+
+DEFAULT_SCHEMA = PROJECT_ROOT / "metadata" / "datasets.json"
+TRACE_COLUMNS = ["No.", "Recipe(Table) Name", "Step ID", "Step Name", "Date", "Time"]
+ZONES = ["U", "CU", "C", "CL", "L"]
+# 레시피: (step 이름, 길이(초), 압력(Torr), 가스 유량 배율) - ALD 사이클은 DEPO/PURGE 반복
+RECIPE_HEAD = [("STANDBY", 120, 760.0, 0.0), ("BOAT_LOAD", 300, 760.0, 0.0), ("PUMP_DOWN", 240, 0.5, 0.0),
+               ("LEAK_CHECK", 180, 0.05, 0.0), ("TEMP_STAB", 600, 0.3, 0.2)]
+RECIPE_CYCLE = [("DEPO", 20, 1.2, 1.0), ("PURGE", 30, 0.4, 0.1)]
+RECIPE_TAIL = [("N2_PURGE", 300, 2.0, 0.3), ("VENT", 240, 760.0, 0.0), ("BOAT_UNLOAD", 300, 760.0, 0.0)]
+
+
+def default_columns() -> List[str]:
+    """스키마 파일이 없을 때: patterns.yaml 센서 계열로 207컬럼 구성"""
+    columns = list(TRACE_COLUMNS)
+    for family in ("TempAct", "TempSet", "HeaterTC", "CascadeTC"):
+        columns += [f"{family}_{z}" for z in ZONES]
+    for family in ("TempAct_HT", "TempAct_PR", "TempTarg_HT", "TempTarg_PR", "Power_HT"):
+        columns += [f"{family}.{z}" for z in ZONES]
+    columns += ["PressAct", "PressSet", "VG11", "VG12", "VG13", "APCValveMon", "APCValveSet"]
+    gases = ["N2-1", "N2-3", "N2-4", "DCS", "NH3", "F2"]
+    for family in ("MFCMon", "MFCRcpSet", "MFCRamp", "MFCInput"):
+        columns += [f"{family}_{g}" for g in gases]
+    aux = 0
+    valve = 1
+    while len(columns) < 206:
+        if valve <= 40:
+            columns += [f"ValveAct_{valve}", f"ValveCtrl_{valve}", f"ValveSet_{valve}"]
+            valve += 1
+        else:
+            aux += 1
+            columns.append(f"AUXMon_JH{aux}")
+    columns = columns[:206]
+    return columns + ["Unnamed: 206"]
+
+
+def load_columns(schema: Optional[Path]) -> List[str]:
+    """스키마 파일(datasets.json 형식)의 첫 데이터셋 컬럼, 없으면 default_columns()"""
+    if schema is not None and schema.exists():
+        datasets = json.loads(schema.read_text(encoding="utf-8"))
+        if datasets and datasets[0].get("columns"):
+            return list(datasets[0]["columns"])
+    return default_columns()
+
+
+def build_recipe(rows: int) -> List[tuple]:
+    """rows 길이를 채우는 step 목록 (head + DEPO/PURGE 반복 + tail, 필요하면 잘라냄)"""
+    head_len = sum(s[1] for s in RECIPE_HEAD + RECIPE_TAIL)
+    cycle_len = sum(s[1] for s in RECIPE_CYCLE)
+    cycles = max((rows - head_len) // cycle_len, 1)
+    steps = RECIPE_HEAD + RECIPE_CYCLE * cycles + RECIPE_TAIL
+    total = sum(s[1] for s in steps)
+    if total < rows:
+        name, length, press, gas = steps[-1]
+        steps[-1] = (name, length + rows - total, press, gas)
+    return steps
+
+
+def generate_trace(columns: List[str], rows: int, seed: int = 0) -> pd.DataFrame:
+    """합성 trace DataFrame (컬럼 순서 = columns)"""
+    rng = np.random.default_rng(seed)
+    steps = build_recipe(rows)
+    lengths = np.array([s[1] for s in steps])
+    step_index = np.repeat(np.arange(len(steps)), lengths)[:rows]
+    pressure = np.array([s[2] for s in steps])[step_index]
+    gas_scale = np.array([s[3] for s in steps])[step_index]
+    step_names = np.array([s[0] for s in steps], dtype=object)[step_index]
+
+    timestamps = pd.Timestamp("2025-01-06 08:00:00") + pd.to_timedelta(np.arange(rows), unit="s")
+    base: Dict[str, np.ndarray] = {
+        "No.": np.arange(1, rows + 1),
+        "Recipe(Table) Name": np.full(rows, "ALD_SIN_STD", dtype=object),
+        "Step ID": step_index,
+        "Step Name": step_names,
+        "Date": timestamps.strftime("%Y/%m/%d").to_numpy(dtype=object),
+        "Time": timestamps.strftime("%H:%M:%S").to_numpy(dtype=object),
+    }
+
+    matcher = get_pattern_matcher()
+    data: Dict[str, np.ndarray] = {}
+    for i, col in enumerate(columns):
+        if col in base:
+            data[col] = base[col]
+            continue
+        if col.startswith("Unnamed:"):
+            data[col] = np.full(rows, None, dtype=object)
+            continue
+        kind = generate_meta_for_column(col, matcher).get("type")
+        noise = rng.normal(0.0, 1.0, rows)
+        if kind == "temperature":
+            target = 600.0 + (i % 5) * 2.0
+            values = target if "Set" in col or "Targ" in col else target + noise * 0.3
+        elif kind in ("heater", "apc"):
+            values = np.clip(40.0 + 10.0 * gas_scale + noise * 2.0, 0.0, 100.0)
+        elif kind == "pressure":
+            values = pressure if col.endswith("Set") else pressure * (1.0 + noise * 0.01)
+        elif kind == "valve":
+            values = ((step_index + i) % 3 == 0).astype(np.int64)
+        elif kind == "gas":
+            values = np.maximum(gas_scale * (1.0 + (i % 7)) + noise * 0.01 * gas_scale, 0.0)
+        else:
+            values = 10.0 + (i % 13) + noise * 0.1
+        data[col] = np.round(values, 4) if np.asarray(values).dtype.kind == "f" else values
+        if np.ndim(data[col]) == 0:
+            data[col] = np.full(rows, data[col])
+    return pd.DataFrame(data, columns=columns)
+
+
+def write_trace(path: Path, columns: List[str], rows: int, seed: int = 0):
+    """합성 trace를 CSV로 저장 (DuckDB COPY로 빠르게 기록)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame = generate_trace(columns, rows, seed)
+    tmp = path.with_name(f".{path.name}.tmp")
+    conn = duckdb.connect()
+    try:
+        conn.register("trace", frame)
+        conn.execute(f"COPY trace TO {quote_literal(str(tmp))} (HEADER, DELIMITER ',')")
+    finally:
+        conn.close()
+    tmp.replace(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 ALD trace CSV 생성")
+    parser.add_argument("--rows", type=int, default=100000, help="파일당 행 수 (1행 = 1초)")
+    parser.add_argument("--files", type=int, default=1, help="생성할 파일 수")
+    parser.add_argument("--out", type=Path, required=True, help="출력 디렉토리 (DATA_DIR로 사용)")
+    parser.add_argument("--schema", type=Path, default=DEFAULT_SCHEMA, help="컬럼을 가져올 datasets.json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    columns = load_columns(args.schema)
+    for i in range(args.files):
+        path = args.out / f"bench_trace_{i:03d}.csv"
+        write_trace(path, columns, args.rows, seed=args.seed + i)
+        print(f"✅ {path} ({args.rows}행 × {len(columns)}컬럼, {path.stat().st_size / 1024 ** 2:.1f}MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ export interface Dataset {
   filename: string;
   size_bytes: number;
   columns: string[];
+  column_types?: Record<string, 'int' | 'double' | 'date' | 'time' | 'timestamp' | 'string'> | null;
 }
 
 export interface PreviewResponse {
@@ -19,6 +20,13 @@ export interface PreviewResponse {
   columns: string[];
   rows: Record<string, any>[];
   row_count: number;
+  next_cursor?: number | null;  // 다음 페이지 요청 시 cursor로 전달 (마지막 페이지면 null)
+}
+
+// layout=columnar 응답: data[i]는 columns[i]의 값 배열
+export interface ColumnarPreviewResponse extends Omit<PreviewResponse, 'rows'> {
+  layout: 'columnar';
+  data: any[][];
 }
 
 export interface Metric {
@@ -29,12 +37,42 @@ export interface Metric {
   avg?: number;
   stddev?: number;
   error?: string;
+  // mode="approx"
+  approximate?: boolean;
+  sample_size?: number;
+  avg_ci_low?: number;
+  avg_ci_high?: number;
+  p50?: number;
+  p95?: number;
+  // metrics로 요청한 경우만
+  p99?: number;
+  histogram?: { edges: number[]; counts: number[] };
+  distinct_count?: number;
+  first?: number | string;
+  last?: number | string;
 }
 
 export interface StatsResponse {
   metrics: Record<string, Metric>;
 }
 
+export interface SeriesData {
+  x: number[];  // 행 번호
+  y: number[];
+  time?: string[];  // "Date Time" (Date/Time 컬럼이 있는 경우)
+}
+
+export interface SeriesResponse {
+  dataset_id: string;
+  method: 'minmax' | 'lttb';
+  points: number;
+  row_start: number;
+  row_end: number;
+  total_rows: number;
+  pyramid: boolean;
+  series: Record<string, SeriesData>;
+}
+
 export interface ColumnMeta {
   key: string;
   title?: string;
@@ -84,9 +122,35 @@ export async function getDatasets(): Promise<{ datasets: Dataset[] }> {
 export async function getPreview(
   datasetId: string,
   offset: number = 0,
-  limit: number = 2000
+  limit: number = 2000,
+  cursor?: number | null  // 이전 응답의 next_cursor (있으면 offset 대신 사용)
 ): Promise<PreviewResponse> {
-  return fetchAPI(`/api/datasets/${datasetId}/preview?offset=${offset}&limit=${limit}`);
+  const cursorParam = cursor != null ? `&cursor=${cursor}` : '';
+  return fetchAPI(`/api/datasets/${datasetId}/preview?offset=${offset}&limit=${limit}${cursorParam}`);
+}
+
+export async function getPreviewColumnar(
+  datasetId: string,
+  offset: number = 0,
+  limit: number = 2000,
+  cursor?: number | null
+): Promise<ColumnarPreviewResponse> {
+  const cursorParam = cursor != null ? `&cursor=${cursor}` : '';
+  return fetchAPI(`/api/datasets/${datasetId}/preview?offset=${offset}&limit=${limit}${cursorParam}&layout=columnar`);
+}
+
+// columnar 응답 → 기존 rows 형식 (행 객체는 화면에 필요한 시점에 한 번만 만듦)
+export function decodeColumnar(res: ColumnarPreviewResponse): PreviewResponse {
+  const { data, layout: _layout, ...rest } = res;
+  const rows: Record<string, any>[] = new Array(res.row_count);
+  for (let r = 0; r < res.row_count; r++) {
+    const row: Record<string, any> = {};
+    for (let c = 0; c < res.columns.length; c++) {
+      row[res.columns[c]] = data[c][r];
+    }
+    rows[r] = row;
+  }
+  return { ...rest, rows };
 }
 
 export async function getStats(
@@ -94,7 +158,10 @@ export async function getStats(
   columns: string[],
   rowStart?: number,
   rowEnd?: number,
-  computeColumns?: string[]  // 확장 포인트: 선택적으로 일부 컬럼만 계산 (없으면 columns 전체)
+  computeColumns?: string[],  // 확장 포인트: 선택적으로 일부 컬럼만 계산 (없으면 columns 전체)
+  timeRange?: { start?: string; end?: string },  // [start, end) 시각 (예: "2025-01-06T09:00:00")
+  mode: 'exact' | 'approx' = 'exact',  // approx: 표본 기반 근사값 + 신뢰구간
+  metrics?: string[]  // 계산할 메트릭 (없으면 기본 6개, 예: ["avg", "p95", "histogram"])
 ): Promise<StatsResponse> {
   return postAPI(`/api/datasets/${datasetId}/stats`, {
     columns,
@@ -102,9 +169,27 @@ export async function getStats(
       ? { start: rowStart ?? 0, end: rowEnd ?? null }
       : null,
     compute_columns: computeColumns || undefined,  // 선택적 파라미터 (없으면 전체 columns 사용)
+    time_range: timeRange || undefined,
+    mode,
+    metrics: metrics || undefined,
   });
 }
 
+// 차트용 다운샘플링 시계열 (컬럼당 최대 points개 점)
+export async function getSeries(
+  datasetId: string,
+  columns: string[],
+  points: number = 2000,
+  method: 'minmax' | 'lttb' = 'minmax',
+  rowStart?: number,
+  rowEnd?: number
+): Promise<SeriesResponse> {
+  const params = new URLSearchParams({ columns: columns.join(','), points: String(points), method });
+  if (rowStart !== undefined) params.set('row_start', String(rowStart));
+  if (rowEnd !== undefined) params.set('row_end', String(rowEnd));
+  return fetchAPI(`/api/datasets/${datasetId}/series?${params}`);
+}
+
 export async function fetchDatasetColumns(datasetId: string): Promise<DatasetColumnsResponse> {
   return fetchAPI(`/api/datasets/${datasetId}/columns`);
 }
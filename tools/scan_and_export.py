@@ -4,114 +4,76 @@ CSV 파일 스캔 및 메타데이터 생성
 """
 from __future__ import annotations
 
-import csv
-import json
-import hashlib
-from dataclasses import dataclass, asdict
+import argparse
+import sys
 from pathlib import Path
-from typing import List, Set, Dict
+from typing import Any, Dict, List
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
-DATA_DIR = PROJECT_ROOT / "data"
-OUT_DIR = PROJECT_ROOT / "metadata"
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-
-@dataclass
-class DatasetMeta:
-    dataset_id: str
-    path: str
-    filename: str
-    size_bytes: int
-    mtime: float
-    columns: List[str]
-
-
-def read_header(p: Path) -> List[str]:
-    with p.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.reader(f)
-        return next(r)
-
-
-def make_dataset_id(p: Path) -> str:
-    # filename 기반으로 dataset_id 생성 (경로와 무관하게 동일한 ID 생성)
-    # 이렇게 하면 로컬과 배포 환경에서 동일한 dataset_id가 생성됨
-    filename = p.name
-    h = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:12]
-    return f"ds_{h}"
+BACKEND_DIR = PROJECT_ROOT / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# 스캔 로직은 서버와 같은 증분 스캐너 사용 (바뀐 CSV만 다시 읽음)
+# DATA_DIR / META_DIR 환경 변수도 서버와 동일하게 적용됨
+from app.core.profiling import configure_logging  # noqa: E402
+from app.core.scanner import scan_metadata  # noqa: E402
+from app.core.settings import DATA_DIR, META_DIR as OUT_DIR  # noqa: E402
+
+
+def ingest(metas: List[Dict[str, Any]], force: bool = False):
+    """각 CSV를 Parquet sidecar로 변환 + 전체 통계 인덱스 생성 (백엔드 ingest 단계 재사용)"""
+    try:
+        from app.engine.ingest import ingest_dataset
+        from app.engine.sidecar import prune_sidecars
+        from app.engine.stats_index import prune_stats_index
+    except ImportError as e:
+        print(f"⚠️  ingest 건너뜀 (백엔드 의존성 없음: {e})")
+        return
+
+    print("\n📦 Parquet sidecar 변환 + 통계 인덱스 생성 중...")
+    for m in metas:
+        result = ingest_dataset(
+            m["dataset_id"],
+            str(DATA_DIR / m["filename"]),
+            m["columns"],
+            force=force,
+            column_types=m.get("column_types"),
+        )
+        if result.error:
+            print(f"✗ {m['filename']} -> {result.error}")
+        else:
+            print(f"✓ {m['filename']} (sidecar: {'O' if result.sidecar else 'X'}, stats: {'O' if result.stats_index else 'X'})")
+    dataset_ids = {m["dataset_id"] for m in metas}
+    prune_sidecars(dataset_ids)
+    prune_stats_index(dataset_ids)
 
 
 def main():
-    files = sorted(DATA_DIR.glob("*.csv"))
-    if not files:
+    parser = argparse.ArgumentParser(description="CSV 파일 스캔 및 메타데이터 생성")
+    parser.add_argument("--no-ingest", action="store_true", help="Parquet sidecar 변환 건너뛰기")
+    parser.add_argument("--force-ingest", action="store_true", help="sidecar가 최신이어도 다시 변환")
+    parser.add_argument("--full", action="store_true", help="변경 여부와 무관하게 모든 CSV 헤더 다시 읽기")
+    args = parser.parse_args()
+    configure_logging()
+
+    if not any(DATA_DIR.glob("*.csv")):
         raise SystemExit(f"No CSV files in {DATA_DIR}")
 
-    metas: List[DatasetMeta] = []
-    columns_by_file: Dict[str, List[str]] = {}
-    col_sets: List[Set[str]] = []
-
-    for p in files:
-        try:
-            st = p.stat()
-            cols = read_header(p)
-            
-            # DATA_DIR 기준 상대 경로 저장 (배포 환경 호환성)
-            try:
-                # DATA_DIR 기준 상대 경로 계산
-                rel_path = p.relative_to(DATA_DIR)
-                path_to_store = str(rel_path)
-            except ValueError:
-                # DATA_DIR 밖에 있으면 filename만 저장
-                path_to_store = p.name
-
-            metas.append(
-                DatasetMeta(
-                    dataset_id=make_dataset_id(p),
-                    path=path_to_store,  # 상대 경로 또는 filename만 저장
-                    filename=p.name,
-                    size_bytes=st.st_size,
-                    mtime=st.st_mtime,
-                    columns=cols,
-                )
-            )
-
-            columns_by_file[str(p)] = cols
-            col_sets.append(set(cols))
-            print(f"✓ {p.name} ({len(cols)} cols)")
-        except Exception as e:
-            print(f"✗ {p.name} -> {e}")
-
-    union = sorted(set().union(*col_sets)) if col_sets else []
-    inter = sorted(set.intersection(*col_sets)) if col_sets else []
-
-    # 메타데이터 저장
-    (OUT_DIR / "datasets.json").write_text(
-        json.dumps([asdict(m) for m in metas], ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-
-    (OUT_DIR / "columns_by_file.json").write_text(
-        json.dumps(columns_by_file, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-
-    (OUT_DIR / "columns_union.json").write_text(
-        json.dumps(union, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-    
-    (OUT_DIR / "columns_intersection.json").write_text(
-        json.dumps(inter, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    result = scan_metadata(full=args.full)
+    union_count = len(set().union(*(m["columns"] for m in result.datasets)))
+    inter_count = len(set.intersection(*(set(m["columns"]) for m in result.datasets))) if result.datasets else 0
 
     print("\n" + "="*50)
-    print(f"✓ 처리 완료: {len(metas)}개 파일")
-    print(f"✓ 전체 컬럼 수: {len(union)}개")
-    print(f"✓ 공통 컬럼 수: {len(inter)}개")
+    print(f"✓ 처리 완료: {len(result.datasets)}개 파일 (추가 {len(result.added)}, 변경 {len(result.changed)}, "
+          f"삭제 {len(result.removed)}, 유지 {result.unchanged})")
+    print(f"✓ 전체 컬럼 수: {union_count}개")
+    print(f"✓ 공통 컬럼 수: {inter_count}개")
     print(f"✓ 저장 위치: {OUT_DIR}")
     print("="*50)
 
+    if not args.no_ingest:
+        ingest(result.datasets, force=args.force_ingest)
+
 
 if __name__ == "__main__":
     main()